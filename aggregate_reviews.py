@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Streaming review aggregation for the catalog and the homepage ticker
+Reads a reviews export (data/reviews.json format or a mongoexport, JSON
+array or JSONL) one review at a time and maintains, per product, the
+count, mean and 1-5 star histogram of the reviews the reviews API counts
+(verified !== false). Results go to:
+
+- src/app/lib/review-stats.json: per-product stats, store-wide totals and
+  the reviews the homepage ticker shows (db.featuredReviews() rules:
+  featured with 4+ stars, newest first, else the best-rated 4+ stars)
+- products.ts: averageRating / reviewCount for every product with real
+  reviews (products without any keep their current values)
+
+A checkpoint (data/review-stats-state.json) holds the running sums and
+each counted review's (product, rating). The only review text in it is
+the ticker candidates: at most TICKER_SIZE trimmed cards per pool, which
+a --delta run needs to keep earlier picks. Memory is therefore bounded by
+the number of reviews rather than their size. A rerun only
+folds in differences: new reviews are added, edited ratings or verified
+flags are swapped out, and reviews missing from a full export are
+subtracted. Pass --delta when the input holds only new or edited reviews.
+
+averageRating is rounded the way the API does (Math.round(avg * 10) / 10).
+
+    python3 aggregate_reviews.py                      # data/reviews.json
+    mongoexport -c reviews | python3 aggregate_reviews.py /dev/stdin --delta
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from catalog_patch import patch_fields
+from json_stream import iter_records, record_time
+from product_catalog import PRODUCTS_FILE
+
+REVIEWS_FILE = 'data/reviews.json'
+STATS_FILE = 'src/app/lib/review-stats.json'
+STATE_FILE = 'data/review-stats-state.json'
+STATS_VERSION = 1
+STATE_VERSION = 1
+TICKER_SIZE = 10      # same limit as db.featuredReviews()
+TICKER_MIN_RATING = 4
+TICKER_TEXT_CHARS = 180
+
+def review_key(review) -> str:
+    """id, mongo _id, else a content hash"""
+    key = review.get('id') or review.get('_id')
+    if isinstance(key, dict):
+        key = key.get('$oid')
+    if key:
+        return str(key)
+    return 'sha1:' + hashlib.sha1(json.dumps(review, sort_keys=True).encode('utf-8')).hexdigest()
+
+def valid_rating(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 1 <= value <= 5
+
+def star_bucket(rating) -> int:
+    """Histogram slot 0-4 for a 1-5 rating (half stars round up)"""
+    return min(4, math.floor(rating + 0.5) - 1)
+
+def js_round_1(value) -> float:
+    """Math.round(value * 10) / 10"""
+    return math.floor(value * 10 + 0.5) / 10
+
+def ticker_card(review) -> Dict:
+    """What review-ticker.tsx renders, trimmed to a card"""
+    name = ' '.join(str(review.get('userName') or '').split()) or 'Customer'
+    parts = name.split(' ')
+    display = f"{parts[0]} {parts[-1][0]}." if len(parts) > 1 else parts[0]
+    text = ' '.join(str(review.get('comment') or '').split())
+    if len(text) > TICKER_TEXT_CHARS:
+        text = text[:TICKER_TEXT_CHARS].rsplit(' ', 1)[0].rstrip(',.;:—-') + '…'
+    return {
+        'id': review_key(review),
+        'name': display,
+        'initial': display[0].upper(),
+        'title': str(review.get('title') or '').strip(),
+        'text': text,
+        'stars': star_bucket(review['rating']) + 1,
+        'productId': str(review['productId']),
+        'rating': review['rating'],
+        'createdAt': record_time(review) or '',  # normalized so the ranks below sort by time
+    }
+
+# Sort keys for the two ticker pools; larger is better (heapq keeps the largest)
+def featured_rank(card):
+    return card['createdAt']
+
+def top_rated_rank(card):
+    return (card['rating'], card['createdAt'])
+
+class ReviewStats:
+    """Running per-product sums plus the contribution of every counted review"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.products: Dict[str, Dict] = state.get('products', {})  # id -> {count, sum, histogram}
+        self.counted: Dict[str, List] = state.get('counted', {})   # review key -> [productId, rating]
+        self.pools: Dict[str, List[Dict]] = state.get('pools', {'featured': [], 'topRated': []})
+
+    def _apply(self, product_id, rating, sign):
+        stats = self.products.setdefault(product_id, {'count': 0, 'sum': 0, 'histogram': [0] * 5})
+        stats['count'] += sign
+        stats['sum'] += sign * rating
+        stats['histogram'][star_bucket(rating)] += sign
+        if stats['count'] == 0:
+            del self.products[product_id]
+
+    def set_review(self, key, contribution):
+        """Make review key count as contribution ([productId, rating], or None for not counted)"""
+        previous = self.counted.get(key)
+        if previous == contribution:
+            return False
+        if previous is not None:
+            self._apply(previous[0], previous[1], -1)
+            del self.counted[key]
+        if contribution is not None:
+            self._apply(contribution[0], contribution[1], 1)
+            self.counted[key] = contribution
+        return True
+
+    def summary(self, product_id) -> Dict:
+        stats = self.products[product_id]
+        return {
+            'reviewCount': stats['count'],
+            'averageRating': js_round_1(stats['sum'] / stats['count']),
+            'histogram': stats['histogram'],
+        }
+
+    def to_state(self) -> Dict:
+        return {
+            'version': STATE_VERSION,
+            'products': self.products,
+            'counted': self.counted,
+            'pools': self.pools,
+        }
+
+def load_stats(state_file) -> ReviewStats:
+    if not os.path.exists(state_file):
+        return ReviewStats()
+    with open(state_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise SystemExit(f"❌ {state_file} is version {state.get('version')}, expected {STATE_VERSION}; "
+                         f"rerun with --reset")
+    return ReviewStats(state)
+
+def write_json(path, data, **dump_args):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **dump_args)
+    os.replace(tmp_path, path)
+
+def fold_reviews(stats: ReviewStats, reviews, delta=False) -> Dict[str, int]:
+    """Apply a stream of reviews to stats; returns per-outcome tallies"""
+    tally = dict.fromkeys(('changed', 'unchanged', 'unverified', 'removed', 'malformed'), 0)
+    seen = set()
+    featured, top_rated = [], []  # bounded min-heaps of (rank, key, card)
+
+    def offer(heap, rank, card):
+        entry = (rank, card['id'], card)
+        if len(heap) < TICKER_SIZE:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    for review in reviews:
+        if not isinstance(review, dict):
+            tally['malformed'] += 1
+            continue
+        key = review_key(review)
+        seen.add(key)
+        if not review.get('productId') or not valid_rating(review.get('rating')):
+            stats.set_review(key, None)  # e.g. a rating edited to garbage stops counting
+            tally['malformed'] += 1
+            continue
+        counts = review.get('verified') is not False
+        if stats.set_review(key, [str(review['productId']), review['rating']] if counts else None):
+            tally['changed'] += 1
+        else:
+            tally['unchanged' if counts else 'unverified'] += 1
+        if review['rating'] >= TICKER_MIN_RATING:
+            card = ticker_card(review)
+            offer(top_rated, top_rated_rank(card), card)
+            if review.get('featured') is True:
+                offer(featured, featured_rank(card), card)
+
+    if not delta:
+        for key in [k for k in stats.counted if k not in seen]:
+            stats.set_review(key, None)
+            tally['removed'] += 1
+
+    # A full export re-offers every review; a delta keeps earlier picks it didn't touch
+    def merged(pool_name, heap, rank):
+        kept = [c for c in stats.pools.get(pool_name, []) if c['id'] not in seen] if delta else []
+        cards = kept + [card for _, _, card in heap]
+        return sorted(cards, key=lambda c: (rank(c), c['id']), reverse=True)[:TICKER_SIZE]
+    stats.pools = {
+        'featured': merged('featured', featured, featured_rank),
+        'topRated': merged('topRated', top_rated, top_rated_rank),
+    }
+    return tally
+
+def build_output(stats: ReviewStats) -> Dict:
+    total = sum(s['count'] for s in stats.products.values())
+    rating_sum = sum(s['sum'] for s in stats.products.values())
+    ticker = stats.pools['featured'] or stats.pools['topRated']
+    return {
+        'version': STATS_VERSION,
+        'generatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z'),
+        'totals': {
+            'reviewCount': total,
+            'averageRating': js_round_1(rating_sum / total) if total else 0,
+        },
+        'products': {product_id: stats.summary(product_id) for product_id in sorted(stats.products)},
+        'ticker': [{k: card[k] for k in ('name', 'initial', 'title', 'text', 'stars', 'productId')}
+                   for card in ticker],
+    }
+
+def ts_number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate product reviews into ratings and ticker data")
+    parser.add_argument('reviews', nargs='?', default=REVIEWS_FILE,
+                        help=f"reviews export, JSON array or JSONL (default: {REVIEWS_FILE})")
+    parser.add_argument('--delta', action='store_true',
+                        help="input holds only new or edited reviews (missing ones are not deletions)")
+    parser.add_argument('--products', default=PRODUCTS_FILE, help=f"catalog to update (default: {PRODUCTS_FILE})")
+    parser.add_argument('--output', default=STATS_FILE, help=f"stats JSON to write (default: {STATS_FILE})")
+    parser.add_argument('--state', default=STATE_FILE, help=f"checkpoint file (default: {STATE_FILE})")
+    parser.add_argument('--reset', action='store_true', help="ignore the checkpoint and start over")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print the products.ts diff; nothing is written")
+    args = parser.parse_args()
+
+    print("⭐ Review Aggregator")
+    print("=" * 50)
+    stats = ReviewStats() if args.reset else load_stats(args.state)
+    tally = fold_reviews(stats, iter_records(args.reviews), delta=args.delta)
+    print(f"📝 {tally['changed']:,} new or changed, {tally['unchanged']:,} unchanged, "
+          f"{tally['removed']:,} removed, {tally['unverified']:,} unverified (not counted)")
+    if tally['malformed']:
+        print(f"⚠️  Skipped {tally['malformed']} review(s) without a product or a 1-5 rating")
+
+    output = build_output(stats)
+    totals = output['totals']
+    print(f"📊 {totals['reviewCount']:,} counted review(s) across {len(output['products'])} product(s), "
+          f"average {totals['averageRating']}★; {len(output['ticker'])} ticker review(s)")
+
+    updates = {
+        product_id: {'averageRating': ts_number(s['averageRating']), 'reviewCount': str(s['reviewCount'])}
+        for product_id, s in output['products'].items()
+    }
+    result = patch_fields(args.products, updates, dry_run=args.dry_run)
+    for product_id in result['applied']:
+        s = output['products'][product_id]
+        print(f"✓ {product_id}: {s['averageRating']}★ from {s['reviewCount']} review(s)")
+    for product_id, reason in result['skipped'].items():
+        if reason != 'unchanged':
+            print(f"⏭️  Skipped: {product_id} ({reason})")
+
+    if args.dry_run:
+        print(result['diff'] or "(no changes)")
+        print("🔍 Dry run: stats and checkpoint not saved")
+        return
+    write_json(args.output, output, indent=2)
+    write_json(args.state, stats.to_state(), separators=(',', ':'))
+    print(f"💾 Wrote {args.output}, updated {len(result['applied'])} product(s), checkpoint saved to {args.state}")
+
+if __name__ == '__main__':
+    main()
@@ -5,73 +5,128 @@ Analyzes products.ts to find incomplete products and broken image references
 """
 
 import json
+import os
 import re
 from pathlib import Path
 from typing import Dict, List, Set
+from urllib.parse import unquote
+
+from product_catalog import load_catalog
+
+SOURCE_DIRS = ('src',)
+SOURCE_EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.mjs', '.css', '.json'}
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif', '.svg', '.ico'}
+URL_RE = re.compile(r"""["'`(](/[^"'`()\s?#]+)""")
 
 def extract_products_from_ts(file_path: str) -> List[Dict]:
     """Extract product objects from TypeScript file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find the products array
-    products_match = re.search(r'export const products: Product\[\] = \[(.*)\];', content, re.DOTALL)
-    if not products_match:
-        return []
-    
-    products_str = products_match.group(1)
-    
-    # Split into individual product objects
-    product_pattern = r'\{[^}]*?id:\s*[\'"]([^\'"]+)[\'"][^}]*?\}'
-    
     products = []
-    # More robust extraction
-    depth = 0
-    current_product = ""
-    for char in products_str:
-        if char == '{':
-            depth += 1
-        elif char == '}':
-            depth -= 1
-        current_product += char
-        
-        if depth == 0 and current_product.strip() and current_product.strip() != ',':
-            # Extract key fields
-            id_match = re.search(r'id:\s*[\'"]([^\'"]+)[\'"]', current_product)
-            name_match = re.search(r'name:\s*[\'"]([^\'"]+)[\'"]', current_product)
-            desc_match = re.search(r'description:\s*[\'"]([^\'"]+)[\'"]', current_product)
-            detailed_match = re.search(r'detailedDescription:?\s*[\'"]([^\'"]+)', current_product)
-            pain_match = re.search(r'painPointHeadline:?\s*[\'"]([^\'"]+)', current_product)
-            sensory_match = re.search(r'sensoryDescription:?\s*[\'"]([^\'"]+)', current_product)
-            benefits_match = re.search(r'benefits:\s*\[', current_product)
-            images_match = re.findall(r'url:\s*[\'"]([^\'"]+)[\'"]', current_product)
-            
-            if id_match:
-                products.append({
-                    'id': id_match.group(1),
-                    'name': name_match.group(1) if name_match else 'Unknown',
-                    'description': desc_match.group(1) if desc_match else '',
-                    'has_detailed': bool(detailed_match and len(detailed_match.group(1)) > 100),
-                    'has_pain_point': bool(pain_match),
-                    'has_sensory': bool(sensory_match and len(sensory_match.group(1)) > 100),
-                    'has_benefits': bool(benefits_match),
-                    'images': images_match,
-                    'raw': current_product
-                })
-            current_product = ""
+    for record in load_catalog(file_path):
+        product = record['data']
+        if not product.get('id'):
+            continue
+        detailed = product.get('detailedDescription') or ''
+        sensory = product.get('sensoryDescription') or ''
+        products.append({
+            'id': product['id'],
+            'name': product.get('name', 'Unknown'),
+            'description': product.get('description', ''),
+            'has_detailed': len(detailed) > 100,
+            'has_pain_point': bool(product.get('painPointHeadline')),
+            'has_sensory': len(sensory) > 100,
+            'has_benefits': 'benefits' in product,
+            'images': [img['url'] for img in product.get('images') or [] if img.get('url')],
+            'primary_image': product.get('image'),
+            'span': record['span']
+        })
     
     return products
 
-def check_image_exists(image_path: str, public_dir: str) -> bool:
-    """Check if image file exists"""
+def snapshot_public(public_dir: str) -> Dict[str, int]:
+    """
+    Walk public_dir once with os.scandir and return {relative path: size}.
+
+    Every image reference is then resolved against this in-memory snapshot
+    instead of one exists() syscall per URL.
+    """
+    files = {}
+    stack = [(public_dir, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path + '/'))
+                elif entry.is_file():
+                    files[rel_path] = entry.stat().st_size
+    return files
+
+def check_image_exists(image_path: str, public_files: Dict[str, int]) -> bool:
+    """Check if image file exists in the public/ snapshot"""
     # Remove leading slash
-    rel_path = image_path.lstrip('/')
-    full_path = Path(public_dir) / rel_path
-    return full_path.exists()
+    return unquote(image_path.lstrip('/')) in public_files
+
+def find_source_references(public_files: Dict[str, int], source_dirs=SOURCE_DIRS) -> Set[str]:
+    """Public files referenced by absolute URL anywhere in the app source"""
+    referenced = set()
+    for source_dir in source_dirs:
+        for path in Path(source_dir).rglob('*'):
+            if path.suffix not in SOURCE_EXTENSIONS or not path.is_file():
+                continue
+            text = path.read_text(encoding='utf-8', errors='ignore')
+            for url in URL_RE.findall(text):
+                rel_path = unquote(url.lstrip('/'))
+                if rel_path in public_files:
+                    referenced.add(rel_path)
+    return referenced
+
+def find_variant_references(referenced: Set[str], public_dir: str) -> Set[str]:
+    """Responsive variants of referenced images (see generate_responsive_images.py)"""
+    manifest_path = Path(public_dir) / 'image-variants.json'
+    if not manifest_path.exists():
+        return set()
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        variants = json.load(f)
+    return {
+        variant['url'].lstrip('/')
+        for url, record in variants.items() if url.lstrip('/') in referenced
+        for variant in record['variants']
+    }
+
+def find_referenced(products: List[Dict], public_files: Dict[str, int], public_dir: str) -> Set[str]:
+    """Public files the site uses: catalog images, app source URLs and their variants"""
+    referenced = {
+        unquote(url.lstrip('/'))
+        for p in products
+        for url in p['images'] + ([p['primary_image']] if p['primary_image'] else [])
+    }
+    referenced |= find_source_references(public_files)
+    referenced |= find_variant_references(referenced, public_dir)
+    return referenced
+
+def find_orphans(public_files: Dict[str, int], referenced: Set[str]) -> Dict[str, Dict]:
+    """
+    Image files nothing references, grouped by top-level directory.
+
+    Returns {group: {'bytes': total, 'files': [paths]}}, largest group first.
+    """
+    groups = {}
+    for rel_path, size in public_files.items():
+        if rel_path in referenced or Path(rel_path).suffix.lower() not in IMAGE_EXTENSIONS:
+            continue
+        group = rel_path.split('/', 1)[0] if '/' in rel_path else '(root)'
+        entry = groups.setdefault(group, {'bytes': 0, 'files': []})
+        entry['bytes'] += size
+        entry['files'].append(rel_path)
+    for entry in groups.values():
+        entry['files'].sort()
+    return dict(sorted(groups.items(), key=lambda item: item[1]['bytes'], reverse=True))
 
 def audit_products(products_file: str, public_dir: str):
     """Audit all products for completeness and broken images"""
     products = extract_products_from_ts(products_file)
+    public_files = snapshot_public(public_dir)
     
     print("=" * 80)
     print("PRODUCT AUDIT REPORT")
@@ -99,7 +154,7 @@ def audit_products(products_file: str, public_dir: str):
         # Check images
         broken_images = []
         for img_path in product['images']:
-            if not check_image_exists(img_path, public_dir):
+            if not check_image_exists(img_path, public_files):
                 broken_images.append(img_path)
         
         if broken_images:
@@ -132,12 +187,24 @@ def audit_products(products_file: str, public_dir: str):
     for name in complete_products:
         print(f"  ✓ {name}")
     
+    # Report files nothing references (candidates to drop from the deploy)
+    referenced = find_referenced(products, public_files, public_dir)
+    orphans = find_orphans(public_files, referenced)
+    orphan_bytes = sum(group['bytes'] for group in orphans.values())
+    orphan_count = sum(len(group['files']) for group in orphans.values())
+
+    print(f"\n\n🗑️  UNREFERENCED IMAGES ({orphan_count} files, {orphan_bytes / (1024 * 1024):.1f}MB)")
+    print("-" * 80)
+    for group, entry in orphans.items():
+        print(f"  {group}: {len(entry['files'])} file(s), {entry['bytes'] / (1024 * 1024):.1f}MB")
+
     # Summary
     print(f"\n\n📊 SUMMARY")
     print("=" * 80)
     print(f"Complete Products: {len(complete_products)}/{len(products)} ({len(complete_products)/len(products)*100:.1f}%)")
     print(f"Need Content Updates: {len([p for p in incomplete_products if any('Missing' in i for i in p['issues'])])}")
     print(f"Have Broken Images: {len(missing_images)}")
+    print(f"Unreferenced Images: {orphan_count} ({orphan_bytes / (1024 * 1024):.1f}MB)")
     
     # Export detailed report
     with open('product_audit_results.json', 'w') as f:
@@ -145,7 +212,8 @@ def audit_products(products_file: str, public_dir: str):
             'total': len(products),
             'complete': complete_products,
             'incomplete': incomplete_products,
-            'missing_images': missing_images
+            'missing_images': missing_images,
+            'orphaned_files': orphans
         }, f, indent=2)
     
     print(f"\nDetailed report saved to: product_audit_results.json")
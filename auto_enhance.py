@@ -3,7 +3,9 @@
 Automated script to add premium content to all remaining products
 """
 
-import re
+import argparse
+
+from catalog_patch import patch_products
 
 # Define premium content for each remaining product
 ENHANCEMENTS = {
@@ -133,51 +135,30 @@ SIMPLE_ENHANCEMENTS = {
         averageRating: 4.6, reviewCount: 25,''',
 }
 
-def add_premium_content(file_path):
-    """Add premium content to all products"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    modified = content
-    added_count = 0
-    
-    # Add detailed enhancements
-    for product_id, enhancement in ENHANCEMENTS.items():
-        # Find the product and add content before closing brace
-        pattern = rf"(id: '{product_id}',.*?weightMl: '[^']+',)\s*\}},"
-        
-        def replacer(match):
-            return match.group(1) + '\n        ' + enhancement + '\n    },'
-        
-        new_content = re.sub(pattern, replacer, modified, flags=re.DOTALL)
-        if new_content != modified:
-            added_count += 1
-            print(f"✓ Enhanced: {product_id}")
-            modified = new_content
+def add_premium_content(file_path, dry_run=False):
+    """Add premium content to all products in one batch pass"""
+    insertions = {**ENHANCEMENTS, **SIMPLE_ENHANCEMENTS}
+    result = patch_products(file_path, insertions, dry_run=dry_run)
     
-    # Add simple enhancements
-    for product_id, enhancement in SIMPLE_ENHANCEMENTS.items():
-        pattern = rf"(id: '{product_id}',.*?weightMl: '[^']+',)\s*\}},"
-        
-        def replacer(match):
-            return match.group(1) + '\n        ' + enhancement + '\n    },'
-        
-        new_content = re.sub(pattern, replacer, modified, flags=re.DOTALL)
-        if new_content != modified:
-            added_count += 1
-            print(f"✓ Enhanced: {product_id}")
-            modified = new_content
+    for product_id in result['applied']:
+        print(f"✓ Enhanced: {product_id}")
+    for product_id, reason in result['skipped'].items():
+        print(f"⏭️  Skipped: {product_id} ({reason})")
     
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(modified)
+    if dry_run:
+        print(result['diff'] or "(no changes)")
     
-    print(f"\n✅ Total products enhanced: {added_count}")
+    added_count = len(result['applied'])
+    print(f"\n✅ Total products {'to enhance' if dry_run else 'enhanced'}: {added_count}")
     return added_count
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Add premium content to products.ts")
+    parser.add_argument('--dry-run', action='store_true', help="print a unified diff instead of writing")
+    args = parser.parse_args()
     try:
-        count = add_premium_content('src/app/lib/products.ts')
-        print(f"✅ SUCCESS! Added premium content to {count} products")
+        count = add_premium_content('src/app/lib/products.ts', dry_run=args.dry_run)
+        if not args.dry_run:
+            print(f"✅ SUCCESS! Added premium content to {count} products")
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Content-addressed backup store for image tooling
+Replaces the full public/images_backup_<timestamp> copies: each file's bytes
+are stored once under .image-backups/objects/<sha256[:2]>/<sha256>, and each
+run only writes a small manifest listing which blob every path had.
+
+Backing up a file whose bytes are already stored costs a hash and nothing
+else, so backup time and disk use grow with what changed, not with the size
+of the catalog. Blobs are cloned with a reflink where the filesystem supports
+it (btrfs, XFS, APFS-style copy-on-write), falling back to a plain copy.
+Hardlinks are available as an opt-in (--link hardlink): they are free, but a
+tool that later rewrites the original in place would change the backup too.
+
+    python3 backup_store.py list
+    python3 backup_store.py backup optimize-20260205_231357 public/hero.png
+    python3 backup_store.py restore optimize-20260205_231357
+    python3 backup_store.py gc
+"""
+
+import argparse
+import errno
+import fcntl
+import json
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from image_manifest import file_sha256
+
+STORE_DIR = '.image-backups'
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+def reflink(src, dst) -> bool:
+    """Copy-on-write clone src to dst; False if the filesystem can't"""
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError as e:
+        if os.path.exists(dst):
+            os.unlink(dst)
+        if e.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+            return False
+        raise
+
+def clone_file(src, dst, link='auto'):
+    """Place src's bytes at dst using the cheapest method allowed by link"""
+    if link == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    if link in ('auto', 'reflink') and reflink(src, dst):
+        return 'reflink'
+    shutil.copyfile(src, dst)
+    return 'copy'
+
+class BackupStore:
+    """Blobs keyed by SHA-256 plus one JSON manifest per run"""
+
+    def __init__(self, root=STORE_DIR, link='auto'):
+        self.root = Path(root)
+        self.objects = self.root / 'objects'
+        self.runs = self.root / 'runs'
+        self.link = link
+
+    def blob_path(self, sha256) -> Path:
+        return self.objects / sha256[:2] / sha256
+
+    def put(self, path, sha256=None):
+        """
+        Store one file's bytes. Safe to call from several processes or threads at once.
+
+        Returns {'sha256', 'size', 'stored'} where stored is the number of
+        new bytes written (0 when the blob already existed).
+        """
+        sha256 = sha256 or file_sha256(path)
+        size = os.path.getsize(path)
+        blob = self.blob_path(sha256)
+        if blob.exists():
+            return {'sha256': sha256, 'size': size, 'stored': 0}
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob.with_name(f"{sha256}.{os.getpid()}-{threading.get_ident()}.tmp")
+        method = clone_file(path, tmp_path, self.link)
+        if method != 'hardlink':
+            os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, blob)
+        return {'sha256': sha256, 'size': size, 'stored': size}
+
+    def new_run_name(self, prefix) -> str:
+        return f"{prefix}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    def write_run(self, name, source_root, files, append=False):
+        """
+        Record a run: files maps path (relative to source_root) to the dict
+        returned by put(). Empty runs are not written. With append, files
+        are merged into an existing run of the same name (first copy wins,
+        so a file backed up twice keeps its original bytes).
+        """
+        if not files:
+            return None
+        if append and (self.runs / f"{name}.json").exists():
+            files = {**files, **self.load_run(name)['files']}
+        self.runs.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'name': name,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'root': str(source_root),
+            'files': {rel: {'sha256': f['sha256'], 'size': f['size']} for rel, f in sorted(files.items())},
+        }
+        run_path = self.runs / f"{name}.json"
+        with open(run_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        return run_path
+
+    def backup(self, name, source_root, paths, append=False):
+        """Store paths (under source_root) as one run; returns (run manifest path, new bytes)"""
+        files, stored = {}, 0
+        for path in paths:
+            result = self.put(path)
+            stored += result['stored']
+            files[Path(os.path.relpath(path, source_root)).as_posix()] = result
+        return self.write_run(name, source_root, files, append), stored
+
+    def load_run(self, name):
+        with open(self.runs / f"{name}.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_runs(self):
+        if not self.runs.exists():
+            return []
+        return sorted(p.stem for p in self.runs.glob('*.json'))
+
+    def restore(self, name, dest_root=None, only=None):
+        """
+        Put every file of a run back under dest_root (default: the run's root).
+
+        Each file is written through a temp file and renamed into place.
+        Returns the number of files restored.
+        """
+        run = self.load_run(name)
+        dest_root = Path(dest_root or run['root'])
+        restored = 0
+        for rel, info in run['files'].items():
+            if only and rel not in only:
+                continue
+            target = dest_root / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f".{target.name}.restore.tmp")
+            clone_file(self.blob_path(info['sha256']), tmp_path, 'auto')
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+            restored += 1
+        return restored
+
+    def gc(self, keep=None):
+        """Delete runs not in keep (if given) and every blob no run references"""
+        live = set()
+        for name in self.list_runs():
+            if keep is not None and name not in keep:
+                (self.runs / f"{name}.json").unlink()
+                continue
+            live.update(info['sha256'] for info in self.load_run(name)['files'].values())
+
+        freed = 0
+        if self.objects.exists():
+            for blob in self.objects.glob('*/*'):
+                if blob.name not in live and not blob.name.endswith('.tmp'):
+                    freed += blob.stat().st_size
+                    blob.unlink()
+        return freed
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed image backups")
+    parser.add_argument('--store', default=STORE_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="show recorded runs")
+    backup = sub.add_parser('backup', help="add files to a run (created if missing)")
+    backup.add_argument('run')
+    backup.add_argument('files', nargs='+')
+    backup.add_argument('--root', default='public', help="directory paths are recorded relative to")
+    restore = sub.add_parser('restore', help="restore every file of a run")
+    restore.add_argument('run')
+    restore.add_argument('--to', help="restore under this directory instead of the original root")
+    gc = sub.add_parser('gc', help="drop unreferenced blobs (and runs not listed with --keep)")
+    gc.add_argument('--keep', nargs='+', metavar='RUN', help="run names to keep; others are deleted")
+    args = parser.parse_args()
+
+    store = BackupStore(args.store)
+    if args.command == 'list':
+        for name in store.list_runs():
+            run = store.load_run(name)
+            total = sum(f['size'] for f in run['files'].values())
+            print(f"📁 {name}: {len(run['files'])} file(s), {total / (1024 * 1024):.2f}MB from {run['root']}")
+    elif args.command == 'backup':
+        store.backup(args.run, args.root, args.files, append=True)
+    elif args.command == 'restore':
+        try:
+            count = store.restore(args.run, args.to)
+        except FileNotFoundError:
+            print(f"❌ No such run: {args.run}")
+            sys.exit(1)
+        print(f"✅ Restored {count} file(s) from {args.run}")
+    elif args.command == 'gc':
+        unknown = sorted(set(args.keep or ()) - set(store.list_runs()))
+        if unknown:
+            # A typo here would otherwise delete the run it meant to keep
+            print(f"❌ No such run(s): {', '.join(unknown)}")
+            sys.exit(1)
+        freed = store.gc(set(args.keep) if args.keep is not None else None)
+        print(f"🧹 Freed {freed / (1024 * 1024):.2f}MB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the asset and catalog tooling
+Builds a synthetic corpus offline (seeded, so every run and every machine
+gets identical inputs), times the main entry points and compares the result
+with a stored baseline:
+
+    optimize_image()            full-size WebP conversion per image
+    optimize_hero_image()       hero cover-crop + budgeted WebP per image
+    extract_products_from_ts()  catalog parse, cold (no cache) and warm
+    check_spelling()            catalog spell check, cold
+
+The image corpus mixes sizes, modes (RGB, RGBA, P, L) and formats (PNG,
+JPEG); products.ts is generated at each --products scale. Each case runs in
+a fresh process so its peak RSS is its own, and the fastest of --repeat runs
+is kept.
+
+    python3 benchmark.py --save-baseline     # record this machine's numbers
+    python3 benchmark.py                      # compare; exits 1 on regression
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from image_pipeline import peak_rss_mb
+from spell_check import CORRECTIONS
+
+WORK_DIR = '.cache/benchmark'
+BASELINE_FILE = '.cache/benchmark-baseline.json'
+CORPUS_VERSION = 1  # bump when the generators below change
+
+IMAGE_SIZES = ((640, 480), (1200, 1200), (1600, 2400), (3000, 2000))
+IMAGE_MODES = ('RGB', 'RGBA', 'P', 'L')
+VOCABULARY = (
+    'premium quality saffron honey kashmiri natural organic walnut almond rich aroma '
+    'handpicked pure golden traditional delicate fresh harvest valley flavor healthy '
+    'antioxidants gifting crunchy smooth wellness ritual everyday luxury sourced'
+).split()
+
+# --- Corpus -----------------------------------------------------------------
+
+def synthetic_image(rng, size, mode):
+    """A gradient with shapes and a little noise: compresses like a product photo"""
+    width, height = size
+    base = Image.linear_gradient('L').resize(size).convert('RGB')
+    tint = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+    img = Image.blend(base, tint, 0.5)
+    draw = ImageDraw.Draw(img)
+    for _ in range(24):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(10, max(11, min(width, height) // 4))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.frombytes('L', size, rng.randbytes(width * height)).convert('RGB')
+    img = Image.blend(img, noise, 0.08)
+
+    if mode == 'RGBA':
+        img.putalpha(Image.radial_gradient('L').resize(size))
+    elif mode == 'P':
+        img = img.convert('P', palette=Image.Palette.ADAPTIVE, colors=128)
+    elif mode == 'L':
+        img = img.convert('L')
+    return img
+
+def build_images(directory, count, seed):
+    """Write count images cycling through sizes and modes; returns their paths"""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        size = IMAGE_SIZES[i % len(IMAGE_SIZES)]
+        mode = IMAGE_MODES[(i // len(IMAGE_SIZES)) % len(IMAGE_MODES)]
+        # JPEG can't hold alpha or a palette
+        ext = 'jpg' if mode in ('RGB', 'L') and i % 2 else 'png'
+        path = directory / f"img{i:03d}-{mode.lower()}-{size[0]}x{size[1]}.{ext}"
+        img = synthetic_image(rng, size, mode)
+        if ext == 'jpg':
+            img.save(path, quality=92)
+        else:
+            img.save(path)
+        paths.append(path)
+    return paths
+
+def sentence(rng, words, typo_rate=0.02):
+    typos = list(CORRECTIONS)
+    out = [rng.choice(typos) if rng.random() < typo_rate else rng.choice(VOCABULARY) for _ in range(words)]
+    return ' '.join(out).capitalize() + '.'
+
+def build_products_ts(count, seed) -> str:
+    """A products.ts with count products shaped like the real catalog"""
+    rng = random.Random(seed)
+    ids = [f"product-{i:05d}" for i in range(count)]
+    parts = ["import { Product } from './types';\n\nconst rawProducts: Product[] = [\n"]
+    for i, product_id in enumerate(ids):
+        name = f"{rng.choice(VOCABULARY).title()} {rng.choice(VOCABULARY).title()} {i}"
+        benefits = ''.join(
+            f'            {{ icon: "✨", title: "{sentence(rng, 2, 0)[:-1]}", description: "{sentence(rng, 6)}" }},\n'
+            for _ in range(4))
+        related = ', '.join(f"'{rng.choice(ids)}'" for _ in range(2))
+        parts.append(
+            "    {\n"
+            f"        id: '{product_id}',\n"
+            f"        name: '{name}',\n"
+            f"        price: {rng.randrange(100, 5000)},\n"
+            f"        image: '/products/{product_id}.webp',\n"
+            f"        category: '{rng.choice(('Nuts', 'Honey', 'Saffron', 'Tea'))}',\n"
+            f'        description: "{sentence(rng, 10)}",\n'
+            f'        detailedDescription: "{" ".join(sentence(rng, 14) for _ in range(8))}",\n'
+            f'        painPointHeadline: "{sentence(rng, 7, 0)}",\n'
+            f'        sensoryDescription: "{" ".join(sentence(rng, 12) for _ in range(5))}",\n'
+            "        benefits: [\n" + benefits + "        ],\n"
+            "        images: [\n"
+            f"            {{ type: 'hero', url: '/products/{product_id}.webp', alt: '{name}' }},\n"
+            f"            {{ type: 'lifestyle', url: '/products/{product_id}-lifestyle.webp', alt: '{name}' }},\n"
+            "        ],\n"
+            f"        frequentlyBoughtWith: [{related}],\n"
+            f"        averageRating: {rng.randrange(35, 50) / 10},\n"
+            f"        reviewCount: {rng.randrange(500)},\n"
+            "    },\n")
+    parts.append("];\n\nexport const products: Product[] = rawProducts;\n")
+    return ''.join(parts)
+
+def build_corpus(work_dir, images, product_scales, seed):
+    """Generate the corpus once per parameter set; later runs reuse it"""
+    params = {'version': CORPUS_VERSION, 'images': images, 'products': list(product_scales), 'seed': seed}
+    work_dir = Path(work_dir)
+    stamp = work_dir / 'corpus.json'
+    if stamp.exists() and json.loads(stamp.read_text()) == params:
+        return params
+    shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"🏗️  Building corpus in {work_dir} ({images} images, products {', '.join(map(str, product_scales))})")
+    build_images(work_dir / 'images', images, seed)
+    for scale in product_scales:
+        (work_dir / f"products-{scale}.ts").write_text(build_products_ts(scale, seed), encoding='utf-8')
+    stamp.write_text(json.dumps(params))
+    return params
+
+# --- Cases ------------------------------------------------------------------
+
+def _time_runs(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+def run_case(name, work_dir, repeat, scale=None):
+    """
+    Run one benchmark case (in its own process) and return its measurements.
+
+    Runs inside work_dir so the catalog cache and outputs land there and
+    never touch the real tree.
+    """
+    import audit_products
+    import optimize_hero_images
+    import optimize_images
+    import spell_check
+
+    os.chdir(work_dir)
+    cache_file = Path('.cache/products.json')
+    drop_cache = lambda: cache_file.unlink(missing_ok=True)
+    images = sorted(Path('images').iterdir())
+    megapixels = 0.0
+    for path in images:
+        with Image.open(path) as img:
+            megapixels += img.size[0] * img.size[1] / 1e6
+
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        if name == 'optimize_image':
+            out_dir = Path('out/webp')
+            out_dir.mkdir(parents=True, exist_ok=True)
+            fn = lambda: [optimize_images.optimize_image(p, out_dir / f"{p.stem}.webp") for p in images]
+            times, items, unit = _time_runs(fn, repeat), len(images), 'images'
+        elif name == 'optimize_hero_image':
+            out_dir = Path('out/hero')
+            out_dir.mkdir(parents=True, exist_ok=True)
+            fn = lambda: [optimize_hero_images.optimize_hero_image(str(p), str(out_dir)) for p in images]
+            times, items, unit = _time_runs(fn, repeat), len(images), 'images'
+        elif name == 'extract_products_from_ts:cold':
+            path = f"products-{scale}.ts"
+            times = _time_runs(lambda: audit_products.extract_products_from_ts(path), repeat, drop_cache)
+            items, unit = scale, 'products'
+        elif name == 'extract_products_from_ts:warm':
+            path = f"products-{scale}.ts"
+            audit_products.extract_products_from_ts(path)
+            times = _time_runs(lambda: audit_products.extract_products_from_ts(path), repeat)
+            items, unit = scale, 'products'
+        elif name == 'check_spelling:cold':
+            path = f"products-{scale}.ts"
+            times = _time_runs(lambda: spell_check.check_spelling(path), repeat, drop_cache)
+            items, unit = scale, 'products'
+        else:
+            raise ValueError(f"Unknown benchmark case {name!r}")
+
+    best = min(times)
+    result = {
+        'seconds': round(best, 4),
+        'median_seconds': round(statistics.median(times), 4),
+        'throughput': round(items / best, 2) if best else None,
+        'unit': f"{unit}/s",
+        'peak_rss_mb': round(peak_rss_mb() or 0, 1),
+    }
+    if unit == 'images':
+        result['megapixels_per_s'] = round(megapixels / best, 2) if best else None
+    return result
+
+def case_list(product_scales):
+    cases = [('optimize_image', None), ('optimize_hero_image', None)]
+    for scale in product_scales:
+        cases += [('extract_products_from_ts:cold', scale), ('extract_products_from_ts:warm', scale),
+                  ('check_spelling:cold', scale)]
+    return cases
+
+def case_key(name, scale):
+    return f"{name}[{scale}]" if scale else name
+
+def run_all(work_dir, product_scales, repeat):
+    results = {}
+    for name, scale in case_list(product_scales):
+        key = case_key(name, scale)
+        # A fresh interpreter per case keeps peak RSS attributable to that case
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            results[key] = pool.submit(run_case, name, os.path.abspath(work_dir), repeat, scale).result()
+        r = results[key]
+        print(f"  {key:<40} {r['seconds']:>9.3f}s  {r['throughput']:>10.1f} {r['unit']:<12} {r['peak_rss_mb']:>7.1f}MB")
+    return results
+
+# --- Baseline ---------------------------------------------------------------
+
+def compare(results, baseline, tolerance, memory_tolerance, min_delta=0.05):
+    """
+    Return a list of regression messages (empty if none).
+
+    A case only counts as slower if it is both over tolerance and at least
+    min_delta seconds slower, so millisecond-scale cases don't flap on noise.
+    """
+    regressions = []
+    print(f"\n📏 Against baseline from {baseline.get('created', '?')} "
+          f"(time +{tolerance:.0%}, memory +{memory_tolerance:.0%} allowed)")
+    for key, result in results.items():
+        base = baseline['results'].get(key)
+        if not base:
+            print(f"  {key:<40} (no baseline)")
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else 1.0
+        rss_ratio = result['peak_rss_mb'] / base['peak_rss_mb'] if base['peak_rss_mb'] else 1.0
+        flag = '✅'
+        if time_ratio > 1 + tolerance and result['seconds'] - base['seconds'] >= min_delta:
+            flag = '❌'
+            regressions.append(f"{key}: {base['seconds']:.3f}s → {result['seconds']:.3f}s ({time_ratio:.2f}x)")
+        if rss_ratio > 1 + memory_tolerance:
+            flag = '❌'
+            regressions.append(f"{key}: peak RSS {base['peak_rss_mb']:.1f}MB → {result['peak_rss_mb']:.1f}MB")
+        print(f"  {flag} {key:<38} time {time_ratio:>5.2f}x   memory {rss_ratio:>5.2f}x")
+    return regressions
+
+def environment():
+    from PIL import __version__ as pillow_version
+    return {'python': platform.python_version(), 'pillow': pillow_version,
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count()}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark image and catalog tooling against a baseline")
+    parser.add_argument('--images', type=int, default=16, help="synthetic images in the corpus (default: 16)")
+    parser.add_argument('--products', type=int, nargs='+', default=[1000, 10000],
+                        help="products.ts scales to generate (default: 1000 10000)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per case; the fastest is kept (default: 3)")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--work-dir', default=WORK_DIR)
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"baseline JSON (default: {BASELINE_FILE})")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before failing, as a fraction (default: 0.25)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25,
+                        help="allowed peak RSS growth before failing, as a fraction (default: 0.25)")
+    parser.add_argument('--min-delta', type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many seconds (default: 0.05)")
+    parser.add_argument('--output', help="also write this run's results to a JSON file")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    print("⏱️  Tooling benchmark")
+    print("=" * 80)
+    corpus = build_corpus(args.work_dir, args.images, args.products, args.seed)
+    run = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'corpus': corpus,
+        'repeat': args.repeat,
+        'environment': environment(),
+        'results': run_all(args.work_dir, args.products, args.repeat),
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(run, indent=2))
+
+    if args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(json.dumps(run, indent=2))
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️  No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('corpus') != corpus:
+        print("⚠️  Baseline was recorded with a different corpus; cases are not comparable")
+        sys.exit(2)
+    if baseline.get('environment') != run['environment']:
+        print(f"⚠️  Baseline environment differs: {baseline.get('environment')}")
+
+    regressions = compare(run['results'], baseline, args.tolerance, args.memory_tolerance, args.min_delta)
+    if regressions:
+        print(f"\n❌ {len(regressions)} REGRESSION(S):")
+        for message in regressions:
+            print(f"   {message}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Offline pincode index for checkout address auto-fill
+Compiles a pincode CSV (e.g. India Post's "All India Pincode Directory":
+one row per post office with Pincode, District, StateName, ...) into
+src/app/lib/pincode-index.json, which /api/pincode/[pincode] bundles and
+loads once per server instance. Lookups are a binary search over
+fixed-width records instead of a round trip to api.postalpincode.in.
+
+Index layout (all little-endian):
+- names: one shared, sorted string table for states, districts and cities
+- records: base64 of `count` fixed-width RECORD structs sorted by pincode:
+  uint32 pincode, uint16 state, uint16 district, uint16 city (name indices)
+
+A pincode served by several post offices gets the state/district/city most
+of its offices report. The record count also goes to the small
+src/app/lib/pincode-index-meta.json, which the client bundles to skip the
+local route entirely while the index is empty. State names are
+normalized to INDIAN_STATES in src/app/lib/pincode.ts so they match the
+checkout's state dropdown.
+
+    python3 build_pincode_index.py all_india_pincode_directory.csv
+
+data/pincode-sample.csv (a few metro pincodes) is a dev/test input only;
+build it somewhere scratch, since a committed partial index would send
+every other pincode through a local 404 before the external lookup:
+
+    python3 build_pincode_index.py data/pincode-sample.csv \
+        --output /tmp/pincode-index.json --meta /tmp/pincode-index-meta.json
+"""
+
+import argparse
+import base64
+import csv
+import json
+import os
+import re
+import struct
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+INDEX_FILE = 'src/app/lib/pincode-index.json'
+META_FILE = 'src/app/lib/pincode-index-meta.json'
+PINCODE_TS = 'src/app/lib/pincode.ts'
+INDEX_VERSION = 1
+RECORD = struct.Struct('<IHHH')  # pincode, state, district, city
+
+# Accepted header names per field, compared after normalize_key()
+COLUMNS = {
+    'pincode': ('pincode', 'pin', 'pincodes'),
+    'state': ('statename', 'state'),
+    'district': ('district', 'districtname'),
+    'city': ('city', 'taluk', 'block', 'subdistrict'),
+}
+# Pre-2014 spellings still found in the directory
+STATE_ALIASES = {
+    'orissa': 'Odisha',
+    'pondicherry': 'Puducherry',
+    'chattisgarh': 'Chhattisgarh',
+    'uttaranchal': 'Uttarakhand',
+    'dadraandnagarhaveli': 'Dadra and Nagar Haveli and Daman and Diu',
+    'damananddiu': 'Dadra and Nagar Haveli and Daman and Diu',
+    'newdelhi': 'Delhi',
+}
+
+def normalize_key(value) -> str:
+    return re.sub(r'[^a-z0-9]', '', value.lower().replace('&', 'and'))
+
+def load_state_names(ts_file=PINCODE_TS) -> Dict[str, str]:
+    """normalize_key(name) -> canonical name, from the INDIAN_STATES array"""
+    with open(ts_file, 'r', encoding='utf-8') as f:
+        match = re.search(r'INDIAN_STATES\s*=\s*\[(.*?)\]', f.read(), re.S)
+    names = re.findall(r'"([^"]+)"', match.group(1)) if match else []
+    states = {normalize_key(name): name for name in names}
+    states.update({key: name for key, name in STATE_ALIASES.items()})
+    return states
+
+def title_case(value) -> str:
+    """'NORTH 24 PARGANAS' -> 'North 24 Parganas' (leaves mixed case alone)"""
+    value = ' '.join(value.split())
+    return value.title() if value.isupper() or value.islower() else value
+
+def find_columns(header: List[str]) -> Dict[str, str]:
+    """Map field -> actual CSV column name; pincode, state and district are required"""
+    by_key = {normalize_key(name): name for name in header}
+    found = {}
+    for field, candidates in COLUMNS.items():
+        for candidate in candidates:
+            if candidate in by_key:
+                found[field] = by_key[candidate]
+                break
+    missing = [f for f in ('pincode', 'state', 'district') if f not in found]
+    if missing:
+        raise ValueError(f"CSV has no {', '.join(missing)} column (header: {', '.join(header)})")
+    return found
+
+def read_offices(csv_file, states):
+    """Count (state, district, city) votes per pincode; returns (votes, rows, skipped)"""
+    votes = defaultdict(Counter)
+    rows = skipped = 0
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        columns = find_columns(reader.fieldnames or [])
+        for row in reader:
+            rows += 1
+            pincode = (row.get(columns['pincode']) or '').strip()
+            state = (row.get(columns['state']) or '').strip()
+            district = title_case(row.get(columns['district']) or '')
+            if not re.fullmatch(r'[1-9]\d{5}', pincode) or not state or state.upper() == 'NA':
+                skipped += 1
+                continue
+            state = states.get(normalize_key(state), title_case(state))
+            city = title_case(row.get(columns['city']) or '') if 'city' in columns else ''
+            if not city or city.upper() == 'NA':
+                city = district
+            votes[int(pincode)][(state, district, city)] += 1
+    return votes, rows, skipped
+
+def build_index(votes) -> Dict:
+    """Fixed-width sorted records plus the shared name table"""
+    chosen = {pincode: counter.most_common(1)[0][0] for pincode, counter in votes.items()}
+    names = sorted({name for entry in chosen.values() for name in entry})
+    if len(names) > 0xFFFF:
+        raise ValueError(f"{len(names)} distinct names don't fit uint16 indices")
+    position = {name: i for i, name in enumerate(names)}
+    records = bytearray(RECORD.size * len(chosen))
+    for i, pincode in enumerate(sorted(chosen)):
+        state, district, city = chosen[pincode]
+        RECORD.pack_into(records, i * RECORD.size, pincode, position[state], position[district], position[city])
+    return {
+        'version': INDEX_VERSION,
+        'recordSize': RECORD.size,
+        'count': len(chosen),
+        'names': names,
+        'records': base64.b64encode(bytes(records)).decode('ascii'),
+    }
+
+def lookup(index, records: bytes, pincodes: List[int], pincode: int):
+    """Binary search, same as the TypeScript loader; returns (state, district, city) or None"""
+    i = bisect_left(pincodes, pincode)
+    if i == len(pincodes) or pincodes[i] != pincode:
+        return None
+    _, state, district, city = RECORD.unpack_from(records, i * RECORD.size)
+    names = index['names']
+    return names[state], names[district], names[city]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a pincode CSV into the checkout's offline lookup index")
+    parser.add_argument('csv', help="pincode directory CSV (one row per post office)")
+    parser.add_argument('--output', default=INDEX_FILE, help=f"index JSON to write (default: {INDEX_FILE})")
+    parser.add_argument('--meta', default=META_FILE, help=f"client-side record count (default: {META_FILE})")
+    args = parser.parse_args()
+
+    print("📮 Pincode Index Builder")
+    print("=" * 50)
+    votes, rows, skipped = read_offices(args.csv, load_state_names())
+    index = build_index(votes)
+    records = base64.b64decode(index['records'])
+    print(f"📄 {rows:,} rows read, {skipped:,} skipped (bad pincode or no state)")
+    print(f"📍 {index['count']:,} pincodes, {len(index['names']):,} distinct names, "
+          f"{len(records) / 1024:.1f}KB of records")
+
+    # Round-trip every pincode through the same search the app does
+    pincodes = [RECORD.unpack_from(records, i * RECORD.size)[0] for i in range(index['count'])]
+    start = time.perf_counter()
+    for pincode in pincodes:
+        entry = lookup(index, records, pincodes, pincode)
+        if entry != votes[pincode].most_common(1)[0][0]:
+            raise SystemExit(f"❌ Index check failed for {pincode}: {entry}")
+    if pincodes:
+        per_lookup = (time.perf_counter() - start) / len(pincodes) * 1e6
+        print(f"✅ All pincodes verified ({per_lookup:.1f}µs per lookup in Python)")
+
+    for path, data in ((args.output, index), (args.meta, {'version': INDEX_VERSION, 'count': index['count']})):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    print(f"💾 Wrote {args.output} ({os.path.getsize(args.output) / 1024:.1f}KB) and {args.meta}")
+
+if __name__ == '__main__':
+    main()
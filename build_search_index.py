@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Prebuilt search index for the shop page
+Tokenizes the catalog in src/app/lib/products.ts (name, category,
+description, detailedDescription, benefits and trustBadges) into
+src/app/lib/search-index.json, which src/app/lib/search-index.ts queries
+on the client. The shop page only receives card fields (see
+toProductCard in products.ts); the long-form copy is searched through
+this index and never shipped to the browser.
+
+Index layout, packed to stay well under the size of the text it covers:
+- ids: product ids in catalog order (postings refer to these positions)
+- terms: every indexed token, sorted and joined by spaces, so the terms
+  sharing a prefix are one contiguous range found by binary search
+- postings: per term, a string of fixed-width entries: the product
+  position in `productWidth` ALPHABET digits, then one digit indexing
+  `weights` (the heaviest field the term appears in, FIELD_WEIGHTS)
+- stopwords: dropped from queries too, so both sides tokenize alike
+
+Tokens are lowercase [a-z0-9]+ runs, the same regex the TypeScript side
+uses. The JSON is committed, so building the site needs no Python.
+Rebuild and commit it after editing products.ts; test_search_index.py
+fails while it is stale (--check does the same from the command line):
+
+    python3 build_search_index.py
+    python3 build_search_index.py --check
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+from product_catalog import PRODUCTS_FILE, load_catalog
+
+INDEX_FILE = 'src/app/lib/search-index.json'
+INDEX_VERSION = 2
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
+
+# Heavier fields rank first: a match in the name beats one in the blurb
+FIELD_WEIGHTS = {
+    'name': 8,
+    'category': 5,
+    'trustBadges': 3,
+    'benefits.title': 3,
+    'description': 2,
+    'benefits.description': 1,
+    'detailedDescription': 1,
+}
+STOPWORDS = sorted({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'its', 'of', 'on', 'or', 'our', 'that', 'the', 'this', 'to',
+    'with', 'you', 'your',
+})
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def tokenize(text) -> List[str]:
+    return [t for t in TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+def normalize_text(value):
+    """Same Jehlum -> Jhelum fix products.ts applies before the page sees the text"""
+    return re.sub(r'jehlum', 'Jhelum', value, flags=re.I) if isinstance(value, str) else value
+
+def field_texts(data: Dict):
+    """(field, text) pairs for the searchable parts of one product"""
+    for field in ('name', 'category', 'description', 'detailedDescription'):
+        if data.get(field):
+            yield field, normalize_text(data[field])
+    for benefit in data.get('benefits') or []:
+        if isinstance(benefit, dict):
+            for part in ('title', 'description'):
+                if benefit.get(part):
+                    yield f'benefits.{part}', normalize_text(benefit[part])
+    for badge in data.get('trustBadges') or []:
+        yield 'trustBadges', badge
+
+def build_postings(products: List[Dict]) -> Dict[str, Dict[int, int]]:
+    """term -> {product position: weight}"""
+    postings = defaultdict(dict)
+    for position, product in enumerate(products):
+        for field, text in field_texts(product['data']):
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(text):
+                if postings[term].get(position, 0) < weight:
+                    postings[term][position] = weight
+    return postings
+
+def encode(value: int, width: int) -> str:
+    """value as width ALPHABET digits, most significant first"""
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, len(ALPHABET))
+        digits.append(ALPHABET[digit])
+    if value:
+        raise ValueError("value too large for width")
+    return ''.join(reversed(digits))
+
+def decode_postings(index: Dict, t: int) -> Dict[int, int]:
+    """{product position: weight} for term t, the way the client decodes it"""
+    packed, width = index['postings'][t], index['productWidth']
+    result = {}
+    for i in range(0, len(packed), width + 1):
+        position = 0
+        for char in packed[i:i + width]:
+            position = position * len(ALPHABET) + ALPHABET.index(char)
+        result[position] = index['weights'][ALPHABET.index(packed[i + width])]
+    return result
+
+def build_index(products: List[Dict]) -> Dict:
+    postings = build_postings(products)
+    terms = sorted(postings)
+    weights = sorted(set(FIELD_WEIGHTS.values()))
+    width = 1
+    while len(ALPHABET) ** width < len(products):
+        width += 1
+    return {
+        'version': INDEX_VERSION,
+        'ids': [product['id'] for product in products],
+        'stopwords': ' '.join(STOPWORDS),
+        'weights': weights,
+        'productWidth': width,
+        'terms': ' '.join(terms),
+        'postings': [''.join(encode(position, width) + ALPHABET[weights.index(weight)]
+                             for position, weight in sorted(postings[term].items()))
+                     for term in terms],
+    }
+
+def index_json(index: Dict) -> str:
+    return json.dumps(index, separators=(',', ':'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the shop's prebuilt product search index")
+    parser.add_argument('--products', default=PRODUCTS_FILE, help=f"catalog source (default: {PRODUCTS_FILE})")
+    parser.add_argument('--output', default=INDEX_FILE, help=f"index JSON to write (default: {INDEX_FILE})")
+    parser.add_argument('--check', action='store_true',
+                        help="exit 1 if the index is out of date with the catalog; nothing is written")
+    args = parser.parse_args()
+
+    print("🔎 Search Index Builder")
+    print("=" * 50)
+    products = [p for p in load_catalog(args.products) if p.get('id')]
+    index = build_index(products)
+    text = index_json(index)
+
+    if args.check:
+        try:
+            with open(args.output, 'r', encoding='utf-8') as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != text:
+            print(f"❌ {args.output} is out of date; run python3 build_search_index.py")
+            sys.exit(1)
+        print(f"✅ {args.output} is up to date")
+        return
+
+    postings = build_postings(products)
+    terms = index['terms'].split(' ')
+    print(f"📦 {len(products)} products, {len(terms):,} distinct terms, "
+          f"{sum(len(p) for p in postings.values()):,} postings")
+    # Every term must decode to exactly what was indexed
+    for t, term in enumerate(terms):
+        if decode_postings(index, t) != postings[term]:
+            raise SystemExit(f"❌ Postings check failed for {term!r}")
+    print("✅ Postings verified for every term")
+
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, args.output)
+    size = os.path.getsize(args.output)
+    text_size = sum(len(str(value).encode('utf-8')) for p in products for _, value in field_texts(p['data']))
+    print(f"💾 Wrote {args.output} ({size / 1024:.1f}KB, indexing {text_size / 1024:.1f}KB of product text)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Batch patch engine for products.ts
+Locates every product object once through the compiled catalog (see
+product_catalog.py), plans all edits against that index, then applies them
+in a single left-to-right pass and writes the file atomically.
+
+An edit is (start, end, text): replace source[start:end] with text, where
+start == end is a pure insertion. Edits never overlap because each one is
+confined to its own product object (or, for field updates, to one
+property value inside it).
+"""
+
+import difflib
+import os
+from typing import Dict, List, Tuple
+
+from product_catalog import load_catalog, products_by_id
+from products_parser import parse_object_body
+
+PROPERTY_INDENT = ' ' * 8
+
+Edit = Tuple[int, int, str]
+
+def append_edits(source: str, record: Dict, body: str) -> List[Edit]:
+    """
+    Edits that append property lines (body, already indented) to an object.
+
+    Anchored on the end of the last property's value, not the closing
+    brace, so a trailing comment stays with its property: a missing comma
+    goes right after the value, and the new lines go after the rest of
+    that line when it is only a // comment.
+    """
+    if not record['field_spans']:
+        pos = record['span'][0] + 1  # just after the '{'
+        return [(pos, pos, '\n' + body)]
+    value_end = max(end for _, end in record['field_spans'].values())
+    edits: List[Edit] = []
+    pos = value_end
+    while source[pos] in ' \t':
+        pos += 1
+    if source[pos] == ',':
+        pos += 1
+    else:
+        edits.append((value_end, value_end, ','))
+        pos = value_end
+    line_end = source.find('\n', pos)
+    rest = source[pos:line_end]
+    if line_end != -1 and (not rest.strip() or rest.lstrip().startswith('//')):
+        pos = line_end
+    edits.append((pos, pos, '\n' + body))
+    return edits
+
+def plan_insertions(source: str, catalog: List[Dict], insertions: Dict[str, str]):
+    """
+    Plan appending property text to each product in insertions.
+
+    A product is skipped if it already defines any property the text would
+    add, so reruns are idempotent. Returns (edits, applied ids, skipped
+    {id: reason}).
+    """
+    by_id = products_by_id(catalog)
+    edits: List[Edit] = []
+    applied, skipped = [], {}
+
+    for product_id, text in insertions.items():
+        record = by_id.get(product_id)
+        if record is None:
+            skipped[product_id] = "not in catalog"
+            continue
+        new_keys = parse_object_body(text)
+        existing = [key for key in new_keys if key in record['data']]
+        if existing:
+            skipped[product_id] = f"already has {', '.join(existing)}"
+            continue
+
+        body = text.strip()
+        if not body.endswith(','):
+            body += ','
+        edits.extend(append_edits(source, record, PROPERTY_INDENT + body))
+        applied.append(product_id)
+
+    return edits, applied, skipped
+
+def plan_field_updates(source: str, catalog: List[Dict], updates: Dict[str, Dict[str, str]]):
+    """
+    Plan setting properties to new value source text, {id: {key: text}}.
+
+    Existing values are replaced in place (the value span only, so the key,
+    comments and layout around it stay untouched); missing properties are
+    appended like plan_insertions does. A value whose text is already
+    identical produces no edit. Returns (edits, applied ids, skipped
+    {id: reason}).
+    """
+    by_id = products_by_id(catalog)
+    edits: List[Edit] = []
+    applied, skipped = [], {}
+
+    for product_id, fields in updates.items():
+        record = by_id.get(product_id)
+        if record is None:
+            skipped[product_id] = "not in catalog"
+            continue
+        changed, missing = False, []
+        for key, text in fields.items():
+            span = record['field_spans'].get(key)
+            if span is None:
+                missing.append(f"{key}: {text}")
+            elif source[span[0]:span[1]] != text:
+                edits.append((span[0], span[1], text))
+                changed = True
+        if missing:
+            body = ',\n'.join(PROPERTY_INDENT + line for line in missing) + ','
+            edits.extend(append_edits(source, record, body))
+            changed = True
+        if changed:
+            applied.append(product_id)
+        else:
+            skipped[product_id] = "unchanged"
+
+    return edits, applied, skipped
+
+def apply_edits(source: str, edits: List[Edit]) -> str:
+    """Apply non-overlapping edits in one pass"""
+    pieces, cursor = [], 0
+    for start, end, text in sorted(edits):
+        if start < cursor:
+            raise ValueError(f"Overlapping edits at offset {start}")
+        pieces.append(source[cursor:start])
+        pieces.append(text)
+        cursor = end
+    pieces.append(source[cursor:])
+    return ''.join(pieces)
+
+def write_atomic(file_path: str, text: str):
+    """Write via a temp file in the same directory, then rename over the target"""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, file_path)
+
+def unified_diff(old: str, new: str, file_path: str) -> str:
+    return ''.join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile=f"a/{file_path}", tofile=f"b/{file_path}"))
+
+def _patch(file_path: str, planner, changes, dry_run: bool) -> Dict:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    catalog = load_catalog(file_path, source=source)
+    edits, applied, skipped = planner(source, catalog, changes)
+    patched = apply_edits(source, edits)
+
+    result = {'applied': applied, 'skipped': skipped, 'diff': None}
+    if dry_run:
+        result['diff'] = unified_diff(source, patched, file_path)
+    elif edits:
+        write_atomic(file_path, patched)
+    return result
+
+def patch_products(file_path: str, insertions: Dict[str, str], dry_run: bool = False) -> Dict:
+    """
+    Insert property text into products in one batch.
+
+    With dry_run, nothing is written and the unified diff is returned under
+    'diff' instead.
+    """
+    return _patch(file_path, plan_insertions, insertions, dry_run)
+
+def patch_fields(file_path: str, updates: Dict[str, Dict[str, str]], dry_run: bool = False) -> Dict:
+    """
+    Set property values, {id: {key: value source text}}, in one batch.
+
+    Same result shape and dry_run behaviour as patch_products.
+    """
+    return _patch(file_path, plan_field_updates, updates, dry_run)
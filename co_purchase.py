@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Co-purchase recommender for frequentlyBoughtWith
+Streams an orders export (data/orders.json format, JSON array or JSONL),
+counts how often each pair of catalog products shares a basket, and
+writes each product's strongest partners back into products.ts as its
+frequentlyBoughtWith list.
+
+Counts are kept in a sparse state file (data/co-purchase-state.json):
+baskets seen, baskets per product, baskets per product pair, and a
+high-water mark (the newest createdAt counted so far). Orders created
+more than --overlap-days before the mark are taken as settled and
+skipped without a lookup; only the keys of counted orders inside that
+window are kept, to avoid double counting. Feeding the full export again
+(or just the new orders) therefore costs time proportional to the new
+orders, and the state stays the size of one window, not the history.
+
+Only orders that count toward revenue are used (delivered online orders
+and offline sales, as in order-utils.ts). Pending orders are picked up by
+a later run once they are delivered, as long as that happens within the
+overlap window of the newest order; cancelled ones never count. Orders
+without a readable createdAt are always looked up by key.
+
+Pairs are scored by lift (how many times likelier the two are bought
+together than by chance) or normalized PMI, which damps the lift of
+rarely bought products. Plain PMI is log(lift) and ranks identically.
+Products without enough co-purchase data keep their current list.
+
+    python3 co_purchase.py                          # data/orders.json
+    python3 co_purchase.py new-orders.jsonl --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from catalog_patch import patch_fields
+from json_stream import iter_records, record_time
+from order_rollups import ORDERS_FILE, counts_toward_revenue, order_items
+from product_catalog import PRODUCTS_FILE, load_catalog
+
+STATE_FILE = 'data/co-purchase-state.json'
+STATE_VERSION = 2
+DEFAULT_OVERLAP_DAYS = 30  # longest a pending order may take to be delivered and still count
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_PAIRS = 3  # fewer shared baskets than this is noise, not a pattern
+METRICS = ('npmi', 'lift')
+
+def order_key(order) -> str:
+    """Identity used to skip already-counted orders: id, mongo _id, else a content hash"""
+    key = order.get('id') or order.get('_id')
+    if isinstance(key, dict):
+        key = key.get('$oid')
+    if key:
+        return str(key)
+    return 'sha1:' + hashlib.sha1(json.dumps(order, sort_keys=True).encode('utf-8')).hexdigest()
+
+class CoPurchaseCounts:
+    """Sparse basket counts: per product and per unordered product pair"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.baskets: int = state.get('baskets', 0)
+        self.products: Dict[str, int] = state.get('products', {})
+        self.pairs: Dict[str, Dict[str, int]] = state.get('pairs', {})  # pairs[a][b] with a < b
+        self.watermark: Optional[str] = state.get('watermark')  # newest counted createdAt
+        self.recent: Dict[str, Optional[str]] = state.get('recent', {})  # counted key -> createdAt, inside the window
+
+    def cutoff(self, overlap_days) -> Optional[str]:
+        """Orders created before this are settled: counted already, or never will be"""
+        if self.watermark is None:
+            return None
+        moment = datetime.fromisoformat(self.watermark.replace('Z', '+00:00')) - timedelta(days=overlap_days)
+        return moment.isoformat(timespec='seconds').replace('+00:00', 'Z')
+
+    def mark_counted(self, key, created_at: Optional[str]):
+        self.recent[key] = created_at
+        if created_at is not None and (self.watermark is None or created_at > self.watermark):
+            self.watermark = created_at
+
+    def prune(self, overlap_days):
+        """Forget keys that have fallen behind the window; the cutoff alone skips them now"""
+        cutoff = self.cutoff(overlap_days)
+        if cutoff is not None:
+            self.recent = {key: t for key, t in self.recent.items() if t is None or t >= cutoff}
+
+    def add_basket(self, product_ids: Set[str]):
+        self.baskets += 1
+        ordered = sorted(product_ids)
+        for i, a in enumerate(ordered):
+            self.products[a] = self.products.get(a, 0) + 1
+            row = self.pairs.setdefault(a, {})
+            for b in ordered[i + 1:]:
+                row[b] = row.get(b, 0) + 1
+
+    def scores(self, metric='npmi', min_pairs=DEFAULT_MIN_PAIRS) -> Dict[str, Dict[str, float]]:
+        """product -> {partner: score} for positively associated pairs"""
+        n = self.baskets
+        result: Dict[str, Dict[str, float]] = {}
+        for a, row in self.pairs.items():
+            for b, together in row.items():
+                if together < min_pairs:
+                    continue
+                lift = together * n / (self.products[a] * self.products[b])
+                if lift <= 1:
+                    continue
+                if metric == 'lift':
+                    score = lift
+                else:
+                    p_ab = together / n
+                    score = 1.0 if p_ab == 1 else math.log(lift) / -math.log(p_ab)
+                result.setdefault(a, {})[b] = score
+                result.setdefault(b, {})[a] = score
+        return result
+
+    def to_state(self) -> Dict:
+        return {
+            'version': STATE_VERSION,
+            'updatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z'),
+            'baskets': self.baskets,
+            'products': self.products,
+            'pairs': {a: row for a, row in self.pairs.items() if row},
+            'watermark': self.watermark,
+            'recent': self.recent,
+        }
+
+def load_counts(state_file) -> CoPurchaseCounts:
+    if not os.path.exists(state_file):
+        return CoPurchaseCounts()
+    with open(state_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('version') != STATE_VERSION:
+        raise SystemExit(f"❌ {state_file} is version {state.get('version')}, expected {STATE_VERSION}; "
+                         f"rerun with --reset")
+    return CoPurchaseCounts(state)
+
+def save_counts(counts: CoPurchaseCounts, state_file):
+    Path(state_file).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{state_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(counts.to_state(), f, separators=(',', ':'))
+    os.replace(tmp_path, state_file)
+
+def basket_of(order, catalog_ids: Set[str], id_by_name: Dict[str, str]) -> Set[str]:
+    """Catalog product ids in an order; offline (POS) items are matched by name"""
+    basket = set()
+    for item in order_items(order):
+        product_id = item.get('productId')
+        if product_id not in catalog_ids:
+            product_id = id_by_name.get(str(item.get('name') or '').strip().lower())
+        if product_id:
+            basket.add(product_id)
+    return basket
+
+def count_orders(counts: CoPurchaseCounts, orders, catalog_ids, id_by_name,
+                 overlap_days=DEFAULT_OVERLAP_DAYS) -> Dict[str, int]:
+    """Add uncounted, revenue-counted orders to counts; returns per-outcome tallies"""
+    tally = dict.fromkeys(('added', 'seen', 'settled', 'not_final', 'malformed'), 0)
+    cutoff = counts.cutoff(overlap_days)  # fixed for the run, so a whole export is judged alike
+    for order in orders:
+        if not isinstance(order, dict):
+            tally['malformed'] += 1
+            continue
+        created_at = record_time(order)
+        if cutoff is not None and created_at is not None and created_at < cutoff:
+            tally['settled'] += 1
+            continue
+        key = order_key(order)
+        if key in counts.recent:
+            tally['seen'] += 1
+            continue
+        if not counts_toward_revenue(order):
+            tally['not_final'] += 1
+            continue
+        try:
+            basket = basket_of(order, catalog_ids, id_by_name)
+        except ValueError:
+            tally['malformed'] += 1
+            continue
+        counts.add_basket(basket)
+        counts.mark_counted(key, created_at)
+        tally['added'] += 1
+    counts.prune(overlap_days)
+    return tally
+
+def top_partners(scores: Dict[str, Dict[str, float]], counts: CoPurchaseCounts, top_k) -> Dict[str, List[str]]:
+    """Best top_k partners per product; ties go to the pair bought together more often"""
+    def together(a, b):
+        lo, hi = sorted((a, b))
+        return counts.pairs.get(lo, {}).get(hi, 0)
+    return {
+        product: sorted(partners, key=lambda b: (-partners[b], -together(product, b), b))[:top_k]
+        for product, partners in scores.items()
+    }
+
+def ts_string_array(values: List[str]) -> str:
+    return '[' + ', '.join("'" + v.replace('\\', '\\\\').replace("'", "\\'") + "'" for v in values) + ']'
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute frequentlyBoughtWith from order history")
+    parser.add_argument('orders', nargs='?', default=ORDERS_FILE,
+                        help=f"orders export, JSON array or JSONL (default: {ORDERS_FILE})")
+    parser.add_argument('--products', default=PRODUCTS_FILE, help=f"catalog to update (default: {PRODUCTS_FILE})")
+    parser.add_argument('--state', default=STATE_FILE, help=f"incremental counts file (default: {STATE_FILE})")
+    parser.add_argument('--reset', action='store_true', help="ignore the saved counts and recount from scratch")
+    parser.add_argument('--overlap-days', type=float, default=DEFAULT_OVERLAP_DAYS,
+                        help="orders this much older than the newest counted one are treated as settled "
+                             f"(default: {DEFAULT_OVERLAP_DAYS})")
+    parser.add_argument('--metric', choices=METRICS, default='npmi', help="pair score (default: npmi)")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help=f"partners per product (default: {DEFAULT_TOP_K})")
+    parser.add_argument('--min-pairs', type=int, default=DEFAULT_MIN_PAIRS,
+                        help=f"minimum baskets a pair must share (default: {DEFAULT_MIN_PAIRS})")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print the products.ts diff; neither the catalog nor the counts are saved")
+    args = parser.parse_args()
+
+    print("🛒 Co-purchase Recommender")
+    print("=" * 50)
+    catalog = [p for p in load_catalog(args.products) if p.get('id')]
+    catalog_ids = {p['id'] for p in catalog}
+    id_by_name = {str(p['data'].get('name', '')).strip().lower(): p['id'] for p in catalog}
+
+    counts = CoPurchaseCounts() if args.reset else load_counts(args.state)
+    tally = count_orders(counts, iter_records(args.orders), catalog_ids, id_by_name, args.overlap_days)
+    print(f"📦 {tally['added']:,} new basket(s) counted, {tally['seen']:,} already counted, "
+          f"{tally['settled']:,} older than the {args.overlap_days:g}-day window, "
+          f"{tally['not_final']:,} not delivered yet or cancelled")
+    if tally['malformed']:
+        print(f"⚠️  Skipped {tally['malformed']} malformed order(s)")
+    pair_count = sum(len(row) for row in counts.pairs.values())
+    print(f"🔗 {counts.baskets:,} baskets total, {len(counts.products)} products, {pair_count:,} co-purchased pairs")
+
+    # Counts can outlive products; only recommend what is still in the catalog
+    scores = {a: {b: score for b, score in row.items() if b in catalog_ids}
+              for a, row in counts.scores(args.metric, args.min_pairs).items() if a in catalog_ids}
+    partners = top_partners(scores, counts, args.top_k)
+    updates = {product: {'frequentlyBoughtWith': ts_string_array(ids)} for product, ids in partners.items() if ids}
+    print(f"🎯 {len(updates)} product(s) with a pair sharing {args.min_pairs}+ baskets "
+          f"(the rest keep their current list)")
+
+    result = patch_fields(args.products, updates, dry_run=args.dry_run)
+    for product_id in result['applied']:
+        print(f"✓ {product_id}: {', '.join(partners[product_id])}")
+    for product_id, reason in result['skipped'].items():
+        if reason != 'unchanged':
+            print(f"⏭️  Skipped: {product_id} ({reason})")
+
+    if args.dry_run:
+        print(result['diff'] or "(no changes)")
+        print("🔍 Dry run: counts not saved")
+        return
+    save_counts(counts, args.state)
+    print(f"💾 Updated {len(result['applied'])} product(s) in {args.products}, counts saved to {args.state}")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Complete the final product: walnut-with-shells"""
 
-import re
+from catalog_patch import patch_products
 
 enhancement = '''painPointHeadline: "Fresh Walnuts? Crack Open Nature's Brain Food",
         sensoryDescription: "These walnuts come naturally protected in their shells, preserving freshness and flavor. Crack one open to reveal the creamy kernel inside—rich, buttery, with that distinctive walnut taste. The shell protection means maximum nutrition preserved until you're ready to enjoy them.",
@@ -23,21 +23,10 @@ enhancement = '''painPointHeadline: "Fresh Walnuts? Crack Open Nature's Brain Fo
 
 file_path = 'src/app/lib/products.ts'
 
-with open(file_path, 'r', encoding='utf-8') as f:
-    content = f.read()
+result = patch_products(file_path, {'walnut-with-shells': enhancement})
 
-# Find walnut-with-shells and add premium content
-pattern = r"(id: 'walnut-with-shells',.*?weightMl: '[^']+',)\s*},"
-
-def replacer(match):
-    return match.group(1) + '\n        ' + enhancement + '\n    },'
-
-modified = re.sub(pattern, replacer, content, flags=re.DOTALL)
-
-if modified != content:
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(modified)
+if result['applied']:
     print("✅ SUCCESS! Enhanced walnut-with-shells")
     print("🎉 ALL 21 PRODUCTS NOW HAVE PREMIUM CONTENT!")
 else:
-    print("❌ Could not find walnut-with-shells product")
+    print(f"❌ Could not enhance walnut-with-shells ({result['skipped']['walnut-with-shells']})")
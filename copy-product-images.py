@@ -2,15 +2,30 @@
 """
 Image Transfer Script for JKC Product Images
 Copies and renames product images from source to website public folder
+
+Runs as a sync: a target whose size and SHA-256 already match its source is
+left alone, changed files are copied concurrently through a temp file that is
+verified and then renamed into place, and whatever gets overwritten is saved
+to the backup store first (see backup_store.py). Run from the repo root:
+the target and the store default to public/products and .image-backups
+there, the same store the other image scripts use.
+
+    python3 copy-product-images.py --source ~/Pictures/"JKC product images"
 """
 
+import argparse
+import hashlib
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-# Paths
-SOURCE_DIR = Path("/home/leo/Pictures/JKC product images")
-TARGET_DIR = Path("/home/leo/Desktop/JKC cursor/public/products")
+from backup_store import STORE_DIR, BackupStore
+from image_manifest import HASH_CHUNK, file_sha256
+
+# Default target, relative to the repo root (override with --target)
+TARGET_DIR = Path("public/products")
+MB = 1024 * 1024
 
 # Image mapping: source -> target filename
 IMAGE_MAPPING = {
@@ -59,61 +74,141 @@ IMAGE_MAPPING = {
     "lip butter/PXL_20260112_072835975.png": "saffron-lip-butter.png",
 }
 
-def copy_images():
-    """Copy images from source to target directory"""
+def copy_verified(source_path, target_path):
+    """
+    Copy source to target through a temp file in the target directory.
+
+    The source is hashed while it is read, the temp file is re-read and
+    checked against that hash, and only then renamed over the target, so a
+    crash or short write never leaves a truncated image behind.
+    Returns the number of bytes written.
+    """
+    tmp_path = target_path.with_name(f".{target_path.name}.tmp")
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with open(source_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+                dst.write(chunk)
+                written += len(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+        if file_sha256(tmp_path) != digest.hexdigest():
+            raise IOError("verification failed: copy does not match source")
+        shutil.copystat(source_path, tmp_path)
+        os.replace(tmp_path, target_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return written
+
+def sync_file(source_path, target_path, store):
+    """
+    Bring one target up to date with its source.
+
+    Returns {'source', 'target', 'status', 'bytes', 'backup', 'error'} where
+    status is 'copied', 'unchanged', 'missing' or 'error', and backup is the
+    backup store entry for the target it replaced (if any).
+    """
+    result = {'source': source_path, 'target': target_path, 'status': 'error',
+              'bytes': 0, 'backup': None, 'error': None}
+    try:
+        if not source_path.exists():
+            result['status'] = 'missing'
+            return result
+
+        if target_path.exists():
+            # Cheap size check first; only hash when sizes agree
+            if source_path.stat().st_size == target_path.stat().st_size:
+                target_sha256 = file_sha256(target_path)
+                if file_sha256(source_path) == target_sha256:
+                    result['status'] = 'unchanged'
+                    return result
+            else:
+                target_sha256 = None
+            result['backup'] = store.put(target_path, target_sha256)
+
+        result['bytes'] = copy_verified(source_path, target_path)
+        result['status'] = 'copied'
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def copy_images(source_dir, target_dir=TARGET_DIR, jobs=8, store_dir=STORE_DIR):
+    """Sync IMAGE_MAPPING from source_dir into target_dir"""
+    source_dir, target_dir = Path(source_dir), Path(target_dir)
     
     print("🚀 Starting image transfer...")
-    print(f"📁 Source: {SOURCE_DIR}")
-    print(f"📁 Target: {TARGET_DIR}")
+    print(f"📁 Source: {source_dir}")
+    print(f"📁 Target: {target_dir}")
     print()
     
-    # Create backup directory
-    backup_dir = TARGET_DIR.parent / "products_backup"
-    if TARGET_DIR.exists() and not backup_dir.exists():
-        print(f"💾 Creating backup at {backup_dir}")
-        shutil.copytree(TARGET_DIR, backup_dir)
-        print("✅ Backup created")
-        print()
-    
     # Ensure target directory exists
-    TARGET_DIR.mkdir(parents=True, exist_ok=True)
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    # Targets about to be overwritten are saved here first
+    store = BackupStore(store_dir)
+    run_name = store.new_run_name('products')
     
     copied = 0
-    skipped = 0
+    unchanged = 0
+    transferred = 0
+    backed_up = {}
     errors = []
     
-    for source_file, target_filename in IMAGE_MAPPING.items():
-        source_path = SOURCE_DIR / source_file
-        target_path = TARGET_DIR / target_filename
-        
-        if not source_path.exists():
-            errors.append(f"❌ Source not found: {source_file}")
-            continue
-        
-        try:
-            shutil.copy2(source_path, target_path)
-            size_mb = source_path.stat().st_size / (1024 * 1024)
-            print(f"✅ Copied: {source_file} → {target_filename} ({size_mb:.2f} MB)")
-            copied += 1
-        except Exception as e:
-            errors.append(f"❌ Error copying {source_file}: {e}")
-            skipped += 1
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(sync_file, source_dir / source_file, target_dir / target_filename, store)
+            for source_file, target_filename in IMAGE_MAPPING.items()
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            source_file = result['source'].relative_to(source_dir)
+            target_filename = result['target'].name
+            if result['backup']:
+                backed_up[target_filename] = result['backup']
+            if result['status'] == 'copied':
+                print(f"✅ Copied: {source_file} → {target_filename} ({result['bytes'] / MB:.2f} MB)")
+                copied += 1
+                transferred += result['bytes']
+            elif result['status'] == 'unchanged':
+                unchanged += 1
+            elif result['status'] == 'missing':
+                errors.append(f"❌ Source not found: {source_file}")
+            else:
+                errors.append(f"❌ Error copying {source_file}: {result['error']}")
+
+    if store.write_run(run_name, target_dir, backed_up):
+        print(f"💾 Backed up {len(backed_up)} replaced file(s) as {run_name}")
     
     print()
     print("=" * 60)
     print(f"📊 Summary:")
-    print(f"   ✅ Successfully copied: {copied} images")
-    print(f"   ⚠️  Skipped/Failed: {skipped} images")
+    print(f"   ✅ Successfully copied: {copied} images ({transferred / MB:.2f} MB transferred)")
+    print(f"   ⏭️  Already up to date: {unchanged} images")
+    print(f"   ⚠️  Skipped/Failed: {len(errors)} images")
     print()
     
     if errors:
         print("⚠️  Errors encountered:")
-        for error in errors:
+        for error in sorted(errors):
             print(f"   {error}")
         print()
     
     print(f"🎉 Image transfer complete!")
-    print(f"📁 Images copied to: {TARGET_DIR}")
+    print(f"📁 Images copied to: {target_dir}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync product images into the website's public folder")
+    parser.add_argument('--source', required=True, type=Path, help="folder with the original photos")
+    parser.add_argument('--target', default=TARGET_DIR, type=Path,
+                        help=f"public/products folder to sync into (default: {TARGET_DIR})")
+    parser.add_argument('--store', default=STORE_DIR,
+                        help=f"backup store for replaced files (default: {STORE_DIR})")
+    parser.add_argument('--jobs', '-j', type=int, default=8, help="concurrent copies (default: 8)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    copy_images()
+    args = parse_args()
+    copy_images(args.source, args.target, args.jobs, args.store)
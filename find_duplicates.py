@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Duplicate and near-duplicate image finder for public/
+- 64-bit difference hash (dHash) per image, robust to re-encoding, format
+  changes (PNG vs WebP) and resizing
+- Near-duplicates are found with a BK-tree over Hamming distance, so each
+  image only visits the part of the tree within the threshold instead of
+  being compared with every other image
+- Hashes are cached in .cache/image-hashes.json keyed by path, size and
+  mtime, so reruns only hash new or changed files
+
+Each cluster keeps every file the site references (catalog, app source,
+responsive variants - the same rules as audit_products.py); if none is
+referenced it keeps the largest-resolution copy. Everything else in the
+cluster is reported as reclaimable.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image
+
+from audit_products import extract_products_from_ts, find_referenced
+from image_pipeline import flatten_to_rgb
+from optimize_images import VARIANTS_DIR
+from product_catalog import PRODUCTS_FILE
+
+CACHE_FILE = '.cache/image-hashes.json'
+CACHE_VERSION = 1
+HASH_SIZE = 8  # 8x8 comparisons -> 64-bit hash
+RASTER_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif', '.ico'}
+MB = 1024 * 1024
+
+def dhash(path) -> Dict:
+    """dHash plus pixel size and SHA-256 for one image"""
+    with open(path, 'rb') as f:
+        sha256 = hashlib.sha256(f.read()).hexdigest()
+    with Image.open(path) as img:
+        size = img.size
+        # JPEGs decode straight to a small scale; the hash only needs 9x8 pixels
+        img.draft('RGB', (HASH_SIZE * 8, HASH_SIZE * 8))
+        gray = flatten_to_rgb(img).convert('L').resize(
+            (HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    pixels = gray.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return {'dhash': f"{bits:016x}", 'sha256': sha256, 'width': size[0], 'height': size[1]}
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance between integer hashes"""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+
+    def add(self, value: int, item):
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int):
+        """Yield (distance, item) for every item within radius of value"""
+        if self.root is None:
+            return
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                for item in node[1]:
+                    yield distance, item
+            # Triangle inequality: only children at |d - radius|..d + radius can match
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+
+def scan_images(public_dir) -> Dict[str, os.stat_result]:
+    """Raster images under public_dir (excluding generated variants) with their stat"""
+    found = {}
+    stack = [(public_dir, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if rel_path != VARIANTS_DIR:
+                        stack.append((entry.path, rel_path + '/'))
+                elif entry.is_file() and Path(entry.name).suffix.lower() in RASTER_EXTENSIONS:
+                    found[rel_path] = entry.stat()
+    return found
+
+def load_hash_cache(cache_file) -> Dict:
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('version') == CACHE_VERSION:
+            return cached['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+def save_hash_cache(cache_file, files):
+    Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{cache_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'files': files}, f)
+    os.replace(tmp_path, cache_file)
+
+def hash_images(public_dir, cache_file=CACHE_FILE, jobs=1):
+    """
+    Hash every image under public_dir; returns (index, newly hashed, errors).
+
+    index maps relative path -> {'size', 'mtime_ns', 'dhash', 'sha256',
+    'width', 'height'}. Entries whose size and mtime match the cache are
+    reused; the rest are hashed (on a process pool when jobs > 1).
+    """
+    cached = load_hash_cache(cache_file)
+    index, todo, errors = {}, [], {}
+    for rel_path, stat in scan_images(public_dir).items():
+        entry = cached.get(rel_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            index[rel_path] = entry
+        else:
+            todo.append((rel_path, stat))
+
+    def record(rel_path, stat, result):
+        index[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, **result}
+
+    if jobs <= 1:
+        for rel_path, stat in todo:
+            try:
+                record(rel_path, stat, dhash(os.path.join(public_dir, rel_path)))
+            except Exception as e:
+                errors[rel_path] = str(e)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(dhash, os.path.join(public_dir, rel_path)): (rel_path, stat)
+                       for rel_path, stat in todo}
+            for future in as_completed(futures):
+                rel_path, stat = futures[future]
+                try:
+                    record(rel_path, stat, future.result())
+                except Exception as e:
+                    errors[rel_path] = str(e)
+
+    save_hash_cache(cache_file, index)
+    return index, len(todo) - len(errors), errors
+
+def find_clusters(index: Dict, threshold: int, max_aspect_diff: float = 0.05) -> List[List[str]]:
+    """
+    Group images whose hashes are within threshold bits (union-find over
+    BK-tree matches). Images with clearly different aspect ratios never
+    join, since a 9x8 hash can't tell a crop from a squash.
+    """
+    tree = BKTree()
+    for rel_path, entry in index.items():
+        tree.add(int(entry['dhash'], 16), rel_path)
+
+    parent = {rel_path: rel_path for rel_path in index}
+
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def aspect(entry):
+        return entry['width'] / entry['height'] if entry['height'] else 0
+
+    for rel_path, entry in index.items():
+        for _, other in tree.search(int(entry['dhash'], 16), threshold):
+            if other == rel_path:
+                continue
+            a, b = aspect(entry), aspect(index[other])
+            if a and b and abs(a - b) / max(a, b) <= max_aspect_diff:
+                parent[find(other)] = find(rel_path)
+
+    groups = {}
+    for rel_path in index:
+        groups.setdefault(find(rel_path), []).append(rel_path)
+    return [sorted(members) for members in groups.values() if len(members) > 1]
+
+def plan_cluster(members: List[str], index: Dict, referenced) -> Dict:
+    """Decide what to keep in a cluster and how many bytes the rest would free"""
+    keep = [m for m in members if m in referenced]
+    if not keep:
+        keep = [max(members, key=lambda m: (index[m]['width'] * index[m]['height'], -index[m]['size']))]
+    anchor = int(index[keep[0]]['dhash'], 16)
+    files = []
+    for m in members:
+        entry = index[m]
+        files.append({
+            'path': m,
+            'bytes': entry['size'],
+            'size': [entry['width'], entry['height']],
+            'distance': hamming(int(entry['dhash'], 16), anchor),
+            'exact': entry['sha256'] == index[keep[0]]['sha256'],
+            'keep': m in keep,
+        })
+    files.sort(key=lambda f: (not f['keep'], f['distance'], f['path']))
+    reclaimable = sum(f['bytes'] for f in files if not f['keep'])
+    return {'reclaimable': reclaimable, 'files': files}
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate and near-duplicate images in public/")
+    parser.add_argument('--public', default='public')
+    parser.add_argument('--threshold', type=int, default=8,
+                        help="max differing bits (of 64) to call two images near-duplicates (default: 8)")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="worker processes for hashing new files (default: all cores)")
+    parser.add_argument('--json', metavar='PATH', help="also write the clusters to a JSON file")
+    args = parser.parse_args()
+
+    print("🔍 Duplicate Image Finder")
+    print("=" * 80)
+
+    index, hashed, errors = hash_images(args.public, jobs=args.jobs)
+    print(f"📁 {len(index)} images ({hashed} newly hashed, {len(index) - hashed} from {CACHE_FILE})")
+    for rel_path, error in sorted(errors.items()):
+        print(f"   ❌ {rel_path}: {error}")
+
+    public_sizes = {rel_path: entry['size'] for rel_path, entry in index.items()}
+    referenced = find_referenced(extract_products_from_ts(PRODUCTS_FILE), public_sizes, args.public)
+
+    clusters = [plan_cluster(members, index, referenced) for members in find_clusters(index, args.threshold)]
+    clusters.sort(key=lambda c: c['reclaimable'], reverse=True)
+    total = sum(c['reclaimable'] for c in clusters)
+
+    print(f"\n🧬 {len(clusters)} CLUSTERS (≤{args.threshold} bits apart)")
+    print("-" * 80)
+    for i, cluster in enumerate(clusters, 1):
+        print(f"\n{i}. {len(cluster['files'])} files, {cluster['reclaimable'] / MB:.2f}MB reclaimable")
+        for f in cluster['files']:
+            mark = '✓ keep   ' if f['keep'] else '✗ reclaim'
+            kind = 'identical' if f['exact'] else f"Δ{f['distance']}"
+            print(f"   {mark} {f['path']:<52} {f['size'][0]}x{f['size'][1]:<6} "
+                  f"{f['bytes'] / MB:>6.2f}MB  {kind}")
+
+    print("\n" + "=" * 80)
+    print(f"💾 Reclaimable: {total / MB:.1f}MB across {sum(len(c['files']) for c in clusters)} files")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': args.threshold, 'reclaimable_bytes': total, 'clusters': clusters}, f, indent=2)
+        print(f"📋 Clusters written to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Low-quality image placeholders (LQIP) for product and hero images
+- One tiny WebP (longest side LQIP_SIZE px) per image URL, inlined as base64
+- Keyed by the exact `url` values in products.ts (ProductImage.url and
+  product.image) plus the hero WebPs used by hero-carousel.tsx
+- Writes src/app/lib/image-placeholders.json, bundled with the components so
+  the placeholder paints before any network request
+
+The tiny WebPs are written to public/variants/lqip/<path>.webp and tracked in
+the image manifest like every other output, so reruns only re-encode images
+whose source bytes changed.
+"""
+
+import argparse
+import base64
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import unquote
+
+from PIL import Image
+
+from image_manifest import ImageManifest, make_entry, stale_outputs
+from image_pipeline import output_settings, process_source, thumbnail_output
+from optimize_images import MANIFEST_ROOT, VARIANTS_DIR
+from product_catalog import load_catalog
+
+LQIP_SIZE = 20      # longest side in px; the browser scales it up blurred
+LQIP_QUALITY = 40
+PLACEHOLDERS_FILE = 'src/app/lib/image-placeholders.json'
+
+def collect_urls():
+    """Image URLs the storefront renders: catalog images plus the hero set"""
+    urls = set()
+    for record in load_catalog():
+        product = record['data']
+        if product.get('image'):
+            urls.add(product['image'])
+        for image in product.get('images') or []:
+            if image.get('url'):
+                urls.add(image['url'])
+    urls.update('/' + p.name for p in Path(MANIFEST_ROOT).glob('hero*.webp') if not p.name.endswith('.tmp.webp'))
+    return sorted(urls)
+
+def source_for(url) -> Path:
+    return Path(MANIFEST_ROOT) / unquote(url.lstrip('/'))
+
+def lqip_path(url) -> Path:
+    """public/variants/lqip/<url path>.webp (keeps .png and .webp URLs of one image apart)"""
+    return Path(MANIFEST_ROOT) / VARIANTS_DIR / 'lqip' / (unquote(url.lstrip('/')) + '.webp')
+
+def lqip_width(size) -> int:
+    width, height = size
+    if width >= height:
+        return min(LQIP_SIZE, width)
+    return max(1, min(width, round(LQIP_SIZE * width / height)))
+
+def generate_placeholder(url, entry):
+    """
+    Build (or reuse) the tiny WebP for one URL and return it inlined.
+
+    Runs in a worker. Returns {'url', 'record', 'entries', 'written', 'error'}
+    where record is {'width', 'height', 'blurDataURL'} with the source's size.
+    """
+    result = {'url': url, 'record': None, 'entries': {}, 'written': 0, 'error': None}
+    try:
+        source = source_for(url)
+        with Image.open(source) as img:
+            size = img.size
+        output = lqip_path(url)
+        spec = thumbnail_output(str(output), lqip_width(size), LQIP_QUALITY)
+        stale, result['entries'] = stale_outputs(source, [spec], {str(output): entry})
+        if stale:
+            out = process_source(source, stale)['outputs'][0]
+            if not out['ok']:
+                raise RuntimeError(out['error'])
+            result['entries'][str(output)] = make_entry(MANIFEST_ROOT, source, str(output), output_settings(spec))
+            result['written'] = 1
+
+        data = base64.b64encode(output.read_bytes()).decode('ascii')
+        result['record'] = {'width': size[0], 'height': size[1], 'blurDataURL': f"data:image/webp;base64,{data}"}
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def run_workers(urls, manifest, jobs):
+    """Yield generate_placeholder() results, on a process pool when jobs > 1"""
+    if jobs <= 1:
+        for url in urls:
+            yield generate_placeholder(url, manifest.get(lqip_path(url)))
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(generate_placeholder, url, manifest.get(lqip_path(url))): url for url in urls}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'url': futures[future], 'error': f"worker failed: {e}"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate inline blur placeholders for product and hero images")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    print("🌫️  Image Placeholders")
+    print("=" * 50)
+    print(f"Size: {LQIP_SIZE}px longest side @ {LQIP_QUALITY}% WebP, inlined as base64")
+    print("=" * 50)
+
+    urls = collect_urls()
+    missing = [url for url in urls if not source_for(url).is_file()]
+    urls = [url for url in urls if url not in missing]
+
+    manifest = ImageManifest()
+    placeholders = {}
+    written = 0
+    errors = 0
+    for result in run_workers(urls, manifest, args.jobs):
+        if result['error']:
+            errors += 1
+            print(f"   ❌ {result['url']}: {result['error']}")
+            continue
+        for out, entry in result['entries'].items():
+            manifest.update(out, entry)
+        placeholders[result['url']] = result['record']
+        written += result['written']
+
+    manifest.save()
+    tmp_path = f"{PLACEHOLDERS_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(placeholders.items())), f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, PLACEHOLDERS_FILE)
+
+    for url in missing:
+        print(f"   ⚠️  {url}: file not found in public/, no placeholder")
+    inline_bytes = sum(len(p['blurDataURL']) for p in placeholders.values())
+    print("\n" + "=" * 50)
+    print(f"✨ {len(placeholders)}/{len(urls) + len(missing)} images, {written} re-encoded, {errors} error(s)")
+    print(f"📦 {inline_bytes / 1024:.1f}KB of inline data in {PLACEHOLDERS_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Responsive image variants for product and hero images
+- Emits a fixed ladder of widths (320/640/960/1280) per served WebP
+- Never upscales: widths at or above the source width are skipped
+- Writes public/image-variants.json so components can build srcset
+
+Variants live under public/variants/ mirroring the public/ layout, e.g.
+/products/acacia-honey.webp -> /variants/products/acacia-honey-640w.webp
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image
+
+from image_manifest import ImageManifest, make_entry, stale_outputs
+from image_pipeline import output_settings, process_source, thumbnail_output
+from optimize_images import MANIFEST_ROOT, VARIANTS_DIR
+
+WIDTHS = (320, 640, 960, 1280)
+QUALITY = 80
+VARIANTS_MANIFEST = 'public/image-variants.json'
+ORIGINAL_EXTENSIONS = ('.png', '.PNG', '.jpg', '.JPG', '.jpeg', '.JPEG')
+
+def find_served_images():
+    """Served WebPs: everything in public/products plus the hero set"""
+    public = Path('public')
+    images = sorted(public.glob('products/*.webp')) + sorted(public.glob('hero*.webp'))
+    return [p for p in images if not p.name.endswith('.tmp.webp')]
+
+def best_source(webp_path, served_size):
+    """
+    Prefer the original sibling over re-encoding the served WebP, but only
+    when it has the same pixel size (hero WebPs are cropped from theirs).
+    """
+    for ext in ORIGINAL_EXTENSIONS:
+        candidate = webp_path.with_suffix(ext)
+        if candidate.exists():
+            with Image.open(candidate) as original:
+                if original.size == served_size:
+                    return candidate
+    return webp_path
+
+def url_for(path) -> str:
+    return '/' + Path(os.path.relpath(path, 'public')).as_posix()
+
+def variant_path(webp_path, width) -> Path:
+    rel = Path(os.path.relpath(webp_path, 'public'))
+    return Path('public') / VARIANTS_DIR / rel.parent / f"{rel.stem}-{width}w.webp"
+
+def generate_variants(webp_path, entries):
+    """
+    Build every ladder width for one served image (runs in a worker).
+
+    Decodes the source once (via image_pipeline) for all stale widths. Returns a
+    dict with the manifest record for the image and the per-output manifest
+    entries for the parent to store.
+    """
+    webp_path = Path(webp_path)
+    result = {'url': url_for(webp_path), 'record': None, 'entries': {}, 'written': 0, 'error': None}
+    try:
+        with Image.open(webp_path) as served:
+            served_size = served.size
+        source = best_source(webp_path, served_size)
+
+        widths = [w for w in WIDTHS if w < served_size[0]]
+        outputs = [thumbnail_output(str(variant_path(webp_path, w)), w, QUALITY) for w in widths]
+        stale, result['entries'] = stale_outputs(source, outputs, entries)
+
+        # One decode of the source for every stale width
+        if stale:
+            for spec, out in zip(stale, process_source(source, stale)['outputs']):
+                if not out['ok']:
+                    raise RuntimeError(f"{out['path']}: {out['error']}")
+                result['entries'][out['path']] = make_entry(
+                    MANIFEST_ROOT, source, out['path'], output_settings(spec))
+                result['written'] += 1
+
+        variants = []
+        for width in widths:
+            height = round(served_size[1] * width / served_size[0])
+            variants.append({'width': width, 'height': height, 'url': url_for(variant_path(webp_path, width))})
+
+        result['record'] = {
+            'width': served_size[0],
+            'height': served_size[1],
+            'variants': variants,
+        }
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+def run_workers(images, entries_for, jobs):
+    """Yield generate_variants() results, on a process pool when jobs > 1"""
+    if jobs <= 1:
+        for path in images:
+            yield generate_variants(path, entries_for(path))
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(generate_variants, str(path), entries_for(path)): path for path in images}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'url': url_for(futures[future]), 'error': f"worker failed: {e}"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate responsive WebP variants for srcset")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    print("📐 Responsive Image Variants")
+    print("=" * 50)
+    print(f"Widths: {', '.join(str(w) for w in WIDTHS)}px @ {QUALITY}% quality")
+    print("=" * 50)
+
+    images = find_served_images()
+    if not images:
+        print("\n❌ No WebP images found in public/products or public/hero*")
+        return
+
+    manifest = ImageManifest()
+    variants_manifest = {}
+    written = 0
+    errors = 0
+
+    def entries_for(path):
+        return {str(variant_path(path, w)): manifest.get(variant_path(path, w)) for w in WIDTHS}
+
+    results = run_workers(images, entries_for, args.jobs)
+    for result in results:
+        if result['error']:
+            errors += 1
+            print(f"   ❌ {result['url']}: {result['error']}")
+            continue
+        for out, entry in result['entries'].items():
+            manifest.update(out, entry)
+        variants_manifest[result['url']] = result['record']
+        written += result['written']
+        count = len(result['record']['variants'])
+        print(f"   ✅ {result['url']}: {count} variant(s), {result['written']} re-encoded")
+
+    manifest.save()
+    with open(VARIANTS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(variants_manifest.items())), f, indent=2)
+
+    print("\n" + "=" * 50)
+    print(f"✨ {len(variants_manifest)}/{len(images)} images, {written} variant(s) written, {errors} error(s)")
+    print(f"📋 Manifest: {VARIANTS_MANIFEST}")
+
+if __name__ == "__main__":
+    main()
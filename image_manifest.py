@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Content-hash manifest for the image optimizers
+Remembers which outputs were produced from which source bytes and with which
+encoder settings, so reruns only re-encode what actually changed.
+
+Entries are keyed by output path (relative to the manifest's directory):
+
+    {
+        "products/acacia-honey.webp": {
+            "source": "products/acacia-honey.png",
+            "source_fp": {"size": 1234, "mtime_ns": ..., "sha256": "..."},
+            "output_fp": {"size": 567, "mtime_ns": ..., "sha256": "..."},
+            "settings": {"format": "webp", "min_ssim": 0.97, ...},
+            "quality": 71
+        }
+    }
+
+"quality" is only present when the encoder searched for it (an SSIM or
+byte-budget target in the settings); it records the value that was chosen.
+
+A fingerprint matches when the size is equal and either the mtime is
+unchanged (fast path: one stat) or the content hash is equal (after a git
+checkout or cp: one stat + one hash).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from image_pipeline import output_settings, webp_output
+
+MANIFEST_PATH = 'public/.image-manifest.json'
+HASH_CHUNK = 1024 * 1024
+
+def file_sha256(path) -> str:
+    """Hash a file in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprint(path, sha256=None) -> dict:
+    """Size, mtime and content hash of a file"""
+    st = os.stat(path)
+    return {
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'sha256': sha256 or file_sha256(path),
+    }
+
+def refresh_fingerprint(path, recorded):
+    """
+    Compare a file against a recorded fingerprint.
+
+    Returns the up-to-date fingerprint if the content is unchanged, or None
+    if it changed (or the file is missing). Only hashes when the size
+    matches but the mtime does not.
+    """
+    if not recorded:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_size != recorded.get('size'):
+        return None
+    if st.st_mtime_ns == recorded.get('mtime_ns'):
+        return recorded
+    sha256 = file_sha256(path)
+    if sha256 != recorded.get('sha256'):
+        return None
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha256}
+
+def check_entry(entry, source, output, settings):
+    """
+    Decide whether output is still a valid encode of source with settings.
+
+    Pure function of the entry and the filesystem, so it can run inside a
+    worker process. Returns the refreshed entry if fresh, otherwise None.
+    """
+    if not entry or entry.get('settings') != settings:
+        return None
+    output_fp = refresh_fingerprint(output, entry.get('output_fp'))
+    if output_fp is None:
+        return None
+    if os.path.abspath(source) == os.path.abspath(output):
+        # Re-encoded in place (or asking "is this already our encode?"):
+        # only the output matters, and a conversion entry keeps its source.
+        if entry.get('source_fp') == entry.get('output_fp'):
+            return dict(entry, source_fp=output_fp, output_fp=output_fp)
+        return dict(entry, output_fp=output_fp)
+    source_fp = refresh_fingerprint(source, entry.get('source_fp'))
+    if source_fp is None:
+        return None
+    return dict(entry, source_fp=source_fp, output_fp=output_fp)
+
+def stale_outputs(source, outputs, entries):
+    """
+    Split outputs into (stale specs, fresh manifest entries).
+
+    An output is fresh when the manifest says it was produced from these
+    exact source bytes with these exact settings.
+    """
+    stale, fresh_entries = [], {}
+    for spec in outputs:
+        fresh = check_entry(entries.get(spec['path']), source, spec['path'], output_settings(spec))
+        if fresh is None:
+            stale.append(spec)
+        else:
+            fresh_entries[spec['path']] = fresh
+    return stale, fresh_entries
+
+def make_entry(root, source, output, settings, source_sha256=None, quality=None):
+    """Build a manifest entry for a freshly written output (worker-safe)"""
+    rel = lambda p: Path(os.path.relpath(p, root)).as_posix()
+    output_fp = fingerprint(output)
+    if os.path.abspath(source) == os.path.abspath(output):
+        source_fp = output_fp
+    else:
+        source_fp = fingerprint(source, source_sha256)
+    entry = {
+        'source': rel(source),
+        'source_fp': source_fp,
+        'output_fp': output_fp,
+        'settings': settings,
+    }
+    if quality is not None:
+        entry['quality'] = quality
+    return entry
+
+class ImageManifest:
+    """Persistent output -> (source hash, settings) map"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.entries = {}
+        self.dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except (OSError, ValueError):
+                # A corrupt manifest only costs a full re-encode
+                self.entries = {}
+
+    def key(self, path) -> str:
+        return Path(os.path.relpath(path, self.root)).as_posix()
+
+    def get(self, output):
+        return self.entries.get(self.key(output))
+
+    def is_fresh(self, source, output, settings) -> bool:
+        entry = check_entry(self.get(output), source, output, settings)
+        if entry is not None and entry != self.get(output):
+            self.entries[self.key(output)] = entry
+            self.dirty = True
+        return entry is not None
+
+    def record(self, source, output, settings, source_sha256=None):
+        """Record that output was just written from source with settings"""
+        self.update(output, make_entry(self.root, source, output, settings, source_sha256))
+
+    def update(self, output, entry):
+        """Store an entry computed elsewhere (e.g. by a worker process)"""
+        self.entries[self.key(output)] = entry
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+def read_pairs(stream):
+    """(source, output) pairs from "source<TAB>output" lines; a bare path is its own output"""
+    for line in stream:
+        line = line.rstrip('\n')
+        if line:
+            source, _, output = line.partition('\t')
+            yield source, output or source
+
+def main():
+    # Small CLI so optimize-images.sh can share the same manifest. Without
+    # source/output, pairs are read from stdin so a whole run is one call.
+    parser = argparse.ArgumentParser(description="Query or update the image manifest")
+    parser.add_argument('action', choices=['check', 'stale', 'record'],
+                        help="check: exit 1 unless every pair is fresh; stale: print the pairs that "
+                             "need encoding; record: store the pairs as just encoded")
+    parser.add_argument('source', nargs='?')
+    parser.add_argument('output', nargs='?')
+    parser.add_argument('--quality', type=int, default=82)
+    parser.add_argument('--method', type=int, default=6)
+    parser.add_argument('--min-ssim', type=float,
+                        help="the outputs were (or will be) SSIM-searched, as optimize_images.py --min-ssim")
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    args = parser.parse_args()
+
+    manifest = ImageManifest(args.manifest)
+    # Same settings dict optimize_images.py records, so the two tools agree on freshness
+    settings = output_settings(webp_output('', args.quality, args.method, min_ssim=args.min_ssim))
+    if args.source:
+        pairs = [(args.source, args.output or args.source)]
+    else:
+        pairs = list(read_pairs(sys.stdin))
+
+    if args.action == 'record':
+        for source, output in pairs:
+            manifest.record(source, output, settings)
+        manifest.save()
+        return
+    stale = [(source, output) for source, output in pairs if not manifest.is_fresh(source, output, settings)]
+    manifest.save()
+    if args.action == 'stale':
+        for source, output in stale:
+            print(f"{source}\t{output}")
+    else:
+        sys.exit(1 if stale else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Shared single-decode image pipeline
+Used by optimize_images.py, optimize_hero_images.py and
+generate_responsive_images.py.
+
+Each source is opened, flattened to RGB and decoded exactly once; every
+requested output (product WebP, hero crop, thumbnails, AVIF) is rendered from
+that decoded image. Resized intermediates are cached per geometry, so a WebP
+and an AVIF of the same crop share one resample. Sources with an embedded
+non-sRGB ICC profile are converted to sRGB at decode, since none of the
+outputs carry a profile.
+
+Outputs are plain dicts built by the *_output() helpers below. Everything
+except 'path' is the encoder settings, which is also what the image manifest
+stores, so changing any setting invalidates exactly the affected outputs.
+
+When every output is a downscale, large sources are decoded smaller: JPEGs
+via draft mode (DCT scaling inside libjpeg), then any format via an integer
+reduce(), always keeping at least REDUCE_GAP times the largest output's
+pixels for the final LANCZOS pass, so the result is visually identical.
+
+Product WebPs can have their quality searched per image instead of fixed:
+with min_ssim set, the lowest quality whose SSIM against the decoded source
+stays at or above the threshold is used (see image_quality.py), so flat
+shots on white drop well below 82 while detailed macro shots go above it.
+
+Every report also carries per-stage wall times (decode, flatten, resize,
+encode, write), the source's megapixels and the process's peak RSS, which
+pipeline_profile.py turns into profile files and summaries.
+"""
+
+import io
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from PIL import Image, features
+
+from image_quality import luma_plane, numpy_available, plane_ssim
+
+try:
+    from PIL import ImageCms
+except ImportError:  # Pillow built without littlecms
+    ImageCms = None
+
+HERO_SIZE = (1080, 1920)
+HERO_SOURCE_PATTERNS = ('hero*.png', 'hero*.jpg')  # relative to public/
+STAGES = ('decode', 'flatten', 'resize', 'encode', 'write')
+REDUCE_GAP = 2.0  # decode at >= 2x the largest output, as Image.thumbnail() does
+
+class StageTimer:
+    """Accumulated wall time per pipeline stage for one source"""
+
+    def __init__(self):
+        self.stages = dict.fromkeys(STAGES, 0.0)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+def peak_rss_mb():
+    """High-water resident set size of this process in MB (None if unknown)"""
+    # Linux: VmHWM resets on exec, unlike ru_maxrss which a spawned child inherits
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def flatten_to_rgb(img):
+    """Convert to RGB, compositing any transparency onto white"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+def is_srgb_profile(icc_profile) -> bool:
+    """
+    True if an embedded ICC profile is (a variant of) sRGB; False if it
+    isn't or can't be identified.
+
+    Without ImageCms the profile can't be identified (or converted), so it
+    counts as non-sRGB and callers keep it rather than shift the colours.
+    The same goes for a profile ImageCms can't read.
+    """
+    if ImageCms is None:
+        return False
+    try:
+        profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        return 'srgb' in ImageCms.getProfileDescription(profile).lower()
+    except Exception:
+        return False
+
+def to_srgb(img, icc_profile):
+    """
+    Convert RGB/RGBA pixels from their embedded profile to sRGB.
+
+    Returns img itself if it is already sRGB or the profile can't be used.
+    """
+    if not icc_profile or img.mode not in ('RGB', 'RGBA') or ImageCms is None or is_srgb_profile(icc_profile):
+        return img
+    try:
+        source = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+        return ImageCms.profileToProfile(img, source, ImageCms.createProfile('sRGB'),
+                                         renderingIntent=ImageCms.Intent.PERCEPTUAL, outputMode=img.mode)
+    except (ImageCms.PyCMSError, OSError):
+        return img
+
+def avif_available() -> bool:
+    """True if this Pillow build can write AVIF"""
+    try:
+        return bool(features.check('avif'))
+    except Exception:
+        return False
+
+# --- Output specs -----------------------------------------------------------
+
+def webp_output(path, quality=82, method=6, min_ssim=None, min_quality=40, max_quality=95):
+    """
+    Full-size WebP (the product optimizer's output).
+
+    With min_ssim set, quality is searched between min_quality and
+    max_quality (see encode_webp_to_ssim); otherwise it is fixed.
+    """
+    spec = {'path': str(path), 'format': 'webp', 'method': method}
+    if min_ssim:
+        spec.update(min_ssim=min_ssim, min_quality=min_quality, max_quality=max_quality)
+    else:
+        spec['quality'] = quality
+    return spec
+
+def hero_output(path, size=HERO_SIZE, target_kb=200, max_attempts=7, search_method=None, quality=80,
+                min_ssim=None):
+    """
+    Cover-cropped hero WebP.
+
+    With min_ssim set, quality is searched for the SSIM threshold (see
+    encode_webp_to_ssim); with target_kb set, to fit the budget (see
+    encode_webp_to_budget); otherwise it is encoded once at quality.
+    """
+    spec = {
+        'path': str(path),
+        'format': 'webp',
+        'method': 6,
+        'resize': {'mode': 'cover', 'width': size[0], 'height': size[1]},
+    }
+    if min_ssim:
+        spec.update(min_ssim=min_ssim, min_quality=40, max_quality=95, max_attempts=max_attempts)
+    elif target_kb:
+        spec.update(target_kb=target_kb, max_attempts=max_attempts)
+    else:
+        spec['quality'] = quality
+        return spec
+    # Left out when not given, so encode() applies each search's own default
+    if search_method is not None:
+        spec['search_method'] = search_method
+    return spec
+
+def thumbnail_output(path, width, quality=80, method=6):
+    """WebP scaled down to width, keeping the aspect ratio"""
+    return {
+        'path': str(path),
+        'format': 'webp',
+        'quality': quality,
+        'method': method,
+        'resize': {'mode': 'width', 'width': width},
+    }
+
+def avif_output(path, quality=60, resize=None):
+    """AVIF alongside a WebP output; pass the same resize to share the resample"""
+    spec = {'path': str(path), 'format': 'avif', 'quality': quality}
+    if resize:
+        spec['resize'] = resize
+    return spec
+
+def output_settings(spec) -> dict:
+    """Encoder settings of an output spec, as stored in the image manifest"""
+    return {k: v for k, v in spec.items() if k != 'path' and v is not None}
+
+# --- Geometry ---------------------------------------------------------------
+
+def cover_resize(img, width, height):
+    """Resize to cover width x height (object-fit: cover), then center crop"""
+    img_ratio = img.size[0] / img.size[1]
+    target_ratio = width / height
+
+    if img_ratio > target_ratio:
+        # Image is wider - scale by height
+        new_height = height
+        new_width = int(img.size[0] * (height / img.size[1]))
+    else:
+        # Image is taller - scale by width
+        new_width = width
+        new_height = int(img.size[1] * (width / img.size[0]))
+
+    resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    left = (new_width - width) // 2
+    top = (new_height - height) // 2
+    return resized.crop((left, top, left + width, top + height))
+
+def resize_to_width(img, width, source_size=None):
+    """
+    Scale down to width, keeping the aspect ratio (never upscales).
+
+    source_size is the original's size when img was decoded at reduced
+    scale, so the height matches what a full-size decode would give.
+    """
+    source_width, source_height = source_size or img.size
+    if width >= source_width:
+        return img
+    height = round(source_height * width / source_width)
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+def output_scale(resize, source_size) -> float:
+    """Fraction of the source's linear size an output needs (1.0 = full size)"""
+    if not resize:
+        return 1.0
+    width, height = source_size
+    if resize['mode'] == 'cover':
+        return min(1.0, max(resize['width'] / width, resize['height'] / height))
+    return min(1.0, resize['width'] / width)
+
+def render(img, resize, cache, timer=None, source_size=None):
+    """Apply an output's resize to the decoded image, reusing cached results"""
+    if not resize:
+        return img
+    key = tuple(sorted(resize.items()))
+    if key not in cache:
+        with (timer or StageTimer()).stage('resize'):
+            if resize['mode'] == 'cover':
+                cache[key] = cover_resize(img, resize['width'], resize['height'])
+            else:
+                cache[key] = resize_to_width(img, resize['width'], source_size)
+    return cache[key]
+
+# --- Encoding ---------------------------------------------------------------
+
+def encode_webp(img, quality, method=6):
+    """Encode to WebP in memory and return the bytes"""
+    buffer = io.BytesIO()
+    img.save(buffer, 'WebP', quality=quality, method=method)
+    return buffer.getvalue()
+
+def encode_avif(img, quality):
+    """Encode to AVIF in memory and return the bytes"""
+    buffer = io.BytesIO()
+    img.save(buffer, 'AVIF', quality=quality)
+    return buffer.getvalue()
+
+def encode_webp_to_budget(img, max_bytes, min_quality=40, max_quality=90,
+                          max_attempts=7, method=6, search_method=None):
+    """
+    Binary-search WebP quality for the highest value that fits max_bytes.
+
+    Every encode counts as an attempt, so the search never runs more than
+    max_attempts encodes. If search_method is given (e.g. 4), probes use that
+    faster method and only the winning quality is re-encoded with method; the
+    probe result is kept if the final encode lands over budget.
+
+    Returns (data, quality, attempts). If even min_quality is too large, the
+    smallest encode is returned and the caller should report it.
+    """
+    assert max_attempts >= 1, f"max_attempts must be at least 1, got {max_attempts}"
+    probe_method = method if search_method is None else search_method
+    lo, hi = min_quality, max_quality
+    best = None      # (quality, data) of the largest quality under budget
+    smallest = None  # fallback when nothing fits
+    attempts = 0
+
+    while lo <= hi and attempts < max_attempts:
+        quality = (lo + hi + 1) // 2
+        data = encode_webp(img, quality, probe_method)
+        attempts += 1
+        if smallest is None or len(data) < len(smallest[1]):
+            smallest = (quality, data)
+        if len(data) <= max_bytes:
+            best = (quality, data)
+            lo = quality + 1
+        else:
+            hi = quality - 1
+
+    if best is None and attempts < max_attempts and smallest[0] != min_quality:
+        # Search ran out of room above min_quality; try the floor once
+        data = encode_webp(img, min_quality, probe_method)
+        attempts += 1
+        if len(data) <= max_bytes:
+            best = (min_quality, data)
+        elif len(data) < len(smallest[1]):
+            smallest = (min_quality, data)
+
+    quality, data = best or smallest
+    if probe_method != method and attempts < max_attempts:
+        final = encode_webp(img, quality, method)
+        attempts += 1
+        if len(final) <= max_bytes or len(final) < len(data):
+            data = final
+
+    return data, quality, attempts
+
+def webp_ssim(reference, data) -> float:
+    """SSIM of an encoded WebP against the luma plane of the image it was encoded from"""
+    with Image.open(io.BytesIO(data)) as decoded:
+        return plane_ssim(reference, luma_plane(decoded))
+
+def encode_webp_to_ssim(img, min_ssim, min_quality=40, max_quality=95,
+                        max_attempts=7, method=6, search_method=4):
+    """
+    Binary-search WebP quality for the lowest value whose SSIM against img
+    is at least min_ssim.
+
+    Probes use the faster search_method and are capped at max_attempts;
+    the winning quality is then re-encoded with method and checked once
+    more, keeping the probe if the final encode falls short. If no probe
+    reaches the threshold, max_quality is used.
+
+    Returns (data, quality, attempts).
+    """
+    probe_method = method if search_method is None else search_method
+    reference = luma_plane(img)  # shared by every probe
+    lo, hi = min_quality, max_quality
+    best = None  # (quality, data) of the lowest quality that passed
+    attempts = 0
+
+    while lo <= hi and attempts < max_attempts:
+        quality = (lo + hi) // 2
+        data = encode_webp(img, quality, probe_method)
+        attempts += 1
+        if webp_ssim(reference, data) >= min_ssim:
+            best = (quality, data)
+            hi = quality - 1
+        else:
+            lo = quality + 1
+
+    if best is None:
+        return encode_webp(img, max_quality, method), max_quality, attempts + 1
+
+    quality, data = best
+    if probe_method != method:
+        final = encode_webp(img, quality, method)
+        attempts += 1
+        if webp_ssim(reference, final) >= min_ssim:
+            data = final
+    return data, quality, attempts
+
+def encode(img, spec):
+    """Encode img per spec; returns (data, quality, attempts)"""
+    if spec['format'] == 'avif':
+        return encode_avif(img, spec['quality']), spec['quality'], 1
+    if spec.get('min_ssim'):
+        if not numpy_available():
+            raise RuntimeError("SSIM quality search needs numpy (pip install numpy)")
+        return encode_webp_to_ssim(
+            img, spec['min_ssim'], spec.get('min_quality', 40), spec.get('max_quality', 95),
+            max_attempts=spec.get('max_attempts', 7), method=spec.get('method', 6),
+            search_method=spec.get('search_method', 4))
+    if spec.get('target_kb'):
+        return encode_webp_to_budget(
+            img, int(spec['target_kb'] * 1024), max_attempts=spec.get('max_attempts', 7),
+            method=spec.get('method', 6), search_method=spec.get('search_method'))
+    return encode_webp(img, spec['quality'], spec.get('method', 6)), spec['quality'], 1
+
+def write_atomic(path, data):
+    """Write bytes via a temp file so readers never see a partial image"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# --- Driver -----------------------------------------------------------------
+
+def decode(source, timer=None, resizes=(None,)):
+    """
+    Open, decode and flatten a source image.
+
+    resizes lists the resize of every output that will be rendered from it
+    (None for full size). If all of them are downscales, the image may come
+    back smaller than the original, but never below REDUCE_GAP times the
+    largest output. Returns (img, original size).
+    """
+    timer = timer or StageTimer()
+    with timer.stage('decode'):
+        img = Image.open(source)
+        try:
+            original_size = img.size
+            scale = max((output_scale(resize, original_size) for resize in resizes), default=1.0)
+            wanted = [math.ceil(side * scale * REDUCE_GAP) for side in original_size]
+            if img.format == 'JPEG' and scale * REDUCE_GAP < 0.5:
+                # libjpeg decodes straight to 1/2, 1/4 or 1/8 scale, at least `wanted`
+                img.draft(img.mode, tuple(wanted))
+            img.load()
+            icc_profile = img.info.get('icc_profile')
+        except Exception:
+            img.close()
+            raise
+    with img:
+        # Palette images can't be reduced directly; flatten them first
+        if img.mode == 'P':
+            with timer.stage('flatten'):
+                img = flatten_to_rgb(img)
+        with timer.stage('resize'):
+            factor = min(img.size[0] // wanted[0], img.size[1] // wanted[1])
+            if factor >= 2:
+                img = img.reduce(factor)
+        with timer.stage('flatten'):
+            return to_srgb(flatten_to_rgb(img), icc_profile), original_size
+
+def process_source(source, outputs):
+    """
+    Decode source once and write every requested output.
+
+    Returns a dict with the source's pixel size and one result per output:
+    {'path', 'ok', 'bytes', 'quality', 'attempts', 'size', 'error'}. A failure
+    in one output does not stop the others; a decode failure fails them all.
+    'timings' holds seconds per stage, plus 'megapixels' and 'peak_rss_mb'.
+    """
+    timer = StageTimer()
+    report = {'source': str(source), 'source_size': None, 'outputs': [],
+              'timings': timer.stages, 'megapixels': None, 'peak_rss_mb': None}
+    try:
+        img, report['source_size'] = decode(source, timer, [spec.get('resize') for spec in outputs])
+        report['decoded_size'] = img.size
+        report['megapixels'] = report['source_size'][0] * report['source_size'][1] / 1e6
+    except Exception as e:
+        for spec in outputs:
+            report['outputs'].append({'path': spec['path'], 'ok': False, 'error': str(e)})
+        report['peak_rss_mb'] = peak_rss_mb()
+        return report
+
+    cache = {}
+    for spec in outputs:
+        result = {'path': spec['path'], 'ok': False, 'error': None}
+        try:
+            if spec['format'] == 'avif' and not avif_available():
+                raise RuntimeError("AVIF encoding not supported by this Pillow build")
+            rendered = render(img, spec.get('resize'), cache, timer, report['source_size'])
+            with timer.stage('encode'):
+                data, quality, attempts = encode(rendered, spec)
+            with timer.stage('write'):
+                write_atomic(spec['path'], data)
+            result.update(ok=True, bytes=len(data), quality=quality,
+                          attempts=attempts, size=rendered.size)
+        except Exception as e:
+            result['error'] = str(e)
+        report['outputs'].append(result)
+    report['peak_rss_mb'] = peak_rss_mb()
+    return report
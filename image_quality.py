@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Perceptual image comparison (SSIM) for the image optimizers
+Vectorized with NumPy: local means, variances and covariance come from
+summed-area tables, so one comparison is a handful of whole-array
+operations instead of a Python loop over windows.
+
+Follows Wang et al. (2004) on the luma channel: 7x7 windows, K1=0.01,
+K2=0.03. Unlike the reference code, images up to MAX_SIDE pixels are
+compared at full resolution: product photos are zoomed in the gallery
+lightbox, and averaging them down first hides exactly the ringing and
+blocking the quality search is meant to catch (q40 and q82 of a 2048px
+photo score 0.988 and 0.994 at 1/8 scale, 0.937 and 0.971 at full size).
+Larger sources are box-reduced by the smallest integer factor that fits,
+which is about the size they are ever displayed at.
+
+Planes are float32 and the SSIM map is computed in bands of TILE_ROWS
+rows, so memory stays at a few MB per comparison whatever the image size.
+A quality search compares many candidates against one source: build the
+reference plane once with luma_plane() and pass it to plane_ssim().
+
+NumPy is optional for the rest of the tooling; check numpy_available()
+before asking the pipeline for an SSIM-driven encode.
+
+    python3 image_quality.py original.png encoded.webp
+"""
+
+import argparse
+import math
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # only needed for SSIM
+    np = None
+
+WINDOW = 7
+DEFAULT_MIN_SSIM = 0.97  # q82 scored 0.971-0.974 on our most detailed product shots
+K1, K2 = 0.01, 0.03
+DYNAMIC_RANGE = 255.0
+MAX_SIDE = 2048   # larger images are compared box-reduced to fit
+TILE_ROWS = 256   # SSIM map rows per band
+
+def numpy_available() -> bool:
+    return np is not None
+
+def luma_plane(img):
+    """Luma channel as a float32 array, box-reduced to fit MAX_SIDE"""
+    if np is None:
+        raise RuntimeError("SSIM needs numpy (pip install numpy)")
+    gray = img.convert('L')
+    factor = math.ceil(max(gray.size) / MAX_SIDE)
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return np.asarray(gray, dtype=np.float32)
+
+def window_means(x, size=WINDOW):
+    """Mean over every size x size window ('valid' positions) via a summed-area table"""
+    # The table itself is float64: float32 running sums of squares lose the low digits
+    table = np.zeros((x.shape[0] + 1, x.shape[1] + 1))
+    table[1:, 1:] = x.cumsum(axis=0, dtype=np.float64).cumsum(axis=1)
+    sums = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return (sums / (size * size)).astype(np.float32)
+
+def ssim_map_sum(x, y) -> float:
+    """Sum of the SSIM map of two planes (one value per 'valid' window)"""
+    mu_x, mu_y = window_means(x), window_means(y)
+    # Sample (N-1) covariance, as in the reference implementation
+    n = WINDOW * WINDOW
+    var_x = (window_means(x * x) - mu_x * mu_x) * (n / (n - 1))
+    var_y = (window_means(y * y) - mu_y * mu_y) * (n / (n - 1))
+    cov_xy = (window_means(x * y) - mu_x * mu_y) * (n / (n - 1))
+
+    c1, c2 = (K1 * DYNAMIC_RANGE) ** 2, (K2 * DYNAMIC_RANGE) ** 2
+    numerator = (2 * mu_x * mu_y + c1) * (2 * cov_xy + c2)
+    denominator = (mu_x * mu_x + mu_y * mu_y + c1) * (var_x + var_y + c2)
+    return float((numerator / denominator).sum(dtype=np.float64))
+
+def plane_ssim(x, y) -> float:
+    """Mean structural similarity of two same-shaped luma planes, one band at a time"""
+    if x.shape != y.shape:
+        raise ValueError(f"size mismatch: {x.shape[::-1]} vs {y.shape[::-1]}")
+    if min(x.shape) < WINDOW:
+        return 1.0 if np.array_equal(x, y) else float(1 - np.abs(x - y).mean() / DYNAMIC_RANGE)
+
+    rows = x.shape[0] - WINDOW + 1  # rows of the SSIM map
+    total = 0.0
+    for top in range(0, rows, TILE_ROWS):
+        # Each band overlaps the next by WINDOW - 1 source rows, so no window is lost
+        band = slice(top, min(top + TILE_ROWS, rows) + WINDOW - 1)
+        total += ssim_map_sum(x[band], y[band])
+    return total / (rows * (x.shape[1] - WINDOW + 1))
+
+def ssim(reference, candidate) -> float:
+    """Mean structural similarity of two same-sized images (1.0 = identical)"""
+    if reference.size != candidate.size:
+        raise ValueError(f"size mismatch: {reference.size} vs {candidate.size}")
+    return plane_ssim(luma_plane(reference), luma_plane(candidate))
+
+def main():
+    parser = argparse.ArgumentParser(description="SSIM between two images")
+    parser.add_argument('reference')
+    parser.add_argument('candidate')
+    args = parser.parse_args()
+    with Image.open(args.reference) as a, Image.open(args.candidate) as b:
+        print(f"{ssim(a, b):.5f}")
+
+if __name__ == '__main__':
+    main()
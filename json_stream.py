@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for JSON exports
+Yields records one at a time from either a JSONL file (one document per
+line, e.g. a plain mongoexport) or a file holding a single top-level JSON
+array (data/*.json, mongoexport --jsonArray), without loading the whole
+array into memory first.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+CHUNK_SIZE = 1024 * 1024
+WHITESPACE = ' \t\r\n'
+NUMBER_CHARS = '0123456789+-.eE'
+
+def iter_array(f, chunk_size=CHUNK_SIZE) -> Iterator:
+    """Yield the elements of a top-level JSON array read from text file f"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    fill()
+    skip_whitespace()
+    if buffer[pos:pos + 1] != '[':
+        raise ValueError("expected a JSON array")
+    pos += 1
+    skip_whitespace()
+    if buffer[pos:pos + 1] == ']':
+        return
+    while True:
+        skip_whitespace()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A bare number cut by the chunk boundary still parses ("-2." -> -2)
+                if not eof and isinstance(value, (int, float)) and not buffer[end:].lstrip(NUMBER_CHARS):
+                    raise ValueError("number may continue in the next chunk")
+                break
+            except ValueError:
+                if eof:
+                    raise
+                fill()
+        pos = end
+        yield value
+        skip_whitespace()
+        separator = buffer[pos:pos + 1]
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"expected ',' or ']' in array, got {separator!r}")
+
+def iter_records(path) -> Iterator:
+    """Records from a .jsonl/.ndjson file or a JSON array file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if str(path).endswith(('.jsonl', '.ndjson')):
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f"{path}:{line_number}: {e}") from None
+        else:
+            yield from iter_array(f)
+
+def record_time(record, field='createdAt') -> Optional[str]:
+    """
+    A record's timestamp as a UTC 'YYYY-MM-DDTHH:MM:SSZ' string (sorts
+    chronologically), or None if it is missing or unparseable.
+
+    Accepts plain ISO strings and mongoexport's extended JSON dates,
+    {"$date": "..."} and {"$date": {"$numberLong": "<epoch ms>"}}.
+    """
+    value = record.get(field)
+    if isinstance(value, dict):
+        value = value.get('$date')
+        if isinstance(value, dict):
+            try:
+                value = datetime.fromtimestamp(int(value.get('$numberLong')) / 1000, timezone.utc).isoformat()
+            except (TypeError, ValueError, OverflowError, OSError):
+                return None
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z')
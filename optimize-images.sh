@@ -18,10 +18,9 @@ if ! command -v cwebp &> /dev/null; then
     sudo apt-get install -y webp
 fi
 
-# Create backup directory
-BACKUP_DIR="public/images_backup_$(date +%Y%m%d_%H%M%S)"
-mkdir -p "$BACKUP_DIR"
-echo "📁 Backup directory created: $BACKUP_DIR"
+# Originals go into the deduplicating backup store (see backup_store.py)
+BACKUP_RUN="optimize-$(date +%Y%m%d_%H%M%S)"
+echo "📁 Backup run: $BACKUP_RUN"
 
 # Counter variables
 total_files=0
@@ -34,6 +33,30 @@ get_size() {
     stat -f%z "$1" 2>/dev/null || stat -c%s "$1" 2>/dev/null
 }
 
+# Manifest helpers (shared with optimize_images.py via image_manifest.py).
+# Skips are decided by source content hash + encoder settings, not mtime,
+# so a git checkout or cp doesn't force a full re-encode. Both read
+# "source<TAB>output" lines on stdin, so each phase starts Python once
+# instead of once per file.
+MANIFEST_ARGS=(--quality 82 --method 6)
+
+manifest_stale() {
+    python3 image_manifest.py stale "${MANIFEST_ARGS[@]}"
+}
+
+manifest_record() {
+    if [ $# -gt 0 ]; then
+        printf '%s\n' "$@" | python3 image_manifest.py record "${MANIFEST_ARGS[@]}"
+    fi
+}
+
+# One backup_store.py call per phase for every file about to be rewritten
+backup_files() {
+    if [ $# -gt 0 ]; then
+        python3 backup_store.py backup "$BACKUP_RUN" "$@"
+    fi
+}
+
 # Function to format bytes to human readable
 format_size() {
     numfmt --to=iec-i --suffix=B "$1" 2>/dev/null || echo "$1 bytes"
@@ -42,31 +65,39 @@ format_size() {
 # Process PNG and JPG files - convert to WebP
 echo ""
 echo "🔄 Converting PNG/JPG files to WebP..."
-find public -type f \( -iname "*.png" -o -iname "*.jpg" -o -iname "*.jpeg" \) | while read -r file; do
+pairs=()
+while IFS= read -r file; do
     total_files=$((total_files + 1))
-    
+    pairs+=("$file"$'\t'"${file%.*}.webp")
+done < <(find public -type f \( -iname "*.png" -o -iname "*.jpg" -o -iname "*.jpeg" \))
+
+# Skip sources that were already encoded from these exact bytes with these settings
+stale_sources=()
+while IFS=$'\t' read -r file webp_file; do
+    stale_sources+=("$file")
+done < <(if [ ${#pairs[@]} -gt 0 ]; then printf '%s\n' "${pairs[@]}" | manifest_stale; fi)
+skipped=$((total_files - ${#stale_sources[@]}))
+if [ $skipped -gt 0 ]; then
+    echo "⏭️  Skipping $skipped file(s) unchanged since last run"
+fi
+
+# Backup originals
+backup_files "${stale_sources[@]}"
+
+recorded=()
+for file in "${stale_sources[@]}"; do
     # Get original size
     original_size=$(get_size "$file")
     
     # Create WebP filename
     webp_file="${file%.*}.webp"
     
-    # Skip if WebP already exists and is newer
-    if [ -f "$webp_file" ] && [ "$webp_file" -nt "$file" ]; then
-        echo "⏭️  Skipping $file (WebP already exists and is newer)"
-        continue
-    fi
-    
-    # Backup original
-    backup_path="$BACKUP_DIR/${file#public/}"
-    mkdir -p "$(dirname "$backup_path")"
-    cp "$file" "$backup_path"
-    
     # Convert to WebP with 82% quality
     echo "🔧 Converting: $file"
     cwebp -q 82 -m 6 "$file" -o "$webp_file" 2>/dev/null
     
     if [ $? -eq 0 ]; then
+        recorded+=("$file"$'\t'"$webp_file")
         new_size=$(get_size "$webp_file")
         saved=$((original_size - new_size))
         total_saved=$((total_saved + saved))
@@ -80,18 +111,33 @@ find public -type f \( -iname "*.png" -o -iname "*.jpg" -o -iname "*.jpeg" \) |
         echo "   ❌ Failed to convert $file"
     fi
 done
+manifest_record "${recorded[@]}"
 
 # Optimize existing WebP files that are large
 echo ""
 echo "🔄 Optimizing existing large WebP files..."
-find public -type f -name "*.webp" -size +500k | while read -r file; do
+large_webps=()
+while IFS= read -r file; do
+    large_webps+=("$file")
+done < <(find public -type f -name "*.webp" -size +500k)
+
+# Skip files that are already our own encode at these settings
+stale_webps=()
+while IFS=$'\t' read -r file _; do
+    stale_webps+=("$file")
+done < <(if [ ${#large_webps[@]} -gt 0 ]; then printf '%s\n' "${large_webps[@]}" | manifest_stale; fi)
+skipped=$((${#large_webps[@]} - ${#stale_webps[@]}))
+if [ $skipped -gt 0 ]; then
+    echo "⏭️  Skipping $skipped file(s) already optimized"
+fi
+
+# Backup originals
+backup_files "${stale_webps[@]}"
+
+recorded=()
+for file in "${stale_webps[@]}"; do
     original_size=$(get_size "$file")
     
-    # Backup original
-    backup_path="$BACKUP_DIR/${file#public/}"
-    mkdir -p "$(dirname "$backup_path")"
-    cp "$file" "$backup_path"
-    
     # Create temporary file
     temp_file="${file}.tmp.webp"
     
@@ -115,11 +161,13 @@ find public -type f -name "*.webp" -size +500k | while read -r file; do
             rm "$temp_file"
             echo "   ℹ️  New file not smaller, keeping original"
         fi
+        recorded+=("$file")
     else
         echo "   ❌ Failed to optimize $file"
         rm -f "$temp_file"
     fi
 done
+manifest_record "${recorded[@]}"
 
 # Summary
 echo ""
@@ -129,10 +177,10 @@ echo "=================================="
 echo "📊 Files converted to WebP: $converted_files"
 echo "📊 WebP files optimized: $optimized_files"
 echo "💾 Total space saved: $(format_size $total_saved)"
-echo "📁 Backups stored in: $BACKUP_DIR"
+echo "📁 Backup run: $BACKUP_RUN (restore with: python3 backup_store.py restore $BACKUP_RUN)"
 echo ""
 echo "Next steps:"
 echo "1. Test your website to ensure images display correctly"
 echo "2. Update image references in your code if needed"
-echo "3. If everything works, you can delete the backup directory"
+echo "3. If everything works, prune old runs with: python3 backup_store.py gc --keep $BACKUP_RUN"
 echo "4. Consider deleting original PNG/JPG files to save more space"
@@ -3,95 +3,150 @@
 Optimize hero images for mobile devices
 - Resize to 1080x1920px (9:16 portrait ratio)
 - Convert to WebP format
-- Compress to 80% quality
+- Compress to 80% quality, or binary-search quality to fit a byte budget
+  (or, with --min-ssim, for the lowest quality above an SSIM threshold)
 - Target file size: < 200KB
+- Heroes are recorded in the image manifest, so a rerun skips those whose
+  source and settings haven't changed
 """
 
-from PIL import Image
+import argparse
 import os
 import glob
 
-def optimize_hero_image(input_path, output_dir="public"):
-    """Optimize a single hero image"""
-    try:
-        # Open image
-        img = Image.open(input_path)
-        print(f"\n📸 Processing: {os.path.basename(input_path)}")
-        print(f"   Original size: {img.size[0]}x{img.size[1]}")
-        
-        # Target dimensions for mobile hero (portrait)
-        target_width = 1080
-        target_height = 1920
-        
-        # Calculate aspect ratios
-        img_ratio = img.size[0] / img.size[1]
-        target_ratio = target_width / target_height
-        
-        # Resize to cover the target area (object-fit: cover behavior)
-        if img_ratio > target_ratio:
-            # Image is wider - scale by height
-            new_height = target_height
-            new_width = int(img.size[0] * (target_height / img.size[1]))
-        else:
-            # Image is taller - scale by width
-            new_width = target_width
-            new_height = int(img.size[1] * (target_width / img.size[0]))
-        
-        # Resize with high-quality Lanczos resampling
-        img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # Center crop to exact target dimensions
-        left = (new_width - target_width) // 2
-        top = (new_height - target_height) // 2
-        right = left + target_width
-        bottom = top + target_height
-        
-        img_final = img_resized.crop((left, top, right, bottom))
-        
-        # Convert to RGB if necessary (WebP doesn't support transparency well)
-        if img_final.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img_final.size, (255, 255, 255))
-            if img_final.mode == 'P':
-                img_final = img_final.convert('RGBA')
-            background.paste(img_final, mask=img_final.split()[-1] if img_final.mode == 'RGBA' else None)
-            img_final = background
-        elif img_final.mode != 'RGB':
-            img_final = img_final.convert('RGB')
-        
-        # Generate output filename (replace extension with .webp)
-        basename = os.path.splitext(os.path.basename(input_path))[0]
-        output_path = os.path.join(output_dir, f"{basename}.webp")
-        
-        # Save as WebP with 80% quality
-        img_final.save(output_path, 'WebP', quality=80, method=6)
-        
-        # Get file sizes
-        original_size = os.path.getsize(input_path) / 1024  # KB
-        new_size = os.path.getsize(output_path) / 1024  # KB
-        reduction = ((original_size - new_size) / original_size) * 100
-        
-        print(f"   ✅ Optimized: {target_width}x{target_height}")
-        print(f"   📦 Original: {original_size:.1f}KB → New: {new_size:.1f}KB")
-        print(f"   💾 Size reduction: {reduction:.1f}%")
-        
-        if new_size > 200:
-            print(f"   ⚠️  Warning: File size ({new_size:.1f}KB) exceeds 200KB target")
-        
-        return output_path
-        
-    except Exception as e:
-        print(f"   ❌ Error processing {input_path}: {e}")
+from image_manifest import ImageManifest, make_entry, stale_outputs
+from image_pipeline import (HERO_SIZE, HERO_SOURCE_PATTERNS, avif_available, avif_output, hero_output,
+                            output_settings, process_source)
+from image_quality import numpy_available
+from optimize_images import MANIFEST_ROOT, searched_quality
+from pipeline_profile import PipelineProfile
+
+def hero_outputs(input_path, output_dir="public", target_kb=200, max_attempts=7, search_method=None,
+                 avif=False, min_ssim=None):
+    """Output specs for one hero: the WebP crop first, then the AVIF if requested"""
+    # Generate output filename (replace extension with .webp)
+    basename = os.path.splitext(os.path.basename(input_path))[0]
+    hero = hero_output(os.path.join(output_dir, f"{basename}.webp"), target_kb=target_kb,
+                       max_attempts=max_attempts, search_method=search_method, min_ssim=min_ssim)
+    outputs = [hero]
+    if avif:
+        outputs.append(avif_output(os.path.join(output_dir, f"{basename}.avif"), resize=hero['resize']))
+    return outputs
+
+def optimize_hero_image(input_path, output_dir="public", target_kb=200,
+                        max_attempts=7, search_method=None, avif=False, profile=None, min_ssim=None,
+                        entries=None):
+    """
+    Optimize a single hero image
+
+    With target_kb set, quality is searched per image so the output lands
+    just under the budget; with target_kb=None it is saved at 80% quality.
+    min_ssim takes precedence over both: quality is searched for the lowest
+    value whose SSIM against the crop stays at or above it.
+    With avif, an AVIF of the same crop is written from the same decode.
+    Stage timings are added to profile (a PipelineProfile) if given.
+
+    entries, if given, maps output paths to their manifest entries (as for
+    optimize_images.convert_file). The hero is skipped when every output is
+    still fresh, and entries is updated in place with what was written.
+    """
+    print(f"\n📸 Processing: {os.path.basename(input_path)}")
+
+    # Target dimensions for mobile hero (portrait)
+    target_width, target_height = HERO_SIZE
+
+    outputs = hero_outputs(input_path, output_dir, target_kb, max_attempts, search_method, avif, min_ssim)
+    output_path = outputs[0]['path']
+    if entries is not None:
+        stale, fresh = stale_outputs(input_path, outputs, entries)
+        entries.clear()
+        entries.update(fresh)
+        if not stale:
+            print("   ⏭️  Unchanged since last run")
+            return output_path
+
+    report = process_source(input_path, outputs)
+    if profile is not None:
+        profile.add(report)
+    result = report['outputs'][0]
+    if report['source_size']:
+        print(f"   Original size: {report['source_size'][0]}x{report['source_size'][1]}")
+    if entries is not None:
+        for spec, out in zip(outputs, report['outputs']):
+            if out['ok']:
+                entries[out['path']] = make_entry(MANIFEST_ROOT, input_path, out['path'], output_settings(spec),
+                                                  quality=searched_quality(spec, out))
+    if not result['ok']:
+        print(f"   ❌ Error processing {input_path}: {result['error']}")
         return None
 
+    if target_kb or min_ssim:
+        print(f"   🎯 Quality {result['quality']} after {result['attempts']} encode(s)")
+
+    # Get file sizes
+    original_size = os.path.getsize(input_path) / 1024  # KB
+    new_size = result['bytes'] / 1024  # KB
+    reduction = ((original_size - new_size) / original_size) * 100
+
+    print(f"   ✅ Optimized: {target_width}x{target_height}")
+    print(f"   📦 Original: {original_size:.1f}KB → New: {new_size:.1f}KB")
+    print(f"   💾 Size reduction: {reduction:.1f}%")
+
+    budget_kb = target_kb or 200
+    if new_size > budget_kb:
+        print(f"   ⚠️  Warning: File size ({new_size:.1f}KB) exceeds {budget_kb}KB target")
+
+    for extra in report['outputs'][1:]:
+        if extra['ok']:
+            print(f"   ✅ {os.path.basename(extra['path'])}: {extra['bytes'] / 1024:.1f}KB")
+        else:
+            print(f"   ❌ {os.path.basename(extra['path'])}: {extra['error']}")
+
+    return output_path
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
 def main():
+    parser = argparse.ArgumentParser(description="Optimize hero images for mobile")
+    parser.add_argument('--target-kb', type=float, default=200,
+                        help="byte budget per hero in KB; 0 saves at fixed 80%% quality (default: 200)")
+    parser.add_argument('--max-attempts', type=positive_int, default=7,
+                        help="maximum WebP encodes per image during the search (default: 7)")
+    parser.add_argument('--search-method', type=int, choices=range(0, 7), default=None,
+                        help="faster WebP method for search probes; the final encode uses method 6")
+    parser.add_argument('--min-ssim', type=float, default=None,
+                        help="search for the lowest quality with SSIM at or above this instead of a byte budget")
+    parser.add_argument('--avif', action='store_true',
+                        help="also write an .avif of each hero (if Pillow supports it)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-image stage timings to PATH (.csv or .json) and print a summary")
+    args = parser.parse_args()
+    if args.avif and not avif_available():
+        print("⚠️  AVIF not supported by this Pillow build, writing WebP only")
+        args.avif = False
+    if args.min_ssim and not numpy_available():
+        print("⚠️  numpy not installed, falling back to the byte budget")
+        args.min_ssim = None
+    target_kb = args.target_kb or None
+
     print("🎨 Hero Image Optimization for Mobile")
     print("=" * 50)
     print("Target: 1080x1920px (9:16 portrait)")
-    print("Format: WebP @ 80% quality")
+    if args.min_ssim:
+        print(f"Format: WebP, lowest quality with SSIM ≥ {args.min_ssim:g}")
+    elif target_kb:
+        print(f"Format: WebP, quality searched to fit {target_kb:g}KB")
+    else:
+        print("Format: WebP @ 80% quality")
     print("=" * 50)
     
     # Find all hero images
-    hero_images = glob.glob("public/hero*.png") + glob.glob("public/hero*.jpg")
+    hero_images = [p for pattern in HERO_SOURCE_PATTERNS for p in glob.glob(os.path.join("public", pattern))]
     
     if not hero_images:
         print("\n❌ No hero images found in public/ directory")
@@ -100,10 +155,23 @@ def main():
     print(f"\n📁 Found {len(hero_images)} hero image(s)")
     
     optimized = []
+    profile = PipelineProfile()
+    manifest = ImageManifest()
     for img_path in sorted(hero_images):
-        result = optimize_hero_image(img_path)
+        entries = {spec['path']: manifest.get(spec['path'])
+                   for spec in hero_outputs(img_path, avif=args.avif)}
+        result = optimize_hero_image(img_path, target_kb=target_kb,
+                                     max_attempts=args.max_attempts,
+                                     search_method=args.search_method,
+                                     avif=args.avif,
+                                     profile=profile,
+                                     min_ssim=args.min_ssim,
+                                     entries=entries)
+        for output, entry in entries.items():
+            manifest.update(output, entry)
         if result:
             optimized.append(result)
+    manifest.save()
     
     print("\n" + "=" * 50)
     print(f"✨ Successfully optimized {len(optimized)}/{len(hero_images)} images")
@@ -111,6 +179,11 @@ def main():
     for path in optimized:
         print(f"   • {path}")
     
+    if args.profile:
+        profile.print_summary()
+        profile.save(args.profile)
+        print(f"\n⏱️  Profile written to {args.profile}")
+
     print("\n💡 Next step: Update src/app/page.tsx to use .webp extensions")
 
 if __name__ == "__main__":
@@ -4,16 +4,29 @@ Image Optimization Script for JKC E-commerce
 Converts and optimizes images using PIL/Pillow (no sudo required)
 """
 
+import argparse
+import fnmatch
 import os
-from PIL import Image
 from pathlib import Path
-import shutil
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from backup_store import STORE_DIR, BackupStore
+from image_manifest import ImageManifest, check_entry, make_entry, file_sha256, stale_outputs
+from image_pipeline import (HERO_SOURCE_PATTERNS, avif_available, avif_output, output_settings,
+                            process_source, webp_output)
+from image_quality import DEFAULT_MIN_SSIM, numpy_available
+from pipeline_profile import PipelineProfile, profile_row
+
+MB = 1024 * 1024
+MANIFEST_ROOT = 'public'
+VARIANTS_DIR = 'variants'  # written by generate_responsive_images.py
+MAX_POOL_BREAKS = 2  # run_parallel: then a task is retried in a pool of its own
 
 def get_size_mb(filepath):
     """Get file size in MB"""
     size_bytes = os.path.getsize(filepath)
-    return size_bytes / (1024 * 1024)
+    return size_bytes / MB
 
 def optimize_image(input_path, output_path, quality=82):
     """
@@ -24,135 +37,306 @@ def optimize_image(input_path, output_path, quality=82):
         output_path: Path to output WebP file
         quality: WebP quality (1-100, default 82)
     """
+    report = process_source(input_path, [webp_output(output_path, quality)])
+    error = report['outputs'][0]['error']
+    if error:
+        print(f"   ❌ Error: {error}")
+        return False
+    return True
+
+def backup_file(filepath, store_dir, sha256=None):
+    """
+    Store filepath's current bytes in the content-addressed backup store.
+
+    Returns {relative path: blob info} for the run manifest the parent writes;
+    bytes already in the store (from any earlier run) are not copied again.
+    """
+    blob = BackupStore(store_dir).put(filepath, sha256)
+    return {Path(filepath).relative_to(MANIFEST_ROOT).as_posix(): blob}
+
+def searched_quality(spec, out):
+    """The quality an output was encoded at, if the encoder chose it (for the manifest)"""
+    return out['quality'] if spec.get('min_ssim') or spec.get('target_kb') else None
+
+def convert_file(filepath, store_dir, quality=82, entries=None, avif=False, min_ssim=None):
+    """
+    Back up a PNG/JPG and convert it to WebP (and AVIF if requested).
+
+    Runs inside a worker process, so it never touches shared state: the
+    outcome (including the new manifest entries) is returned as a dict and
+    applied by the parent. The source is decoded once for all outputs.
+    With min_ssim, the WebP quality is searched per image instead of fixed.
+    """
+    filepath = Path(filepath)
+    result = {'path': str(filepath), 'status': 'error', 'saved_bytes': 0, 'message': '',
+              'entries': {}, 'backup': {}, 'profile': None}
     try:
-        # Open and convert image
-        img = Image.open(input_path)
-        
-        # Convert RGBA to RGB if necessary
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Save as WebP with optimization
-        img.save(output_path, 'WEBP', quality=quality, method=6)
-        return True
+        original_bytes = filepath.stat().st_size
+        webp_path = str(filepath.with_suffix('.webp'))
+        outputs = [webp_output(webp_path, quality, min_ssim=min_ssim)]
+        if avif:
+            outputs.append(avif_output(str(filepath.with_suffix('.avif'))))
+
+        # Skip outputs the manifest says are already encoded from these bytes with these settings
+        stale, result['entries'] = stale_outputs(filepath, outputs, entries or {})
+        if not stale:
+            result['status'] = 'skipped'
+            result['message'] = f"⏭️  Skipping {filepath.name} (unchanged since last run)"
+            return result
+        source_sha256 = file_sha256(filepath)
+
+        # Backup original
+        result['backup'] = backup_file(filepath, store_dir, source_sha256)
+
+        # Convert: one decode, every stale output
+        report = process_source(filepath, stale)
+        result['profile'] = profile_row(report)
+        lines = [f"🔧 Converted: {filepath}"]
+        errors = []
+        for spec, out in zip(stale, report['outputs']):
+            if not out['ok']:
+                errors.append(f"   ❌ {Path(out['path']).name}: {out['error']}")
+                continue
+            result['entries'][out['path']] = make_entry(
+                MANIFEST_ROOT, filepath, out['path'], output_settings(spec), source_sha256,
+                searched_quality(spec, out))
+            if out['path'] == webp_path:
+                result['saved_bytes'] = original_bytes - out['bytes']
+                chosen = f" at q{out['quality']}" if min_ssim else ""
+                lines.append(
+                    f"   ✅ Saved {(original_bytes - out['bytes']) / MB:.2f}MB "
+                    f"({original_bytes / MB:.2f}MB → {out['bytes'] / MB:.2f}MB){chosen}")
+            else:
+                lines.append(f"   ✅ {Path(out['path']).name}: {out['bytes'] / MB:.2f}MB")
+
+        if errors:
+            result['message'] = "\n".join([f"❌ Error converting {filepath}"] + errors)
+        else:
+            result['status'] = 'converted'
+            result['message'] = "\n".join(lines)
     except Exception as e:
-        print(f"   ❌ Error: {e}")
-        return False
+        result['message'] = f"❌ Error processing {filepath}: {e}"
+    return result
+
+def reoptimize_webp(webp_file, store_dir, quality=82, entries=None, min_ssim=None):
+    """
+    Back up a large WebP and re-encode it, keeping the result only if smaller.
+
+    Runs inside a worker process; see convert_file(). Files that are already
+    our own encode at these settings are left alone, so reruns don't stack
+    generation loss.
+    """
+    webp_file = Path(webp_file)
+    result = {'path': str(webp_file), 'status': 'error', 'saved_bytes': 0, 'message': '',
+              'entries': {}, 'backup': {}, 'profile': None}
+    temp_file = webp_file.with_suffix('.tmp.webp')
+    spec = webp_output(str(temp_file), quality, min_ssim=min_ssim)
+    settings = output_settings(spec)
+    chosen_quality = None
+    try:
+        fresh = check_entry((entries or {}).get(str(webp_file)), webp_file, webp_file, settings)
+        if fresh is not None:
+            result['status'] = 'skipped'
+            result['entries'][str(webp_file)] = fresh
+            result['message'] = f"⏭️  Skipping {webp_file.name} (already optimized)"
+            return result
+        original_bytes = webp_file.stat().st_size
+
+        # Backup original
+        result['backup'] = backup_file(webp_file, store_dir)
+
+        report = process_source(webp_file, [spec])
+        result['profile'] = profile_row(report)
+        out = report['outputs'][0]
+        if out['ok']:
+            new_bytes = out['bytes']
+
+            # Only replace if smaller
+            if new_bytes < original_bytes:
+                temp_file.replace(webp_file)
+                chosen_quality = searched_quality(spec, out)
+                result['status'] = 'optimized'
+                result['saved_bytes'] = original_bytes - new_bytes
+                result['message'] = (
+                    f"🔧 Optimized: {webp_file}\n"
+                    f"   ✅ Saved {(original_bytes - new_bytes) / MB:.2f}MB "
+                    f"({original_bytes / MB:.2f}MB → {new_bytes / MB:.2f}MB)"
+                    + (f" at q{out['quality']}" if min_ssim else "")
+                )
+            else:
+                temp_file.unlink()
+                result['status'] = 'kept'
+                result['message'] = f"ℹ️  {webp_file.name}: new file not smaller, keeping original"
+            result['entries'][str(webp_file)] = make_entry(
+                MANIFEST_ROOT, webp_file, webp_file, settings, quality=chosen_quality)
+        else:
+            result['message'] = f"❌ Error optimizing {webp_file}: {out['error']}"
+    except Exception as e:
+        result['message'] = f"❌ Error processing {webp_file}: {e}"
+    finally:
+        if result['status'] == 'error' and temp_file.exists():
+            temp_file.unlink()
+    return result
+
+def worker_failed(path, error):
+    return {'path': str(path), 'status': 'error', 'saved_bytes': 0, 'entries': {},
+            'backup': {}, 'profile': None, 'message': f"❌ Worker failed on {path}: {error}"}
+
+def run_parallel(worker, tasks, jobs):
+    """
+    Run worker(*task) for each task tuple on a process pool.
+
+    The first element of each task is the file path. Yields one result dict
+    per task as workers finish. A worker that raises is an error for its own
+    file. A worker process that dies (segfault, OOM kill) breaks the whole
+    pool and every unfinished task with it: those are resubmitted to a fresh
+    pool, and a task caught in MAX_POOL_BREAKS broken pools is retried alone,
+    so only the task that actually crashes is reported as an error.
+    """
+    if jobs <= 1:
+        for task in tasks:
+            yield worker(*task)
+        return
+
+    pending = list(enumerate(tasks))
+    breaks = {}  # task number -> broken pools it was unfinished in
+    while pending:
+        shared = [item for item in pending if breaks.get(item[0], 0) < MAX_POOL_BREAKS]
+        alone = [item for item in pending if breaks.get(item[0], 0) >= MAX_POOL_BREAKS]
+        batches = ([(shared, jobs)] if shared else []) + [([item], 1) for item in alone]
+        pending = []
+        for batch, workers in batches:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(worker, *task): (number, task) for number, task in batch}
+                for future in as_completed(futures):
+                    number, task = futures[future]
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool as e:
+                        breaks[number] = breaks.get(number, 0) + 1
+                        if workers == 1:
+                            yield worker_failed(task[0], e)
+                        else:
+                            pending.append((number, task))
+                    except Exception as e:
+                        yield worker_failed(task[0], e)
+
+def is_excluded_dir(rel_dir):
+    """Directories under public/ the optimizer never touches"""
+    name = rel_dir.rsplit('/', 1)[-1]
+    # Legacy images_backup_* copies, generated variants and hidden dirs
+    return 'images_backup' in name or rel_dir == VARIANTS_DIR or name.startswith('.')
+
+def walk_public(root=MANIFEST_ROOT):
+    """Yield every file under root once (os.scandir), skipping excluded directories"""
+    stack = [(root, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if not is_excluded_dir(rel_path):
+                        stack.append((entry.path, rel_path + '/'))
+                elif entry.is_file():
+                    yield entry
+
+def find_images(patterns):
+    """List files under public/ matching any of patterns, in a single walk"""
+    found = [Path(entry.path) for entry in walk_public()
+             if any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in patterns)]
+    return sorted(found)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert and optimize images under public/ to WebP")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument('--avif', action='store_true',
+                        help="also write an .avif next to each converted WebP (if Pillow supports it)")
+    parser.add_argument('--min-ssim', type=float, default=None,
+                        help="pick the lowest WebP quality per image whose SSIM stays at or above this "
+                             f"(e.g. {DEFAULT_MIN_SSIM}) instead of a fixed quality 82")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="write per-file stage timings to PATH (.csv or .json) and print a summary")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     print("🖼️  Starting image optimization...")
     print("=" * 50)
     
-    # Check if PIL is installed
-    try:
-        from PIL import Image
-    except ImportError:
-        print("❌ Pillow not installed. Installing...")
-        os.system("pip install Pillow")
-        from PIL import Image
-    
-    # Create backup directory
-    backup_dir = f"public/images_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    os.makedirs(backup_dir, exist_ok=True)
-    print(f"📁 Backup directory created: {backup_dir}")
+    # Originals go into the deduplicating backup store; this run only records which blobs
+    store = BackupStore(STORE_DIR)
+    run_name = store.new_run_name('optimize')
+    backed_up = {}
+    print(f"📁 Backup run: {run_name} (store: {STORE_DIR})")
+    print(f"⚙️  Workers: {args.jobs}")
+    if args.avif and not avif_available():
+        print("⚠️  AVIF not supported by this Pillow build, writing WebP only")
+        args.avif = False
+    if args.min_ssim and not numpy_available():
+        print("⚠️  numpy not installed, using fixed quality 82 instead of an SSIM search")
+        args.min_ssim = None
+    if args.min_ssim:
+        print(f"🎯 WebP quality: lowest with SSIM ≥ {args.min_ssim:g}")
+    manifest = ImageManifest()
+    profile = PipelineProfile()
     
-    # Statistics
+    # Statistics (bytes are summed as integers so totals are exact)
     stats = {
         'converted': 0,
         'optimized': 0,
         'total_saved_mb': 0,
         'errors': 0
     }
+    saved_bytes = 0
     
     # Process PNG and JPG files
     print("\n🔄 Converting PNG/JPG files to WebP...")
-    for ext in ['*.png', '*.PNG', '*.jpg', '*.JPG', '*.jpeg', '*.JPEG']:
-        for filepath in Path('public').rglob(ext):
-            # Skip backup directories
-            if 'images_backup' in str(filepath):
-                continue
-            try:
-                original_size = get_size_mb(filepath)
-                webp_path = filepath.with_suffix('.webp')
-                
-                # Skip if WebP exists and is newer
-                if webp_path.exists() and webp_path.stat().st_mtime > filepath.stat().st_mtime:
-                    print(f"⏭️  Skipping {filepath.name} (WebP already exists)")
-                    continue
-                
-                # Backup original
-                backup_path = Path(backup_dir) / filepath.relative_to('public')
-                backup_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(filepath, backup_path)
-                
-                # Convert to WebP
-                print(f"🔧 Converting: {filepath}")
-                if optimize_image(str(filepath), str(webp_path), quality=82):
-                    new_size = get_size_mb(webp_path)
-                    saved = original_size - new_size
-                    stats['total_saved_mb'] += saved
-                    stats['converted'] += 1
-                    print(f"   ✅ Saved {saved:.2f}MB ({original_size:.2f}MB → {new_size:.2f}MB)")
-                else:
-                    stats['errors'] += 1
-                    
-            except Exception as e:
-                print(f"❌ Error processing {filepath}: {e}")
-                stats['errors'] += 1
+    sources = find_images(['*.png', '*.PNG', '*.jpg', '*.JPG', '*.jpeg', '*.JPEG'])
+    # Hero sources are cropped by optimize_hero_images.py; don't overwrite its WebPs
+    hero_sources = {p for pattern in HERO_SOURCE_PATTERNS for p in Path('public').glob(pattern)}
+    sources = [p for p in sources if p not in hero_sources]
+    tasks = []
+    for p in sources:
+        outputs = [p.with_suffix('.webp')] + ([p.with_suffix('.avif')] if args.avif else [])
+        entries = {str(out): manifest.get(out) for out in outputs}
+        tasks.append((str(p), STORE_DIR, 82, entries, args.avif, args.min_ssim or None))
+    for result in run_parallel(convert_file, tasks, args.jobs):
+        print(result['message'])
+        backed_up.update(result['backup'])
+        profile.add_row(result['profile'])
+        for out, entry in result['entries'].items():
+            manifest.update(out, entry)
+        if result['status'] == 'converted':
+            stats['converted'] += 1
+            saved_bytes += result['saved_bytes']
+        elif result['status'] == 'error':
+            stats['errors'] += 1
     
-    # Optimize existing large WebP files
+    # Optimize existing large WebP files (only if larger than 0.5MB)
     print("\n🔄 Optimizing existing large WebP files (>500KB)...")
-    for webp_file in Path('public').rglob('*.webp'):
-        # Skip backup directories
-        if 'images_backup' in str(webp_file):
-            continue
-        try:
-            size_mb = get_size_mb(webp_file)
-            
-            # Only optimize if larger than 0.5MB
-            if size_mb < 0.5:
-                continue
-                
-            original_size = get_size_mb(webp_file)
-            
-            # Backup original
-            backup_path = Path(backup_dir) / webp_file.relative_to('public')
-            backup_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(webp_file, backup_path)
-            
-            # Create temporary file
-            temp_file = webp_file.with_suffix('.tmp.webp')
-            
-            print(f"🔧 Optimizing: {webp_file} ({original_size:.2f}MB)")
-            
-            if optimize_image(str(webp_file), str(temp_file), quality=82):
-                new_size = get_size_mb(temp_file)
-                
-                # Only replace if smaller
-                if new_size < original_size:
-                    temp_file.replace(webp_file)
-                    saved = original_size - new_size
-                    stats['total_saved_mb'] += saved
-                    stats['optimized'] += 1
-                    print(f"   ✅ Saved {saved:.2f}MB ({original_size:.2f}MB → {new_size:.2f}MB)")
-                else:
-                    temp_file.unlink()
-                    print(f"   ℹ️  New file not smaller, keeping original")
-            else:
-                if temp_file.exists():
-                    temp_file.unlink()
-                stats['errors'] += 1
-                
-        except Exception as e:
-            print(f"❌ Error processing {webp_file}: {e}")
+    large_webps = [p for p in find_images(['*.webp'])
+                   if not p.name.endswith('.tmp.webp') and get_size_mb(p) >= 0.5]
+    tasks = [(str(p), STORE_DIR, 82, {str(p): manifest.get(p)}, args.min_ssim or None) for p in large_webps]
+    for result in run_parallel(reoptimize_webp, tasks, args.jobs):
+        print(result['message'])
+        backed_up.update(result['backup'])
+        profile.add_row(result['profile'])
+        for out, entry in result['entries'].items():
+            manifest.update(out, entry)
+        if result['status'] == 'optimized':
+            stats['optimized'] += 1
+            saved_bytes += result['saved_bytes']
+        elif result['status'] == 'error':
             stats['errors'] += 1
     
+    stats['total_saved_mb'] = saved_bytes / MB
+    manifest.save()
+    run_path = store.write_run(run_name, MANIFEST_ROOT, backed_up)
+    new_backup_bytes = sum(blob['stored'] for blob in backed_up.values())
+    
     # Summary
     print("\n" + "=" * 50)
     print("✨ Optimization Complete!")
@@ -161,10 +345,17 @@ def main():
     print(f"📊 WebP files optimized: {stats['optimized']}")
     print(f"💾 Total space saved: {stats['total_saved_mb']:.2f}MB")
     print(f"❌ Errors: {stats['errors']}")
-    print(f"📁 Backups stored in: {backup_dir}")
+    if args.profile:
+        profile.print_summary()
+        profile.save(args.profile)
+        print(f"\n⏱️  Profile written to {args.profile}")
+    if run_path:
+        print(f"📁 Backed up {len(backed_up)} file(s) as {run_name} "
+              f"({new_backup_bytes / MB:.2f}MB new in {STORE_DIR})")
     print("\nNext steps:")
     print("1. Test your website to ensure images display correctly")
-    print("2. If everything works, you can delete the backup directory")
+    if run_path:
+        print(f"2. To roll back: python3 backup_store.py restore {run_name}")
     print("3. Consider deleting original PNG/JPG files to save more space")
 
 if __name__ == '__main__':
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Offline order analytics rollups for the admin dashboard
+Reads an orders export (data/orders.json format, JSON array or JSONL),
+streams it into flat NumPy columns and writes data/order-rollups.json:
+
+- summary: the same numbers summarizeOrderMetrics() computes in
+  src/app/lib/order-utils.ts, over every order
+- channels: that summary split into online / offline orders
+- daily: per calendar day (store timezone, default IST), the summary plus
+  its online / offline split
+- products: units and line value per product across revenue-counted orders
+
+The revenue rules are a line-by-line port of order-utils.ts, including its
+JavaScript Number() coercion and fallbacks (see js_number), so a dashboard
+reading the rollups shows exactly what recomputing it from every order
+would. Sums run in the same order as the TypeScript reduce (np.bincount
+accumulates sequentially), and the summary is checked against a plain
+per-order loop before anything is written.
+
+    python3 order_rollups.py                          # data/orders.json
+    python3 order_rollups.py export.jsonl --output /tmp/rollups.json
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from json_stream import iter_records
+
+ORDERS_FILE = 'data/orders.json'
+ROLLUPS_FILE = 'data/order-rollups.json'
+ROLLUPS_VERSION = 1
+STORE_UTC_OFFSET = '+05:30'  # IST business day
+
+# order-utils.ts
+ORDER_STATUSES = ('pending', 'confirmed', 'processing', 'shipped', 'delivered', 'cancelled')
+ONLINE_REVENUE_STATUSES = {'delivered'}
+OPEN_ONLINE_STATUSES = {'pending', 'confirmed', 'processing', 'shipped'}
+CHANNELS = ('online', 'offline')
+METRICS = ('orders', 'recognizedRevenue', 'openSalesValue', 'openSalesCount',
+           'cancelledValue', 'cancelledOrders')
+
+# --- order-utils.ts port ---------------------------------------------------
+
+UNDEFINED = object()  # a missing key: Number(undefined) is NaN, Number(null) is 0
+JS_WHITESPACE = ' \t\n\v\f\r\u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+JS_DECIMAL = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?', re.ASCII)
+JS_RADIX = {'0x': 16, '0o': 8, '0b': 2}
+
+def js_number(value) -> float:
+    """JavaScript Number(value) for JSON values (or UNDEFINED)"""
+    if value is UNDEFINED:
+        return math.nan
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, list):
+        # Number(array) is Number(String(array)): [] -> 0, [null] -> 0, [1, 2] -> NaN
+        return js_number(js_string(value))
+    if isinstance(value, str):
+        text = value.strip(JS_WHITESPACE)
+        if not text:
+            return 0.0
+        if text in ('Infinity', '+Infinity'):
+            return math.inf
+        if text == '-Infinity':
+            return -math.inf
+        radix = JS_RADIX.get(text[:2].lower())
+        if radix:
+            try:
+                return float(int(text[2:], radix)) if text[2:].isascii() and text[2:].isalnum() else math.nan
+            except ValueError:
+                return math.nan
+        if JS_DECIMAL.fullmatch(text):
+            return float(text)
+        return math.nan
+    return math.nan  # objects
+
+def js_string(value) -> str:
+    """JavaScript String(value) for JSON values (enough to compare statuses)"""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return ','.join('' if v is None else js_string(v) for v in value)
+    if isinstance(value, dict):
+        return '[object Object]'
+    number = float(value)
+    return str(int(number)) if number.is_integer() and abs(number) < 1e21 else repr(number)
+
+def to_finite_number(value, fallback=0.0) -> float:
+    parsed = js_number(value)
+    return parsed if math.isfinite(parsed) else fallback
+
+def to_status(value) -> str:
+    normalized = js_string('pending' if value is None else value).lower()
+    return normalized if normalized in ORDER_STATUSES else 'pending'
+
+def is_offline_order(order) -> bool:
+    return order.get('type') == 'offline'
+
+def is_cancelled_order(order) -> bool:
+    return to_status(order.get('status')) == 'cancelled'
+
+def order_items(order) -> List[Dict]:
+    """order.items ?? [], raising where the TypeScript reduce would throw"""
+    items = order.get('items')
+    if items is None:
+        return []
+    if not isinstance(items, list) or any(item is None for item in items):
+        raise ValueError("items is not a list of objects")
+    # Property access on a number or string item just yields undefined
+    return [item if isinstance(item, dict) else {} for item in items]
+
+def is_valid_order(order) -> bool:
+    """False for records getOrderTotal() would throw on (items are only read without stored totals)"""
+    if not isinstance(order, dict):
+        return False
+    try:
+        get_order_total(order)
+    except ValueError:
+        return False
+    return True
+
+def get_order_subtotal(order) -> float:
+    stored = to_finite_number(order.get('subtotal', UNDEFINED), math.nan)
+    if math.isfinite(stored):
+        return stored
+    subtotal = 0.0
+    for item in order_items(order):
+        subtotal += to_finite_number(item.get('price', UNDEFINED)) * to_finite_number(item.get('quantity', UNDEFINED), 1.0)
+    return subtotal
+
+def get_order_total(order) -> float:
+    stored = to_finite_number(order.get('total', UNDEFINED), math.nan)
+    if math.isfinite(stored):
+        return max(0.0, stored)
+    return max(0.0, get_order_subtotal(order) + to_finite_number(order.get('shipping', UNDEFINED))
+               - to_finite_number(order.get('discount', UNDEFINED)))
+
+def counts_toward_revenue(order) -> bool:
+    if is_cancelled_order(order):
+        return False
+    if is_offline_order(order):
+        return True
+    return to_status(order.get('status')) in ONLINE_REVENUE_STATUSES
+
+def counts_toward_open_sales(order) -> bool:
+    if is_cancelled_order(order) or is_offline_order(order):
+        return False
+    return to_status(order.get('status')) in OPEN_ONLINE_STATUSES
+
+def summarize_order_metrics(orders) -> Dict:
+    """summarizeOrderMetrics(), order by order (used to check the columnar rollup)"""
+    summary = dict.fromkeys(METRICS[1:], 0.0)
+    summary['openSalesCount'] = summary['cancelledOrders'] = 0
+    for order in orders:
+        order_total = get_order_total(order)
+        if is_cancelled_order(order):
+            summary['cancelledOrders'] += 1
+            summary['cancelledValue'] += order_total
+            continue
+        if counts_toward_revenue(order):
+            summary['recognizedRevenue'] += order_total
+        if counts_toward_open_sales(order):
+            summary['openSalesCount'] += 1
+            summary['openSalesValue'] += order_total
+    return summary
+
+# --- Columnar rollups ------------------------------------------------------
+
+def parse_offset(text) -> timezone:
+    sign = -1 if text.startswith('-') else 1
+    hours, minutes = text.lstrip('+-').split(':')
+    return timezone(sign * timedelta(hours=int(hours), minutes=int(minutes)))
+
+def day_key(created_at, tz) -> str:
+    """Calendar day of an ISO timestamp in the store's timezone ('unknown' if unparseable)"""
+    if isinstance(created_at, dict):
+        created_at = created_at.get('$date')  # mongoexport extended JSON
+    if not isinstance(created_at, str):
+        return 'unknown'
+    try:
+        moment = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+    except ValueError:
+        return 'unknown'
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(tz).date().isoformat()
+
+def product_key(item) -> str:
+    # Offline (POS) items carry a name but no productId
+    return str(item.get('productId') or item.get('name') or 'unknown')
+
+class OrderColumns:
+    """Per-order and per-line columns, filled from a stream of orders"""
+
+    def __init__(self, tz):
+        self.tz = tz
+        self.days: Dict[str, int] = {}
+        self.products: Dict[str, int] = {}
+        self.product_names: List[str] = []
+        self.total, self.day, self.channel = [], [], []
+        self.cancelled, self.revenue, self.open = [], [], []
+        self.line_order, self.line_product, self.line_units, self.line_value = [], [], [], []
+        self.skipped = 0
+
+    def index(self, table, key):
+        if key not in table:
+            table[key] = len(table)
+        return table[key]
+
+    def add(self, order):
+        if not is_valid_order(order):
+            self.skipped += 1
+            return
+        row = len(self.total)
+        self.total.append(get_order_total(order))
+        self.day.append(self.index(self.days, day_key(order.get('createdAt'), self.tz)))
+        self.channel.append(1 if is_offline_order(order) else 0)
+        self.cancelled.append(is_cancelled_order(order))
+        self.revenue.append(counts_toward_revenue(order))
+        self.open.append(counts_toward_open_sales(order))
+        try:
+            items = order_items(order)
+        except ValueError:
+            items = []  # the stored total still counts; the lines can't be attributed
+        for item in items:
+            key = product_key(item)
+            product = self.index(self.products, key)
+            if product == len(self.product_names):
+                self.product_names.append(str(item.get('name') or key))
+            quantity = to_finite_number(item.get('quantity', UNDEFINED), 1.0)
+            self.line_order.append(row)
+            self.line_product.append(product)
+            self.line_units.append(quantity)
+            self.line_value.append(to_finite_number(item.get('price', UNDEFINED)) * quantity)
+
+def bucket_metrics(groups, n_groups, total, cancelled, revenue, open_sales) -> Dict[str, np.ndarray]:
+    """summarizeOrderMetrics() per group; np.bincount adds in input order, like reduce()"""
+    kept = ~cancelled  # cancelled orders only count as cancelled
+    return {
+        'orders': np.bincount(groups, minlength=n_groups),
+        'recognizedRevenue': np.bincount(groups, weights=np.where(kept & revenue, total, 0.0), minlength=n_groups),
+        'openSalesValue': np.bincount(groups, weights=np.where(kept & open_sales, total, 0.0), minlength=n_groups),
+        'openSalesCount': np.bincount(groups, weights=kept & open_sales, minlength=n_groups).astype(int),
+        'cancelledValue': np.bincount(groups, weights=np.where(cancelled, total, 0.0), minlength=n_groups),
+        'cancelledOrders': np.bincount(groups, weights=cancelled, minlength=n_groups).astype(int),
+    }
+
+def metrics_at(metrics, i) -> Dict:
+    return {name: metrics[name][i].item() for name in METRICS}
+
+def build_rollups(columns: OrderColumns) -> Dict:
+    total = np.array(columns.total, dtype=np.float64)
+    day = np.array(columns.day, dtype=np.int64)
+    channel = np.array(columns.channel, dtype=np.int64)
+    cancelled = np.array(columns.cancelled, dtype=bool)
+    revenue = np.array(columns.revenue, dtype=bool)
+    open_sales = np.array(columns.open, dtype=bool)
+    flags = (total, cancelled, revenue, open_sales)
+
+    overall = bucket_metrics(np.zeros(len(total), dtype=np.int64), 1, *flags)
+    by_channel = bucket_metrics(channel, len(CHANNELS), *flags)
+    n_days = len(columns.days)
+    by_day = bucket_metrics(day, n_days, *flags)
+    by_day_channel = bucket_metrics(day * len(CHANNELS) + channel, n_days * len(CHANNELS), *flags)
+
+    daily = {}
+    for key, i in sorted(columns.days.items()):
+        daily[key] = metrics_at(by_day, i)
+        daily[key]['channels'] = {name: metrics_at(by_day_channel, i * len(CHANNELS) + c)
+                                  for c, name in enumerate(CHANNELS)}
+
+    # Product lines, restricted to orders whose total is recognized as revenue
+    line_order = np.array(columns.line_order, dtype=np.int64)
+    line_product = np.array(columns.line_product, dtype=np.int64)
+    counted = (revenue & ~cancelled)[line_order]
+    counted_products = line_product[counted]
+    n_products = len(columns.products)
+    units = np.bincount(counted_products, minlength=n_products,
+                        weights=np.array(columns.line_units, dtype=np.float64)[counted])
+    value = np.bincount(counted_products, minlength=n_products,
+                        weights=np.array(columns.line_value, dtype=np.float64)[counted])
+    # Distinct revenue-counted orders per product (an order may list a product twice)
+    stride = max(n_products, 1)
+    pairs = np.unique(line_order[counted] * stride + counted_products)
+    order_counts = np.bincount(pairs % stride, minlength=n_products)
+    products = [
+        {'key': key, 'name': columns.product_names[i], 'units': units[i].item(),
+         'value': value[i].item(), 'orders': order_counts[i].item()}
+        for key, i in columns.products.items() if order_counts[i]
+    ]
+    products.sort(key=lambda p: (-p['value'], p['key']))
+
+    return {
+        'summary': metrics_at(overall, 0),
+        'channels': {name: metrics_at(by_channel, c) for c, name in enumerate(CHANNELS)},
+        'daily': daily,
+        'products': products,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute order rollups for the admin dashboard")
+    parser.add_argument('orders', nargs='?', default=ORDERS_FILE,
+                        help=f"orders export, JSON array or JSONL (default: {ORDERS_FILE})")
+    parser.add_argument('--output', default=ROLLUPS_FILE, help=f"rollups JSON to write (default: {ROLLUPS_FILE})")
+    parser.add_argument('--utc-offset', default=STORE_UTC_OFFSET,
+                        help=f"timezone for daily buckets, as +HH:MM (default: {STORE_UTC_OFFSET})")
+    args = parser.parse_args()
+
+    print("📊 Order Rollups")
+    print("=" * 50)
+    columns = OrderColumns(parse_offset(args.utc_offset))
+    for order in iter_records(args.orders):
+        columns.add(order)
+    rollups = build_rollups(columns)
+
+    # The columnar summary must equal order-utils' reduce, to the last bit
+    expected = summarize_order_metrics(o for o in iter_records(args.orders) if is_valid_order(o))
+    actual = {k: v for k, v in rollups['summary'].items() if k != 'orders'}
+    if actual != expected:
+        raise SystemExit(f"❌ Rollup summary differs from summarizeOrderMetrics: {actual} vs {expected}")
+
+    document = {
+        'version': ROLLUPS_VERSION,
+        'generatedAt': datetime.now(timezone.utc).isoformat(timespec='seconds').replace('+00:00', 'Z'),
+        'source': os.path.basename(args.orders),
+        'utcOffset': args.utc_offset,
+        'skippedOrders': columns.skipped,
+        **rollups,
+    }
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    os.replace(tmp_path, args.output)
+
+    summary = rollups['summary']
+    print(f"📦 {summary['orders']:,} orders over {len(rollups['daily'])} day(s), "
+          f"{len(rollups['products'])} product(s) sold")
+    if columns.skipped:
+        print(f"⚠️  Skipped {columns.skipped} malformed order(s)")
+    print(f"💰 Recognized revenue: ₹{summary['recognizedRevenue']:,.2f}")
+    print(f"⏳ Open sales: {summary['openSalesCount']} (₹{summary['openSalesValue']:,.2f})")
+    print(f"❌ Cancelled: {summary['cancelledOrders']} (₹{summary['cancelledValue']:,.2f})")
+    for name in CHANNELS:
+        print(f"   {name:<8} {rollups['channels'][name]['orders']:>6} orders  "
+              f"₹{rollups['channels'][name]['recognizedRevenue']:,.2f}")
+    print(f"💾 Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Image pipeline profiles
+Collects the per-file stage timings that image_pipeline.process_source()
+reports, writes them as JSON or CSV (chosen by the file extension) and prints
+the slowest files and where the time went overall.
+
+Used by optimize_images.py and optimize_hero_images.py via --profile:
+
+    python3 optimize_images.py --profile image-profile.csv
+
+Peak RSS is the high-water mark of the process that handled the file, so
+with several workers it reflects the largest image each worker has seen so far.
+"""
+
+import csv
+import json
+import os
+from typing import Dict, List
+
+from image_pipeline import STAGES
+
+FIELDS = ('source', 'megapixels', *STAGES, 'total', 'peak_rss_mb', 'outputs', 'ok')
+
+def profile_row(report) -> Dict:
+    """Flatten one process_source() report into a profile row (times in ms)"""
+    timings = report.get('timings') or {}
+    row = {
+        'source': report['source'],
+        'megapixels': round(report['megapixels'], 3) if report.get('megapixels') else None,
+    }
+    for stage in STAGES:
+        row[stage] = round(timings.get(stage, 0.0) * 1000, 2)
+    row['total'] = round(sum(row[stage] for stage in STAGES), 2)
+    row['peak_rss_mb'] = round(report['peak_rss_mb'], 1) if report.get('peak_rss_mb') else None
+    row['outputs'] = len(report['outputs'])
+    row['ok'] = all(out['ok'] for out in report['outputs'])
+    return row
+
+class PipelineProfile:
+    """Profile rows for one run"""
+
+    def __init__(self):
+        self.rows: List[Dict] = []
+
+    def add(self, report):
+        self.rows.append(profile_row(report))
+
+    def add_row(self, row):
+        if row:
+            self.rows.append(row)
+
+    def save(self, path):
+        """Write rows to path: .csv as a table, anything else as JSON"""
+        rows = sorted(self.rows, key=lambda row: row['total'], reverse=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            if str(path).endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump({'stages': list(STAGES), 'units': 'ms', 'files': rows}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def stage_totals(self) -> Dict[str, float]:
+        return {stage: sum(row[stage] for row in self.rows) for stage in STAGES}
+
+    def print_summary(self, top=10):
+        if not self.rows:
+            return
+        total_ms = sum(row['total'] for row in self.rows)
+        total_mp = sum(row['megapixels'] or 0 for row in self.rows)
+
+        print(f"\n⏱️  SLOWEST FILES (top {min(top, len(self.rows))} of {len(self.rows)}, ms)")
+        print("-" * 100)
+        print(f"{'file':<40} {'MP':>6} " + " ".join(f"{stage:>8}" for stage in STAGES) + f" {'total':>9} {'RSS MB':>7}")
+        for row in sorted(self.rows, key=lambda row: row['total'], reverse=True)[:top]:
+            name = os.path.basename(row['source'])[:40]
+            megapixels = f"{row['megapixels']:.1f}" if row['megapixels'] else '-'
+            rss = f"{row['peak_rss_mb']:.0f}" if row['peak_rss_mb'] else '-'
+            print(f"{name:<40} {megapixels:>6} " + " ".join(f"{row[stage]:>8.0f}" for stage in STAGES)
+                  + f" {row['total']:>9.0f} {rss:>7}")
+
+        print(f"\n⏱️  TIME BY STAGE ({total_ms / 1000:.2f}s over {total_mp:.1f} MP)")
+        print("-" * 100)
+        for stage, stage_ms in sorted(self.stage_totals().items(), key=lambda item: item[1], reverse=True):
+            share = stage_ms / total_ms * 100 if total_ms else 0
+            per_mp = f"{stage_ms / total_mp:.1f} ms/MP" if total_mp else ''
+            print(f"  {stage:<8} {stage_ms / 1000:>8.2f}s  {share:>5.1f}%  {per_mp}")
+        peaks = [row['peak_rss_mb'] for row in self.rows if row['peak_rss_mb']]
+        if peaks:
+            print(f"  peak RSS {max(peaks):.0f}MB")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compiled product catalog cache
+Parses src/app/lib/products.ts once and stores the result in
+.cache/products.json, keyed by the source file's SHA-256. Later runs of the
+catalog tools (audit, spell check, enhancement scripts) load the cache in
+milliseconds and only reparse when products.ts actually changed.
+
+Each product record is what products_parser.parse_products() returns, plus
+line numbers: 'line' for the object, 'field_lines' per property and a line
+instead of an offset in each 'strings' entry.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from products_parser import parse_products
+
+PRODUCTS_FILE = 'src/app/lib/products.ts'
+CACHE_FILE = '.cache/products.json'
+CACHE_VERSION = 1
+
+def _line_index(source: str) -> List[int]:
+    """Offsets of every newline, for offset -> line lookups"""
+    index, pos = [], source.find('\n')
+    while pos != -1:
+        index.append(pos)
+        pos = source.find('\n', pos + 1)
+    return index
+
+def compile_catalog(source: str) -> List[Dict]:
+    """Parse products.ts source and annotate records with line numbers"""
+    newlines = _line_index(source)
+    line_of = lambda offset: bisect.bisect_left(newlines, offset) + 1
+
+    products = parse_products(source)
+    for record in products:
+        record['line'] = line_of(record['span'][0])
+        record['field_lines'] = {key: line_of(span[0]) for key, span in record['field_spans'].items()}
+        record['strings'] = [[path, line_of(offset), value] for path, offset, value in record['strings']]
+    return products
+
+def load_catalog(file_path: str = PRODUCTS_FILE, cache_file: Optional[str] = CACHE_FILE,
+                 source: Optional[str] = None) -> List[Dict]:
+    """
+    Return the parsed product records for file_path.
+
+    Served from cache_file when its hash matches the current source;
+    otherwise reparsed and the cache rewritten. Pass cache_file=None to
+    bypass the cache, or source= if the caller already read the file.
+    """
+    if source is None:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            source = f.read()
+    sha256 = hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    if cache_file and os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get('version') == CACHE_VERSION and cached.get('sha256') == sha256
+                    and cached.get('source') == os.path.normpath(file_path)):
+                return cached['products']
+        except (OSError, ValueError, KeyError):
+            pass  # unreadable cache: fall through and rebuild it
+
+    products = compile_catalog(source)
+
+    if cache_file:
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{cache_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': CACHE_VERSION,
+                'source': os.path.normpath(file_path),
+                'sha256': sha256,
+                'products': products,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_file)
+
+    return products
+
+def products_by_id(products: List[Dict]) -> Dict[str, Dict]:
+    return {record['id']: record for record in products if record.get('id')}
+
+if __name__ == '__main__':
+    # Warm the cache and print a one-line summary
+    catalog = load_catalog()
+    print(f"📦 {len(catalog)} products cached in {CACHE_FILE}")
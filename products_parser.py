@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Single-pass parser for the product catalog literal in products.ts
+Tokenizes the `rawProducts: Product[] = [...]` array once, left to right,
+and builds plain Python values from it (objects -> dict, arrays -> list,
+strings/numbers/booleans as-is). Runs in time linear in the file size and
+understands strings and comments, so braces inside descriptions are safe.
+
+Each product comes back with source offsets so tools can patch the file
+without re-scanning it:
+
+    {
+        'id': 'dried-kiwi',
+        'data': {'id': 'dried-kiwi', 'name': 'Dried Kiwi', ...},
+        'span': [start, end],            # the object's { ... } in the source
+        'field_spans': {'name': [start, end], ...},   # each value's span
+        'strings': [['benefits.0.title', offset, 'Brain Boost'], ...],
+    }
+
+'strings' lists every string value in the product (not keys) with its
+dotted path and source offset, for tools that report line numbers.
+"""
+
+import re
+from typing import Dict, List
+
+DEFAULT_ARRAY = 'rawProducts'
+
+class ParseError(ValueError):
+    """Raised when the catalog literal isn't plain data"""
+
+    def __init__(self, message, source, pos):
+        line = source.count('\n', 0, pos) + 1
+        col = pos - (source.rfind('\n', 0, pos) + 1) + 1
+        super().__init__(f"{message} at line {line}, column {col}")
+        self.pos = pos
+
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.|\\\n)*"|'(?:[^'\\\n]|\\.|\\\n)*'|`(?:[^`\\$]|\\.|\$(?!\{))*`)
+  | (?P<number>-?(?:0[xX][0-9a-fA-F]+|(?:\d[\d_]*)?\.?\d[\d_]*(?:[eE][+-]?\d+)?))
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\],:])
+''', re.VERBOSE | re.DOTALL)
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+ESCAPE_RE = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\n|.)', re.DOTALL)
+KEYWORDS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+def _unescape(match):
+    esc = match.group(1)
+    if esc[0] == 'u':
+        return chr(int(esc[2:-1] if esc[1] == '{' else esc[1:], 16))
+    if esc[0] == 'x':
+        return chr(int(esc[1:], 16))
+    if esc == '\n':
+        return ''  # line continuation
+    return ESCAPES.get(esc, esc)
+
+def decode_string(literal: str) -> str:
+    body = literal[1:-1]
+    if '\\' not in body:
+        return body
+    return ESCAPE_RE.sub(_unescape, body)
+
+def decode_number(literal: str):
+    literal = literal.replace('_', '')
+    if literal.lower().startswith(('0x', '-0x')):
+        return int(literal, 16)
+    value = float(literal)
+    return int(value) if value.is_integer() and not re.search(r'[.eE]', literal) else value
+
+def tokenize(source: str, pos: int = 0):
+    """Yield (kind, text, start, end) tokens, skipping whitespace and comments"""
+    end = len(source)
+    while pos < end:
+        match = TOKEN_RE.match(source, pos)
+        if not match:
+            raise ParseError(f"Unexpected character {source[pos]!r}", source, pos)
+        kind = match.lastgroup
+        if kind not in ('ws', 'comment'):
+            yield kind, match.group(), pos, match.end()
+        pos = match.end()
+
+class _Parser:
+    """Recursive-descent parser over the token stream of one literal"""
+
+    def __init__(self, source: str, pos: int):
+        self.source = source
+        self.tokens = tokenize(source, pos)
+        self.tok = None
+        self.last_end = pos  # end offset of the most recently consumed token
+        self.path = []       # key/index path of the value being parsed
+        self.strings = []    # [dotted path, offset, value] for string values
+        self.advance()
+
+    def advance(self):
+        if self.tok is not None:
+            self.last_end = self.tok[3]
+        self.tok = next(self.tokens, ('eof', '', len(self.source), len(self.source)))
+
+    def expect(self, text):
+        if self.tok[1] != text:
+            raise ParseError(f"Expected {text!r}, found {self.tok[1]!r}", self.source, self.tok[2])
+        self.advance()
+
+    def value(self):
+        kind, text, start, end = self.tok
+        if text == '{':
+            return self.object()[0]
+        if text == '[':
+            return self.array()
+        self.advance()
+        if kind == 'string':
+            value = decode_string(text)
+            self.strings.append(['.'.join(map(str, self.path)), start, value])
+            return value
+        if kind == 'number':
+            return decode_number(text)
+        if kind == 'ident' and text in KEYWORDS:
+            return KEYWORDS[text]
+        raise ParseError(f"Unsupported value {text!r}", self.source, start)
+
+    def object(self):
+        """Parse { key: value, ... }; returns (dict, value spans)"""
+        self.expect('{')
+        result, spans = {}, {}
+        while self.tok[1] != '}':
+            kind, text, start, _ = self.tok
+            if kind == 'ident':
+                key = text
+            elif kind == 'string':
+                key = decode_string(text)
+            else:
+                raise ParseError(f"Expected property name, found {text!r}", self.source, start)
+            self.advance()
+            self.expect(':')
+            value_start = self.tok[2]
+            self.path.append(key)
+            result[key] = self.value()
+            self.path.pop()
+            spans[key] = [value_start, self.last_end]
+            if self.tok[1] == ',':
+                self.advance()
+            elif self.tok[1] != '}':
+                raise ParseError(f"Expected ',' or '}}', found {self.tok[1]!r}", self.source, self.tok[2])
+        self.advance()
+        return result, spans
+
+    def array(self):
+        self.expect('[')
+        result = []
+        while self.tok[1] != ']':
+            self.path.append(len(result))
+            result.append(self.value())
+            self.path.pop()
+            if self.tok[1] == ',':
+                self.advance()
+            elif self.tok[1] != ']':
+                raise ParseError(f"Expected ',' or ']', found {self.tok[1]!r}", self.source, self.tok[2])
+        self.advance()
+        return result
+
+def find_array_start(source: str, name: str = DEFAULT_ARRAY) -> int:
+    """Offset of the '[' that opens `name: Type[] = [` (or -1)"""
+    match = re.search(rf'\b{re.escape(name)}\s*(?::\s*[\w.]+\s*\[\s*\])?\s*=\s*\[', source)
+    return match.end() - 1 if match else -1
+
+def parse_products(source: str, name: str = DEFAULT_ARRAY) -> List[Dict]:
+    """Parse the product array literal into product records with spans"""
+    start = find_array_start(source, name)
+    if start < 0:
+        return []
+
+    parser = _Parser(source, start)
+    parser.expect('[')
+    products = []
+    while parser.tok[1] != ']':
+        if parser.tok[1] != '{':
+            raise ParseError("Expected product object", source, parser.tok[2])
+        obj_start = parser.tok[2]
+        parser.strings = []
+        data, spans = parser.object()
+        products.append({
+            'id': data.get('id'),
+            'data': data,
+            'span': [obj_start, parser.last_end],
+            'field_spans': spans,
+            'strings': parser.strings,
+        })
+        if parser.tok[1] == ',':
+            parser.advance()
+        elif parser.tok[1] != ']':
+            raise ParseError(f"Expected ',' or ']', found {parser.tok[1]!r}", source, parser.tok[2])
+    return products
+
+def parse_products_file(file_path: str, name: str = DEFAULT_ARRAY) -> List[Dict]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_products(f.read(), name)
+
+def parse_object_body(text: str) -> Dict:
+    """Parse a bare `key: value, ...` property list (no braces) into a dict"""
+    source = '{' + text + '}'
+    parser = _Parser(source, 0)
+    data, _ = parser.object()
+    if parser.tok[0] != 'eof':
+        raise ParseError(f"Unexpected {parser.tok[1]!r} after object", source, parser.tok[2])
+    return data
@@ -4,9 +4,10 @@ Spell checker for products.ts
 Checks for common spelling errors and typos
 """
 
-import re
-import json
-from pathlib import Path
+import sys
+from collections import deque
+
+from product_catalog import PRODUCTS_FILE, load_catalog
 
 # Common words that might be misspelled
 CORRECTIONS = {
@@ -57,43 +58,89 @@ CORRECTIONS = {
     'colection': 'collection',
 }
 
-def check_spelling(file_path: str):
-    """Check for spelling errors in the file"""
+class MisspellingMatcher:
+    """
+    Aho-Corasick automaton over the CORRECTIONS keys.
+
+    Finds every dictionary word in a text in one left-to-right pass,
+    independent of dictionary size, and only reports whole-word hits (so
+    'crystall' doesn't fire inside 'crystallize'). Matching is
+    case-insensitive; reported offsets refer to the original text.
+    """
+
+    def __init__(self, words):
+        self.goto = [{}]     # state -> {char: next state}
+        self.fail = [0]      # state -> longest proper suffix state
+        self.output = [[]]   # state -> words ending here
+        for word in words:
+            state = 0
+            for ch in word.lower():
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append(word)
+
+        # Breadth-first to fill failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def finditer(self, text):
+        """Yield (start, end, word) for each whole-word match in text"""
+        state = 0
+        for i, ch in enumerate(text):
+            ch = ch.lower()
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for word in self.output[state]:
+                start, end = i + 1 - len(word), i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and \
+                        (end == len(text) or not text[end].isalnum()):
+                    yield start, end, word
+
+# Identity entries (e.g. 'crystallizes') are correct spellings, not typos
+MATCHER = MisspellingMatcher(wrong for wrong, correct in CORRECTIONS.items() if wrong != correct)
+
+def check_spelling(file_path: str = PRODUCTS_FILE):
+    """Check for spelling errors in the catalog's text fields"""
     print("=" * 80)
     print("SPELL CHECK REPORT")
     print("=" * 80)
     print(f"\nChecking: {file_path}\n")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-        lines = content.split('\n')
+    # Only string values are checked, so code structure never needs skipping
+    products = load_catalog(file_path)
     
     errors_found = []
     
-    for line_num, line in enumerate(lines, 1):
-        # Skip code structure lines
-        if any(x in line for x in ['import ', 'export ', 'const ', 'type ', '};', '};,']):
-            continue
-            
-        # Check for common misspellings
-        line_lower = line.lower()
-        for wrong, correct in CORRECTIONS.items():
-            if wrong in line_lower:
-                # Find the actual case in the line
-                pattern = re.compile(re.escape(wrong), re.IGNORECASE)
-                match = pattern.search(line)
-                if match:
-                    errors_found.append({
-                        'line': line_num,
-                        'error': match.group(),
-                        'correction': correct,
-                        'context': line.strip()[:100]
-                    })
+    for product in products:
+        for field, line_num, text in product['strings']:
+            # Check for common misspellings (single pass per string)
+            for start, end, wrong in MATCHER.finditer(text):
+                errors_found.append({
+                    'line': line_num,
+                    'product': product['id'],
+                    'field': field,
+                    'error': text[start:end],
+                    'correction': CORRECTIONS[wrong],
+                    'context': text[max(0, start - 40):end + 40].strip()
+                })
     
     if errors_found:
         print(f"❌ FOUND {len(errors_found)} POTENTIAL SPELLING ERRORS:\n")
         for i, error in enumerate(errors_found, 1):
-            print(f"{i}. Line {error['line']}:")
+            print(f"{i}. Line {error['line']} ({error['product']} → {error['field']}):")
             print(f"   Error: '{error['error']}' → Should be: '{error['correction']}'")
             print(f"   Context: {error['context']}")
             print()
@@ -105,26 +152,32 @@ def check_spelling(file_path: str):
     print("ADDITIONAL CHECKS")
     print("=" * 80)
     
+    descriptions = [
+        (line_num, product['id'], field, text)
+        for product in products
+        for field, line_num, text in product['strings']
+        if field.lower().endswith('description')
+    ]
+    
     # Check for double spaces
-    double_spaces = [(i+1, line) for i, line in enumerate(lines) if '  ' in line and 'description' in line.lower()]
+    double_spaces = [d for d in descriptions if '  ' in d[3]]
     if double_spaces:
-        print(f"\n⚠️  Found {len(double_spaces)} lines with double spaces in descriptions:")
-        for line_num, line in double_spaces[:5]:
-            print(f"   Line {line_num}: {line.strip()[:80]}...")
+        print(f"\n⚠️  Found {len(double_spaces)} descriptions with double spaces:")
+        for line_num, product_id, field, text in double_spaces[:5]:
+            print(f"   Line {line_num} ({product_id} → {field}): {text.strip()[:80]}...")
     else:
         print("\n✅ No double spaces in descriptions")
     
-    # Check for missing periods at end of sentences in descriptions
-    missing_periods = []
-    for i, line in enumerate(lines, 1):
-        if 'description:' in line.lower() and not line.strip().endswith(('.",', '",', '.",}', '",}')):
-            if 'description:' in line and '"' in line:
-                missing_periods.append((i, line.strip()[:80]))
+    # Check for missing periods at end of top-level descriptions
+    missing_periods = [
+        d for d in descriptions
+        if '.' not in d[2] and not d[3].rstrip().endswith(('.', '!', '?'))
+    ]
     
     if missing_periods:
         print(f"\n⚠️  Found {len(missing_periods)} descriptions possibly missing periods:")
-        for line_num, line in missing_periods[:5]:
-            print(f"   Line {line_num}: ...{line[-50:]}")
+        for line_num, product_id, field, text in missing_periods[:5]:
+            print(f"   Line {line_num} ({product_id} → {field}): ...{text.rstrip()[-50:]}")
     
     print("\n" + "=" * 80)
     print("SPELL CHECK COMPLETE")
@@ -133,5 +186,4 @@ def check_spelling(file_path: str):
     return errors_found
 
 if __name__ == '__main__':
-    products_file = '/home/leo/Desktop/JKC cursor/src/app/lib/products.ts'
-    check_spelling(products_file)
+    check_spelling(sys.argv[1] if len(sys.argv) > 1 else PRODUCTS_FILE)
@@ -9,6 +9,7 @@ import {
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import Link from "next/link";
+import { lookupPincode } from "@/app/lib/pincode";
 
 export const dynamic = "force-dynamic";
 
@@ -135,20 +136,14 @@ export default function AccountPage() {
     if (pincode.length === 6 && /^\d{6}$/.test(pincode)) {
       setPincodeLoading(true);
       try {
-        const res = await fetch(`https://api.postalpincode.in/pincode/${pincode}`);
-        const json = await res.json();
-        if (json?.[0]?.Status === "Success") {
-          const po = json[0].PostOffice?.[0];
-          if (po) {
-            setFormData((f) => ({
-              ...f,
-              city: po.District || f.city,
-              state: po.State || f.state,
-            }));
-          }
+        const result = await lookupPincode(pincode);
+        if (result.found) {
+          setFormData((f) => ({
+            ...f,
+            city: result.district || f.city,
+            state: result.state || f.state,
+          }));
         }
-      } catch {
-        // silent
       } finally {
         setPincodeLoading(false);
       }
@@ -0,0 +1,29 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { findPincode } from '@/app/lib/pincode-index';
+
+// Offline pincode lookup (see build_pincode_index.py)
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ pincode: string }> }
+) {
+  const { pincode } = await params;
+
+  if (!/^\d{6}$/.test(pincode)) {
+    return NextResponse.json(
+      { error: 'Invalid pincode' },
+      { status: 400 }
+    );
+  }
+
+  const result = findPincode(pincode);
+  if (!result) {
+    return NextResponse.json(
+      { state: '', district: '', city: '', found: false },
+      { status: 404 }
+    );
+  }
+
+  return NextResponse.json(result, {
+    headers: { 'Cache-Control': 'public, max-age=86400' },
+  });
+}
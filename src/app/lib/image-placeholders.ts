@@ -0,0 +1,37 @@
+import type { CSSProperties } from "react";
+import placeholders from "./image-placeholders.json";
+
+// Generated by generate_placeholders.py: a ~20px WebP per image URL, inlined as base64
+export type ImagePlaceholder = {
+  width: number;
+  height: number;
+  blurDataURL: string;
+};
+
+const PLACEHOLDERS: Record<string, ImagePlaceholder> = placeholders;
+
+export function getImagePlaceholder(url?: string): ImagePlaceholder | undefined {
+  return url ? PLACEHOLDERS[url] : undefined;
+}
+
+// Paints the placeholder behind an <img> exactly where object-contain will draw it
+export function placeholderStyle(url?: string): CSSProperties | undefined {
+  const placeholder = getImagePlaceholder(url);
+  if (!placeholder) return undefined;
+  return {
+    backgroundImage: `url("${placeholder.blurDataURL}")`,
+    backgroundSize: "contain",
+    backgroundPosition: "center",
+    backgroundRepeat: "no-repeat",
+    backgroundOrigin: "content-box",
+  };
+}
+
+// Use as both ref and onLoad: drops the placeholder once the real image has
+// decoded, so it never shows through transparent PNGs. The ref catches images
+// that finished loading before hydration, when onLoad has already fired.
+export function clearPlaceholder(img: HTMLImageElement | null) {
+  if (img && img.complete && img.naturalWidth > 0) {
+    img.style.backgroundImage = "none";
+  }
+}
@@ -0,0 +1,41 @@
+import type { PincodeResult } from "./pincode";
+import index from "./pincode-index.json";
+
+// Generated by build_pincode_index.py: `count` fixed-width records sorted by
+// pincode (uint32 pincode, uint16 state, uint16 district, uint16 city, all
+// little-endian; the uint16s index into `names`). Server-only: decoded once
+// per instance, then every lookup is a binary search with no network.
+let records: DataView | null = null;
+
+function loadRecords(): DataView {
+    if (!records) {
+        const bytes = Buffer.from(index.records, "base64");
+        records = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    }
+    return records;
+}
+
+export function findPincode(pincode: string): PincodeResult | null {
+    if (!/^\d{6}$/.test(pincode) || index.count === 0) return null;
+    const target = Number(pincode);
+    const view = loadRecords();
+    const size = index.recordSize;
+    let lo = 0;
+    let hi = index.count - 1;
+    while (lo <= hi) {
+        const mid = (lo + hi) >>> 1;
+        const offset = mid * size;
+        const value = view.getUint32(offset, true);
+        if (value < target) lo = mid + 1;
+        else if (value > target) hi = mid - 1;
+        else {
+            return {
+                state: index.names[view.getUint16(offset + 4, true)],
+                district: index.names[view.getUint16(offset + 6, true)],
+                city: index.names[view.getUint16(offset + 8, true)],
+                found: true,
+            };
+        }
+    }
+    return null;
+}
@@ -1,5 +1,10 @@
-// Free Indian postal pincode lookup
-// Uses https://api.postalpincode.in/pincode/{pincode}
+// Indian postal pincode lookup
+// Tries the bundled offline index first (/api/pincode, built by
+// build_pincode_index.py), then https://api.postalpincode.in/pincode/{pincode}
+// for pincodes the index doesn't know yet. Only the record count is bundled
+// here, so an empty index costs no request at all.
+
+import indexMeta from "./pincode-index-meta.json";
 
 export interface PincodeResult {
     state: string;
@@ -8,9 +13,22 @@ export interface PincodeResult {
     found: boolean;
 }
 
+const FALLBACK_TIMEOUT_MS = 4000;
+
 export async function lookupPincode(pincode: string): Promise<PincodeResult> {
+    if (indexMeta.count > 0) {
+        try {
+            const res = await fetch(`/api/pincode/${pincode}`);
+            if (res.ok) {
+                const data: PincodeResult = await res.json();
+                if (data.found) return data;
+            }
+        } catch { }
+    }
     try {
-        const res = await fetch(`https://api.postalpincode.in/pincode/${pincode}`);
+        const res = await fetch(`https://api.postalpincode.in/pincode/${pincode}`, {
+            signal: AbortSignal.timeout(FALLBACK_TIMEOUT_MS),
+        });
         const data = await res.json();
         if (data?.[0]?.Status === "Success" && data[0].PostOffice?.length > 0) {
             const po = data[0].PostOffice[0];
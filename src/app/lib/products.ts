@@ -1343,3 +1343,20 @@ function applySaffronDiscount(product: Product): Product {
 }
 
 export const products: Product[] = rawProducts.map(normalizeProductText).map(applySaffronDiscount);
+
+// What a product grid card needs. Client pages listing the whole catalog
+// take these instead of `products`, so the long-form copy (detailed
+// descriptions, benefits, galleries) stays on the server; search over that
+// copy goes through search-index.ts.
+export type ProductCard = Pick<
+    Product,
+    | 'id' | 'name' | 'price' | 'originalPrice' | 'image' | 'category' | 'description'
+    | 'weightMl' | 'variants' | 'stockLevel' | 'averageRating' | 'reviewCount'
+>;
+
+export function toProductCard(product: Product): ProductCard {
+    const { id, name, price, originalPrice, image, category, description,
+        weightMl, variants, stockLevel, averageRating, reviewCount } = product;
+    return { id, name, price, originalPrice, image, category, description,
+        weightMl, variants, stockLevel, averageRating, reviewCount };
+}
@@ -0,0 +1,109 @@
+import index from "./search-index.json";
+
+// Generated by build_search_index.py: `terms` is every indexed token,
+// sorted and space-joined, and `postings[t]` packs term t's products as
+// fixed-width entries of `productWidth` ALPHABET digits (catalog position)
+// plus one digit indexing `weights`. A query binary-searches the terms for
+// each token's prefix range and merges those postings, so it never touches
+// the product descriptions themselves.
+const ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_";
+
+const terms: string[] = index.terms.split(" ");
+const postings: string[] = index.postings;
+const stopwords = new Set<string>(index.stopwords.split(" "));
+const entryWidth = index.productWidth + 1;
+
+// Products added to products.ts after the index was last built are not in
+// it; callers fall back to a plain substring match for those.
+export const indexedIds = new Set<string>(index.ids);
+
+export function tokenizeQuery(text: string): string[] {
+    return text.toLowerCase().match(/[a-z0-9]+/g) ?? [];
+}
+
+// First term >= key
+function lowerBound(key: string): number {
+    let lo = 0;
+    let hi = terms.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (terms[mid] < key) lo = mid + 1;
+        else hi = mid;
+    }
+    return lo;
+}
+
+// [lo, hi) range of the terms starting with prefix; "{" sorts after every
+// [a-z0-9] character, so prefix + "{" bounds the run from above
+function prefixRange(prefix: string): { lo: number; hi: number } {
+    return { lo: lowerBound(prefix), hi: lowerBound(prefix + "{") };
+}
+
+// [product position, weight] pairs for term t
+function decodePostings(t: number): [number, number][] {
+    const packed = postings[t];
+    const result: [number, number][] = [];
+    for (let i = 0; i < packed.length; i += entryWidth) {
+        let product = 0;
+        for (let j = i; j < i + entryWidth - 1; j++) product = product * ALPHABET.length + ALPHABET.indexOf(packed[j]);
+        result.push([product, index.weights[ALPHABET.indexOf(packed[i + entryWidth - 1])]]);
+    }
+    return result;
+}
+
+/**
+ * Score every product matching all query tokens (each token matches as a
+ * prefix, so results narrow while typing). Returns product id -> score,
+ * higher is more relevant, or null when the query has nothing to search.
+ */
+export function searchProducts(query: string): Map<string, number> | null {
+    const tokens = tokenizeQuery(query);
+    const meaningful = tokens.filter((t) => !stopwords.has(t));
+    const searchTokens = meaningful.length > 0 ? meaningful : tokens.slice(-1);
+    if (searchTokens.length === 0) return null;
+
+    let scores: Map<number, number> | null = null;
+    for (const token of searchTokens) {
+        const { lo, hi } = prefixRange(token);
+        const best = new Map<number, number>();
+        for (let t = lo; t < hi; t++) {
+            // A whole-word match outranks a word that merely starts with the token
+            const bonus = terms[t] === token ? 1 : 0;
+            for (const [product, weight] of decodePostings(t)) {
+                if (weight + bonus > (best.get(product) ?? 0)) best.set(product, weight + bonus);
+            }
+        }
+        if (scores === null) {
+            scores = best;
+        } else {
+            const previous: Map<number, number> = scores;
+            scores = new Map();
+            for (const [product, weight] of best) {
+                const score = previous.get(product);
+                if (score !== undefined) scores.set(product, score + weight);
+            }
+        }
+        if (scores.size === 0) break;
+    }
+
+    const result = new Map<string, number>();
+    for (const [product, score] of scores ?? []) result.set(index.ids[product], score);
+    return result;
+}
+
+/**
+ * Type-ahead: completions for the last word of the query, most common
+ * terms first, returned as whole queries ready to drop into the input.
+ */
+export function suggestQueries(query: string, limit = 5): string[] {
+    const match = query.toLowerCase().match(/^(.*?)([a-z0-9]+)$/);
+    if (!match) return [];
+    const [, head, prefix] = match;
+    const { lo, hi } = prefixRange(prefix);
+    const popularity = (t: number) => postings[t].length;
+    return Array.from({ length: hi - lo }, (_, i) => lo + i)
+        .filter((t) => terms[t] !== prefix)
+        .sort((a, b) => popularity(b) - popularity(a))
+        .slice(0, limit)
+        .map((t) => head + terms[t]);
+}
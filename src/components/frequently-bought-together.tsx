@@ -22,11 +22,12 @@ export function FrequentlyBoughtTogether({
         new Set([currentProduct.id])
     );
 
-    // Get recommended products
+    // Get recommended products, strongest first (co_purchase.py ranks the list)
     const recommendedProducts = currentProduct.frequentlyBoughtWith
-        ? products.filter((p) =>
-            currentProduct.frequentlyBoughtWith!.includes(p.id)
-        ).slice(0, maxRecommendations - 1)
+        ? currentProduct.frequentlyBoughtWith
+            .map((id) => products.find((p) => p.id === id))
+            .filter((p): p is Product => p !== undefined)
+            .slice(0, maxRecommendations - 1)
         : products
             .filter(
                 (p) =>
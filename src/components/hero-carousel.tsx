@@ -5,6 +5,7 @@ import Image from "next/image";
 import Link from "next/link";
 import { motion } from "framer-motion";
 import { Button } from "@/components/ui/button";
+import { getImagePlaceholder } from "@/app/lib/image-placeholders";
 
 const heroImages = [
     {
@@ -68,6 +69,7 @@ export function HeroCarousel() {
                         fetchPriority="high"
                         loading="eager"
                         sizes="100vw"
+                        placeholder={getImagePlaceholder(heroImages[0].src)?.blurDataURL ?? "empty"}
                         className="object-cover object-center brightness-[0.85]"
                     />
                 </div>
@@ -91,6 +93,7 @@ export function HeroCarousel() {
                                 fill
                                 loading="lazy"
                                 sizes="100vw"
+                                placeholder={getImagePlaceholder(hero.src)?.blurDataURL ?? "empty"}
                                 className="object-cover object-center brightness-[0.85]"
                             />
                         </motion.div>
@@ -4,6 +4,7 @@ import { useState } from "react";
 import Image from "next/image";
 import { ChevronLeft, ChevronRight, X, ZoomIn } from "lucide-react";
 import { ProductImage } from "@/app/lib/products";
+import { clearPlaceholder, placeholderStyle } from "@/app/lib/image-placeholders";
 
 interface ProductImageGalleryProps {
     images: ProductImage[];
@@ -92,6 +93,9 @@ export function ProductImageGallery({ images, productName }: ProductImageGallery
                         src={currentImage?.url || images[0]?.url}
                         alt={currentImage?.alt || productName}
                         className="w-full h-full object-contain mix-blend-multiply p-8 transition-transform group-hover:scale-105 duration-300"
+                        style={placeholderStyle(currentImage?.url || images[0]?.url)}
+                        ref={clearPlaceholder}
+                        onLoad={(e) => clearPlaceholder(e.currentTarget)}
                         draggable={false}
                     />
                 </div>
@@ -178,6 +182,9 @@ export function ProductImageGallery({ images, productName }: ProductImageGallery
                                 src={image.url}
                                 alt={image.alt}
                                 className="w-full h-full object-contain bg-muted/10 p-2"
+                                style={placeholderStyle(image.url)}
+                                ref={clearPlaceholder}
+                                onLoad={(e) => clearPlaceholder(e.currentTarget)}
                                 draggable={false}
                             />
                             {image.caption && (
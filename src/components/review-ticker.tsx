@@ -2,8 +2,20 @@
 
 import React from "react";
 import Link from "next/link";
+import reviewStats from "@/app/lib/review-stats.json";
 
-const reviews = [
+type TickerReview = {
+    name: string;
+    initial: string;
+    title: string;
+    text: string;
+    stars: number;
+    emoji?: string;
+    productId: string;
+};
+
+// Shown until aggregate_reviews.py has real featured reviews to publish
+const FALLBACK_REVIEWS: TickerReview[] = [
     {
         name: "Amit B.",
         initial: "A",
@@ -78,6 +90,10 @@ const reviews = [
     },
 ];
 
+// Precomputed by aggregate_reviews.py, so rendering never aggregates reviews
+const publishedReviews = reviewStats.ticker as TickerReview[];
+const reviews = publishedReviews.length > 0 ? publishedReviews : FALLBACK_REVIEWS;
+
 const StarRating = ({ count }: { count: number }) => (
     <div className="flex gap-0.5">
         {Array.from({ length: 5 }).map((_, i) => (
@@ -93,14 +109,14 @@ const StarRating = ({ count }: { count: number }) => (
     </div>
 );
 
-const ReviewCard = ({ review }: { review: (typeof reviews)[0] }) => (
+const ReviewCard = ({ review }: { review: TickerReview }) => (
     <div
         style={{ width: "300px", flexShrink: 0 }}
         className="rounded-lg border border-border bg-card p-5 shadow-sm hover:shadow-md transition-shadow duration-150 cursor-pointer"
     >
         <div className="flex items-center justify-between mb-3">
             <StarRating count={review.stars} />
-            <span className="text-lg">{review.emoji}</span>
+            {review.emoji && <span className="text-lg">{review.emoji}</span>}
         </div>
         <h3 className="font-serif text-base font-semibold text-foreground mb-2">
             {review.title}
@@ -160,6 +176,8 @@ const ReviewsCarousel: React.FC = () => {
 
             <p className="text-center mt-6 font-sans text-xs text-muted-foreground tracking-wide">
                 Hover to pause · {reviews.length} featured reviews
+                {reviewStats.totals.reviewCount > 0 &&
+                    ` · ${reviewStats.totals.averageRating}★ from ${reviewStats.totals.reviewCount.toLocaleString("en-IN")} reviews`}
             </p>
         </section>
     );
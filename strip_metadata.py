@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Metadata stripping and lossless PNG recompression
+Camera originals and exported PNGs carry EXIF, XMP, text chunks and
+embedded ICC profiles the site never uses. This pass removes them once and
+re-saves each image as small as it can without changing what is displayed:
+
+- PNG: pixels are converted to sRGB (if the embedded profile isn't sRGB),
+  then the smallest of several candidates is kept - the narrowest lossless
+  mode (opaque RGBA -> RGB, gray RGB -> L), a 256-colour palette, each saved
+  with zlib level 9 under the default, filtered and RLE strategies. Every
+  candidate is decoded again and compared with the original pixels; any
+  channel further off than --tolerance (default 0: identical) is rejected.
+  16-bit PNGs and modes Pillow can't hold in 8-bit RGB(A) (I, I;16, PA, ...)
+  are skipped, since any re-save would lose precision.
+- JPEG: APPn/COM segments are dropped straight from the file, so the
+  compressed image data is untouched. JFIF, Adobe (colour transform) and
+  non-sRGB ICC segments are kept, and an EXIF orientation survives as a
+  minimal EXIF block so rotated photos still display upright.
+
+Files are only replaced when the result is smaller; originals go into the
+backup store (see backup_store.py) as a strip-<timestamp> run.
+
+    python3 strip_metadata.py                       # public/ and src/app/icon.png
+    python3 strip_metadata.py public/logo.png --dry-run
+    python3 strip_metadata.py --tolerance 2         # allow near-lossless palettes
+"""
+
+import argparse
+import io
+import os
+import struct
+import zlib
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+from backup_store import STORE_DIR, BackupStore
+from image_pipeline import is_srgb_profile, to_srgb, write_atomic
+from optimize_images import MB, find_images, run_parallel
+
+APP_ICONS = ['src/app/icon.png']  # Next.js app icons live outside public/
+SUFFIX_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG'}
+ZLIB_STRATEGIES = {'default': zlib.Z_DEFAULT_STRATEGY, 'filtered': zlib.Z_FILTERED, 'rle': zlib.Z_RLE}
+EXIF_ORIENTATION = 0x0112
+ROUND_TRIP_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')  # convert to 8-bit RGB(A) exactly
+
+class NotLossless(Exception):
+    """A PNG that can't be re-saved without losing precision"""
+
+# JPEG markers (ITU T.81, table B.1)
+SOI, SOS, EOI = 0xD8, 0xDA, 0xD9
+APP0, APP1, APP2, APP14, APP15, COM = 0xE0, 0xE1, 0xE2, 0xEE, 0xEF, 0xFE
+STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))  # TEM, RSTn: no length field
+
+def visible_pixels(img):
+    """RGBA copy where fully transparent pixels are zeroed, since their colour is never shown"""
+    rgba = img.convert('RGBA')
+    transparent = rgba.getchannel('A').point(lambda a: 255 if a == 0 else 0)
+    rgba.paste((0, 0, 0, 0), mask=transparent)
+    return rgba
+
+def max_pixel_diff(a, b) -> int:
+    """Largest per-channel difference between two images' visible pixels"""
+    if a.size != b.size:
+        return 255
+    extrema = ImageChops.difference(visible_pixels(a), visible_pixels(b)).getextrema()
+    return max(high for _, high in extrema)
+
+def narrowest_mode(img):
+    """Drop an all-opaque alpha channel and colour channels of grayscale images"""
+    if img.mode == 'RGBA' and img.getchannel('A').getextrema() == (255, 255):
+        img = img.convert('RGB')
+    if img.mode in ('RGB', 'RGBA'):
+        r, g, b = img.getchannel('R'), img.getchannel('G'), img.getchannel('B')
+        if ImageChops.difference(r, g).getbbox() is None and ImageChops.difference(r, b).getbbox() is None:
+            img = img.convert('LA' if img.mode == 'RGBA' else 'L')
+    return img
+
+def png_candidates(img, tolerance=0):
+    """(label, image) pairs worth encoding: narrowest lossless mode and a palette"""
+    base = narrowest_mode(img)
+    candidates = [(base.mode, base)]
+    # A photo with more than 256 colours can't be palettized exactly; don't bother quantizing
+    if base.mode in ('RGB', 'RGBA') and (tolerance > 0 or base.getcolors(256) is not None):
+        method = Image.Quantize.FASTOCTREE if base.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        candidates.append(('palette', base.quantize(256, method=method, dither=Image.Dither.NONE)))
+    return candidates
+
+def png_bit_depth(path) -> int:
+    """Bits per sample from the IHDR chunk (Pillow decodes 16-bit RGB(A) as 8-bit)"""
+    with open(path, 'rb') as f:
+        header = f.read(25)
+    return header[24] if len(header) == 25 and header[12:16] == b'IHDR' else 8
+
+def recompress_png(path, tolerance=0):
+    """
+    Smallest metadata-free PNG encoding of path within tolerance.
+
+    Returns (data, label, diff): label names the winning mode and zlib
+    strategy, diff is its largest per-channel difference from the original.
+    Raises NotLossless for PNGs whose pixels don't fit 8-bit RGB(A), since
+    the comparison would only see the already-reduced pixels.
+    """
+    bit_depth = png_bit_depth(path)
+    if bit_depth > 8:
+        raise NotLossless(f"{bit_depth}-bit")
+    with Image.open(path) as img:
+        if img.mode not in ROUND_TRIP_MODES:
+            raise NotLossless(f"mode {img.mode}")
+        img.load()
+        icc_profile = img.info.get('icc_profile')
+        if img.mode == 'P':
+            img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+        else:
+            img = img.copy()
+    reference = to_srgb(img, icc_profile)
+    # Keep a profile only if it couldn't be converted; dropping it would shift the colours
+    if reference is not img or (icc_profile and is_srgb_profile(icc_profile)):
+        icc_profile = None
+
+    best = None
+    for label, candidate in png_candidates(reference, tolerance):
+        for strategy, compress_type in ZLIB_STRATEGIES.items():
+            buffer = io.BytesIO()
+            # Passing icc_profile explicitly stops Pillow copying the source profile back in
+            candidate.save(buffer, 'PNG', optimize=True, compress_level=9,
+                           compress_type=compress_type, icc_profile=icc_profile)
+            data = buffer.getvalue()
+            if best is not None and len(data) >= len(best[0]):
+                continue
+            with Image.open(io.BytesIO(data)) as decoded:
+                diff = max_pixel_diff(decoded, reference)
+            if diff <= tolerance:
+                best = (data, f"{label}, {strategy}", diff)
+    return best
+
+def jpeg_segments(data):
+    """Split a JPEG into (marker, segment bytes) up to SOS, plus the remaining bytes"""
+    if data[:2] != bytes([0xFF, SOI]):
+        raise ValueError("not a JPEG (missing SOI)")
+    segments, pos = [], 2
+    while pos < len(data):
+        if data[pos] != 0xFF:
+            raise ValueError(f"bad JPEG marker at byte {pos}")
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in STANDALONE_MARKERS:
+            segments.append((marker, data[pos:pos + 2]))
+            pos += 2
+            continue
+        if marker == EOI:
+            break
+        length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+        if marker == SOS:
+            return segments, data[pos:]
+        segments.append((marker, data[pos:pos + 2 + length]))
+        pos += 2 + length
+    raise ValueError("JPEG ends before the image data (no SOS)")
+
+def orientation_segment(orientation):
+    """APP1 segment holding nothing but an EXIF orientation tag"""
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = orientation
+    payload = exif.tobytes()  # already starts with the Exif header
+    return bytes([0xFF, APP1]) + struct.pack('>H', len(payload) + 2) + payload
+
+def strip_jpeg(path):
+    """
+    Drop metadata segments from a JPEG without re-encoding it.
+
+    Returns (data, label, 0); the image data after SOS is copied verbatim.
+    """
+    data = Path(path).read_bytes()
+    segments, scan = jpeg_segments(data)
+    with Image.open(path) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION)
+        icc_profile = img.info.get('icc_profile')
+    keep_icc = bool(icc_profile) and not is_srgb_profile(icc_profile)
+
+    kept = [bytes([0xFF, SOI])]
+    dropped = set()
+    for marker, segment in segments:
+        if marker == APP0 and segment[4:9] == b'JFIF\0':
+            kept.append(segment)
+        elif marker == APP14 or (marker == APP2 and keep_icc and segment[4:16] == b'ICC_PROFILE\0'):
+            kept.append(segment)  # Adobe colour transform / profile we can't bake in losslessly
+        elif APP0 <= marker <= APP15 or marker == COM:
+            dropped.add('COM' if marker == COM else f"APP{marker - APP0}")
+        else:
+            kept.append(segment)
+    if orientation and orientation != 1:
+        kept.insert(1, orientation_segment(orientation))
+
+    label = f"dropped {', '.join(sorted(dropped))}" if dropped else "no metadata"
+    if keep_icc:
+        label += ", kept non-sRGB ICC"
+    return b''.join(kept) + scan, label, 0
+
+def strip_file(filepath, store_dir, tolerance=0, dry_run=False):
+    """
+    Strip and recompress one PNG/JPEG, replacing it only if smaller.
+
+    Runs inside a worker process; the backup blob is returned for the
+    parent's run manifest, as in optimize_images.convert_file().
+    """
+    result = {'path': str(filepath), 'status': 'error', 'saved_bytes': 0, 'message': '', 'backup': {}}
+    try:
+        original_bytes = os.path.getsize(filepath)
+        with Image.open(filepath) as img:
+            fmt = img.format
+        if fmt == 'JPEG':
+            best = strip_jpeg(filepath)
+        elif fmt == 'PNG':
+            best = recompress_png(filepath, tolerance)
+        else:
+            result['status'] = 'skipped'
+            result['message'] = f"⏭️  Skipping {filepath} ({fmt})"
+            return result
+        # e.g. flower-walnut-icon.png is really a JPEG; it is kept as one
+        name_note = f" ({fmt} data)" if SUFFIX_FORMATS.get(Path(filepath).suffix.lower()) != fmt else ""
+
+        if best is None or len(best[0]) >= original_bytes:
+            result['status'] = 'kept'
+            result['message'] = f"ℹ️  {filepath}{name_note}: already as small as it gets, keeping original"
+            return result
+        data, label, diff = best
+        if not dry_run:
+            result['backup'] = {os.path.relpath(filepath): BackupStore(store_dir).put(filepath)}
+            write_atomic(filepath, data)
+        result['status'] = 'stripped'
+        result['saved_bytes'] = original_bytes - len(data)
+        exact = "pixel-identical" if diff == 0 else f"max Δ{diff}"
+        result['message'] = (
+            f"🔧 {'Would strip' if dry_run else 'Stripped'}: {filepath}{name_note}\n"
+            f"   ✅ Saved {(original_bytes - len(data)) / 1024:.1f}KB "
+            f"({original_bytes / 1024:.1f}KB → {len(data) / 1024:.1f}KB, "
+            f"-{(original_bytes - len(data)) / original_bytes:.1%}) [{label}; {exact}]"
+        )
+    except NotLossless as e:
+        result['status'] = 'skipped'
+        result['message'] = f"⏭️  Skipping {filepath} ({e} PNG can't be re-saved losslessly)"
+    except Exception as e:
+        result['message'] = f"❌ Error processing {filepath}: {e}"
+    return result
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Strip image metadata and recompress PNGs losslessly")
+    parser.add_argument('paths', nargs='*',
+                        help="files to process (default: PNG/JPG under public/ plus the app icon)")
+    parser.add_argument('--tolerance', type=int, default=0,
+                        help="max per-channel pixel difference a PNG candidate may have (default: 0)")
+    parser.add_argument('--dry-run', action='store_true', help="report savings without writing anything")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: all cores)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    paths = args.paths or (
+        [str(p) for p in find_images(['*.png', '*.PNG', '*.jpg', '*.JPG', '*.jpeg', '*.JPEG'])]
+        + [p for p in APP_ICONS if os.path.exists(p)])
+
+    print("🧹 Metadata strip + lossless recompression")
+    print("=" * 50)
+    store = BackupStore(STORE_DIR)
+    run_name = store.new_run_name('strip')
+    if args.dry_run:
+        print("🔍 Dry run: nothing will be written")
+    else:
+        print(f"📁 Backup run: {run_name} (store: {STORE_DIR})")
+    print(f"🎯 Tolerance: {args.tolerance} ({'pixel-identical' if args.tolerance == 0 else 'per channel'})\n")
+
+    counts = {'stripped': 0, 'kept': 0, 'skipped': 0, 'error': 0}
+    saved_bytes = 0
+    backed_up = {}
+    tasks = [(path, STORE_DIR, args.tolerance, args.dry_run) for path in sorted(paths)]
+    for result in run_parallel(strip_file, tasks, args.jobs):
+        print(result['message'])
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        saved_bytes += result['saved_bytes']
+        backed_up.update(result['backup'])
+
+    if backed_up:
+        store.write_run(run_name, '.', backed_up)
+
+    print("\n" + "=" * 50)
+    print(f"✨ {'Would strip' if args.dry_run else 'Stripped'} {counts['stripped']} files, "
+          f"saved {saved_bytes / MB:.2f}MB")
+    print(f"   Already minimal: {counts['kept']}, skipped: {counts['skipped']}, errors: {counts['error']}")
+    if backed_up:
+        print(f"↩️  Undo with: python3 backup_store.py restore {run_name}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for catalog_patch.py's append edits
+Run with: python3 -m pytest test_catalog_patch.py
+"""
+
+from catalog_patch import apply_edits, plan_field_updates, plan_insertions
+from product_catalog import compile_catalog
+from products_parser import parse_products
+
+SOURCE = """const rawProducts: Product[] = [
+    {
+        id: 'acacia-honey',
+        price: 499,
+        reviewCount: 73 // from reviews
+    },
+    {
+        id: 'white-oud',
+        price: 899, // launch price
+    },
+    {
+        id: 'walnut',
+        tags: ['nuts', 'kashmir'],
+    },
+];
+"""
+
+def patched(planner, changes):
+    edits, applied, _ = planner(SOURCE, compile_catalog(SOURCE), changes)
+    text = apply_edits(SOURCE, edits)
+    return text, applied, {p['id']: p['data'] for p in parse_products(text)}
+
+def test_trailing_comment_without_comma():
+    text, applied, data = patched(plan_field_updates, {'acacia-honey': {'newField': '3'}})
+    assert applied == ['acacia-honey']
+    assert "reviewCount: 73, // from reviews\n        newField: 3,\n" in text
+    assert data['acacia-honey'] == {'id': 'acacia-honey', 'price': 499, 'reviewCount': 73, 'newField': 3}
+
+def test_trailing_comment_after_comma():
+    text, _, data = patched(plan_insertions, {'white-oud': "badge: 'New'"})
+    assert "price: 899, // launch price\n        badge: 'New',\n" in text
+    assert data['white-oud']['badge'] == 'New'
+
+def test_plain_last_property():
+    text, _, data = patched(plan_field_updates, {'walnut': {'price': '650', 'stock': '12'}})
+    assert data['walnut'] == {'id': 'walnut', 'tags': ['nuts', 'kashmir'], 'price': 650, 'stock': 12}
+    assert "tags: ['nuts', 'kashmir'],\n        price: 650,\n        stock: 12,\n    }" in text
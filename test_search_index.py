@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests for build_search_index.py and the committed search index
+Run with: python3 -m pytest test_search_index.py
+"""
+
+import json
+from bisect import bisect_left
+
+from build_search_index import INDEX_FILE, build_index, build_postings, decode_postings, index_json
+from product_catalog import PRODUCTS_FILE, load_catalog
+
+def catalog():
+    return [p for p in load_catalog(PRODUCTS_FILE) if p.get('id')]
+
+def test_committed_index_is_fresh():
+    with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+        committed = f.read()
+    assert committed == index_json(build_index(catalog())), \
+        "search-index.json is stale: run python3 build_search_index.py and commit it"
+
+def test_postings_round_trip():
+    products = catalog()
+    index = json.loads(index_json(build_index(products)))
+    postings = build_postings(products)
+    terms = index['terms'].split(' ')
+    assert terms == sorted(postings)
+    for t, term in enumerate(terms):
+        assert decode_postings(index, t) == postings[term]
+
+def test_prefix_range_matches_client_bounds():
+    # search-index.ts bounds a prefix's run with lowerBound(prefix + "{")
+    terms = build_index(catalog())['terms'].split(' ')
+    for prefix in ('saff', 'kashmiri', 'w', 'zzz'):
+        lo, hi = bisect_left(terms, prefix), bisect_left(terms, prefix + '{')
+        assert terms[lo:hi] == [t for t in terms if t.startswith(prefix)]
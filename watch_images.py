@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Watch public/ and optimize images as they land
+- inotify (via ctypes, no extra packages) on Linux; polling elsewhere or
+  with --poll
+- Events are debounced: a file is processed once it has been quiet for
+  --debounce seconds, so half-copied photos are never picked up
+- Only the changed files go through the existing conversion functions:
+  new PNG/JPG -> convert_file() (WebP, optional AVIF), hero*.png/jpg ->
+  optimize_hero_image(), WebP over 500KB -> reoptimize_webp(); all of
+  them, heroes included, skip outputs the image manifest says are current
+- One worker pool stays up for the whole session, and originals are backed
+  up into a single backup run (see backup_store.py)
+- Files already present at startup are left alone; run optimize_images.py
+  once for a full pass
+
+    python3 watch_images.py            # Ctrl+C to stop
+    python3 watch_images.py --poll 2   # poll every 2s instead of inotify
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import signal
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from backup_store import STORE_DIR, BackupStore
+from image_manifest import ImageManifest
+from image_pipeline import HERO_SOURCE_PATTERNS, avif_available
+from image_quality import DEFAULT_MIN_SSIM, numpy_available
+from optimize_hero_images import hero_outputs, optimize_hero_image
+from optimize_images import MANIFEST_ROOT, MB, convert_file, is_excluded_dir, reoptimize_webp, walk_public
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+LARGE_WEBP_BYTES = MB // 2
+
+# linux/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class InotifyWatcher:
+    """Recursive inotify watch on a directory tree"""
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self, root):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # wd -> directory path
+        self.add_tree(root)
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.dirs[wd] = directory
+
+    def add_tree(self, directory):
+        """Watch directory and every non-excluded directory below it; returns files found"""
+        found = []
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            self.add_watch(current)
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not is_excluded_dir(os.path.relpath(entry.path, self.root).replace(os.sep, '/')):
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        found.append(entry.path)
+        return found
+
+    def changes(self, timeout):
+        """Paths written or moved in within timeout seconds (None on queue overflow)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        changed = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(buf, offset)
+                name = buf[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+                offset += EVENT_HEADER.size + length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if wd not in self.dirs:
+                    continue
+                path = os.path.join(self.dirs[wd], os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    rel_dir = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not is_excluded_dir(rel_dir):
+                        # Files may land before the watch exists; pick them up from the scan
+                        changed.extend(self.add_tree(path))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.append(path)
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Fallback: compare (size, mtime) snapshots of the tree every interval"""
+
+    def __init__(self, root, interval):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for entry in walk_public(self.root):
+            stat = entry.stat()
+            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self.scan()
+        changed = [path for path, state in current.items() if self.snapshot.get(path) != state]
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+def classify(path):
+    """Which optimizer a changed file goes to: 'hero', 'source', 'webp' or None"""
+    name = os.path.basename(path)
+    if name.startswith('.') or name.endswith('.tmp.webp'):
+        return None  # our own temp files
+    rel_path = os.path.relpath(path, MANIFEST_ROOT).replace(os.sep, '/')
+    if rel_path.startswith('..') or any(is_excluded_dir(part) for part in rel_path.split('/')[:-1]):
+        return None
+    if '/' not in rel_path and any(fnmatch.fnmatchcase(name, p) for p in HERO_SOURCE_PATTERNS):
+        return 'hero'
+    suffix = Path(name).suffix.lower()
+    if suffix in SOURCE_EXTENSIONS:
+        return 'source'
+    if suffix == '.webp':
+        return 'webp'
+    return None
+
+class Debouncer:
+    """Holds paths until no event has touched them for `quiet` seconds"""
+
+    def __init__(self, quiet):
+        self.quiet = quiet
+        self.pending = {}  # path -> time of last event
+
+    def add(self, paths):
+        now = time.monotonic()
+        for path in paths:
+            self.pending[path] = now
+
+    def ready(self):
+        now = time.monotonic()
+        done = sorted(p for p, t in self.pending.items() if now - t >= self.quiet)
+        for path in done:
+            del self.pending[path]
+        return done
+
+    def next_timeout(self, default):
+        """Seconds until the quietest pending path is due, so busy files don't hold it back"""
+        if not self.pending:
+            return default
+        return max(0.05, self.quiet - (time.monotonic() - min(self.pending.values())))
+
+def ignore_sigint():
+    """Worker initializer: Ctrl+C reaches the whole process group; only the parent handles it"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def hero_task(path, target_kb, avif, entries):
+    """Worker: optimize one hero; returns (WebP path or None, manifest entries of its outputs)"""
+    output = optimize_hero_image(path, MANIFEST_ROOT, target_kb, 7, None, avif, entries=entries)
+    return output, entries
+
+class WatchSession:
+    """Warm worker pool, manifest and backup run shared by every batch"""
+
+    def __init__(self, jobs, avif, target_kb, min_ssim=None):
+        self.pool = ProcessPoolExecutor(max_workers=jobs, initializer=ignore_sigint)
+        self.manifest = ImageManifest()
+        self.store = BackupStore(STORE_DIR)
+        self.run_name = self.store.new_run_name('watch')
+        self.avif = avif
+        self.target_kb = target_kb
+        self.min_ssim = min_ssim
+        self.written = {}  # outputs we just wrote -> (size, mtime_ns), so their events are ignored
+
+    def ours(self, path):
+        """True for the event of an output we wrote; each remembered write is matched once"""
+        written = self.written.pop(path, None)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True  # gone already (temp file, or replaced again)
+        return written == (stat.st_size, stat.st_mtime_ns)
+
+    def remember(self, paths):
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self.written[path] = (stat.st_size, stat.st_mtime_ns)
+
+    def process(self, paths):
+        futures = []
+        for path in paths:
+            kind = classify(path)
+            if kind is None or self.ours(path):
+                continue
+            if kind == 'hero':
+                entries = {spec['path']: self.manifest.get(spec['path'])
+                           for spec in hero_outputs(path, MANIFEST_ROOT, self.target_kb, avif=self.avif)}
+                futures.append((kind, path, self.pool.submit(hero_task, path, self.target_kb, self.avif, entries)))
+            elif kind == 'source':
+                source = Path(path)
+                outputs = [source.with_suffix('.webp')] + ([source.with_suffix('.avif')] if self.avif else [])
+                entries = {str(out): self.manifest.get(out) for out in outputs}
+                futures.append((kind, path, self.pool.submit(
+                    convert_file, path, STORE_DIR, 82, entries, self.avif, self.min_ssim)))
+            elif os.path.getsize(path) >= LARGE_WEBP_BYTES:
+                futures.append((kind, path, self.pool.submit(
+                    reoptimize_webp, path, STORE_DIR, 82, {path: self.manifest.get(path)}, self.min_ssim)))
+
+        backed_up = {}
+        for kind, path, future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Worker failed on {path}: {e}")
+                continue
+            if kind == 'hero':
+                # optimize_hero_image prints from the worker (including skips of unchanged heroes)
+                output, entries = result
+                for out, entry in entries.items():
+                    self.manifest.update(out, entry)
+                self.remember(entries)
+                if not output:
+                    print(f"❌ Hero optimization failed: {path}")
+                continue
+            print(result['message'])
+            backed_up.update(result['backup'])
+            for out, entry in result['entries'].items():
+                self.manifest.update(out, entry)
+            self.remember(result['entries'])
+
+        if futures:
+            self.manifest.save()
+            self.store.write_run(self.run_name, MANIFEST_ROOT, backed_up, append=True)
+
+    def close(self):
+        self.pool.shutdown()
+        self.manifest.save()
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch public/ and optimize new or changed images")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="worker processes kept warm for the session (default: all cores)")
+    parser.add_argument('--debounce', type=float, default=1.0,
+                        help="seconds a file must be quiet before it is processed (default: 1.0)")
+    parser.add_argument('--poll', type=float, metavar='SECONDS',
+                        help="poll every SECONDS instead of using inotify")
+    parser.add_argument('--avif', action='store_true', help="also write AVIF next to converted WebPs")
+    parser.add_argument('--target-kb', type=float, default=200, help="hero byte budget in KB (default: 200)")
+    parser.add_argument('--min-ssim', type=float, default=None,
+                        help=f"search each WebP's quality for this SSIM threshold (e.g. {DEFAULT_MIN_SSIM}) "
+                             "instead of using quality 82")
+    args = parser.parse_args()
+    if args.avif and not avif_available():
+        print("⚠️  AVIF not supported by this Pillow build, writing WebP only")
+        args.avif = False
+    if args.min_ssim and not numpy_available():
+        print("⚠️  numpy not installed, using fixed quality 82 instead of an SSIM search")
+        args.min_ssim = None
+
+    watcher = None
+    if args.poll is None:
+        try:
+            watcher = InotifyWatcher(MANIFEST_ROOT)
+            mode = f"inotify on {len(watcher.dirs)} directories"
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify unavailable ({e}), falling back to polling")
+    if watcher is None:
+        watcher = PollingWatcher(MANIFEST_ROOT, args.poll or 2.0)
+        mode = f"polling every {watcher.interval:g}s"
+
+    session = WatchSession(args.jobs, args.avif, args.target_kb or None, args.min_ssim or None)
+    debouncer = Debouncer(args.debounce)
+    print(f"👀 Watching {MANIFEST_ROOT}/ ({mode}, {args.jobs} warm worker(s)). Ctrl+C to stop.")
+    print(f"📁 Originals are backed up as run {session.run_name}")
+
+    try:
+        while True:
+            changed = watcher.changes(debouncer.next_timeout(default=3600))
+            if changed is None:
+                # Event queue overflowed: rescan everything once
+                print("⚠️  inotify queue overflow, rescanning")
+                changed = [entry.path for entry in walk_public()]
+            debouncer.add(changed)
+            ready = debouncer.ready()
+            if ready:
+                session.process(ready)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping watcher")
+    finally:
+        watcher.close()
+        session.close()
+
+if __name__ == '__main__':
+    main()